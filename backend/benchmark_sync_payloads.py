@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Payload benchmark for Google sync.
+Runs fetch_calendar_events and fetch_gmail_emails against a local stub of the Calendar
+and Gmail APIs that serves full resources and honors `fields=` masks, once with the
+partial-response masks from services/google_sync.py and once without, and reports the
+bytes transferred and JSON decode time per sync.
+
+Usage:
+    python benchmark_sync_payloads.py [--calendars 3] [--events 100] [--messages 50] [--runs 5]
+"""
+
+import argparse
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+# Synced files go to a scratch directory, never the real data root
+os.environ["USER_DATA_DIR"] = tempfile.mkdtemp(prefix="sync-benchmark-")
+
+MASK_NAMES = (
+    "CALENDAR_LIST_FIELDS", "CALENDAR_EVENT_FIELDS", "CALENDAR_CHANNEL_FIELDS", "GMAIL_LIST_FIELDS",
+    "GMAIL_MESSAGE_FIELDS", "GMAIL_HISTORY_FIELDS", "GMAIL_PROFILE_FIELDS", "GMAIL_WATCH_FIELDS",
+)
+
+_FIELD_NAME = re.compile(r"[A-Za-z0-9_]+")
+
+
+# ----------------------------------------------------------------------
+# Partial-response masks (the subset of the fields= syntax Google documents)
+# ----------------------------------------------------------------------
+
+def parse_mask(mask: str) -> Dict[str, Any]:
+    """
+    Parse a fields= mask ("a,b/c,d(e,f/g)") into a tree: name -> subtree,
+    or None to keep the whole value.
+    """
+    position = 0
+
+    def parse_list() -> Dict[str, Any]:
+        nonlocal position
+        tree: Dict[str, Any] = {}
+        while position < len(mask):
+            match = _FIELD_NAME.match(mask, position)
+            if not match:
+                raise ValueError(f"Bad mask at {position}: {mask!r}")
+            names = [match.group()]
+            position = match.end()
+            while position < len(mask) and mask[position] == "/":
+                match = _FIELD_NAME.match(mask, position + 1)
+                names.append(match.group())
+                position = match.end()
+            subtree = None
+            if position < len(mask) and mask[position] == "(":
+                position += 1
+                subtree = parse_list()
+                position += 1  # ")"
+            for name in reversed(names[1:]):
+                subtree = {name: subtree}
+            _merge(tree, names[0], subtree)
+            if position < len(mask) and mask[position] == ",":
+                position += 1
+            elif position < len(mask) and mask[position] == ")":
+                break
+        return tree
+
+    return parse_list()
+
+
+def _merge(tree: Dict[str, Any], name: str, subtree: Optional[Dict[str, Any]]) -> None:
+    if name in tree and tree[name] is not None and subtree is not None:
+        for key, value in subtree.items():
+            _merge(tree[name], key, value)
+    else:
+        tree[name] = None if name in tree and tree[name] is None else subtree
+
+
+def apply_mask(value: Any, tree: Optional[Dict[str, Any]]) -> Any:
+    """Keep only the masked fields of a resource (lists are masked element-wise)"""
+    if tree is None:
+        return value
+    if isinstance(value, list):
+        return [apply_mask(element, tree) for element in value]
+    if isinstance(value, dict):
+        return {key: apply_mask(value[key], subtree) for key, subtree in tree.items() if key in value}
+    return value
+
+
+# ----------------------------------------------------------------------
+# Stub Calendar / Gmail API
+# ----------------------------------------------------------------------
+
+def make_fixtures(calendars: int, events: int, messages: int) -> Dict[str, Any]:
+    """Full resources shaped like the real API's (the fields a default request returns)"""
+    now = time.time()
+
+    def iso(offset_hours: float) -> str:
+        return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(now + offset_hours * 3600))
+
+    calendar_list = []
+    calendar_events: Dict[str, List[Dict[str, Any]]] = {}
+    for c in range(calendars):
+        calendar_id = "me@example.com" if c == 0 else f"team{c}@group.calendar.google.com"
+        calendar_list.append({
+            "kind": "calendar#calendarListEntry", "etag": f'"{1700000000000 + c}"', "id": calendar_id,
+            "summary": "me@example.com" if c == 0 else f"Team calendar {c}", "timeZone": "Europe/Berlin",
+            "colorId": str(c + 1), "backgroundColor": "#9fe1e7", "foregroundColor": "#000000",
+            "selected": True, "accessRole": "owner" if c == 0 else "reader",
+            "defaultReminders": [{"method": "popup", "minutes": 10}],
+            "conferenceProperties": {"allowedConferenceSolutionTypes": ["hangoutsMeet"]},
+            **({"primary": True} if c == 0 else {}),
+        })
+        items = []
+        for e in range(events):
+            start = -7 * 24 + (e * 21 * 24 / events)
+            attendees = [
+                {"email": f"person{(e + a) % 40}@example.com", "displayName": f"Person {(e + a) % 40}",
+                 "responseStatus": "accepted"}
+                for a in range(1 + e % 6)
+            ] + [{"email": "me@example.com", "self": True, "organizer": e % 3 == 0, "responseStatus": "accepted"}]
+            items.append({
+                "kind": "calendar#event", "etag": f'"{3400000000000000 + e}"', "id": f"ev{c}x{e}",
+                "status": "confirmed", "htmlLink": f"https://www.google.com/calendar/event?eid=ZXY{c}x{e}",
+                "created": iso(-30 * 24), "updated": iso(-24),
+                "summary": f"Project sync {e % 12}", "description": ("Agenda: status, risks, next steps. " * (e % 8)).strip(),
+                "location": "Room 4.12" if e % 2 else "",
+                "creator": {"email": "person1@example.com"}, "organizer": {"email": "person1@example.com", "displayName": "Person 1"},
+                "start": {"dateTime": iso(start), "timeZone": "Europe/Berlin"},
+                "end": {"dateTime": iso(start + 1), "timeZone": "Europe/Berlin"},
+                "iCalUID": f"ev{c}x{e}@google.com", "sequence": e % 3, "attendees": attendees,
+                "hangoutLink": f"https://meet.google.com/abc-defg-{e:03d}",
+                "conferenceData": {
+                    "entryPoints": [
+                        {"entryPointType": "video", "uri": f"https://meet.google.com/abc-defg-{e:03d}", "label": f"meet.google.com/abc-defg-{e:03d}"},
+                        {"entryPointType": "phone", "uri": "tel:+49-30-123456", "label": "+49 30 123456", "pin": "123456789"},
+                    ],
+                    "conferenceSolution": {"key": {"type": "hangoutsMeet"}, "name": "Google Meet", "iconUri": "https://fonts.gstatic.com/s/i/productlogos/meet_2020q4/v6/web-512dp/logo_meet_2020q4_color_2x_web_512dp.png"},
+                    "conferenceId": f"abc-defg-{e:03d}",
+                },
+                "reminders": {"useDefault": True}, "eventType": "default",
+            })
+        calendar_events[calendar_id] = items
+
+    gmail = {}
+    for m in range(messages):
+        gmail[f"msg{m}"] = {
+            "id": f"msg{m}", "threadId": f"thr{m // 3}", "labelIds": ["INBOX", "CATEGORY_PERSONAL"] + (["UNREAD"] if m % 2 else []),
+            "snippet": ("Hi team, following up on the rollout plan and open questions " * 3)[:200],
+            "payload": {
+                "partId": "", "mimeType": "multipart/alternative", "filename": "",
+                "headers": [
+                    {"name": "From", "value": f"Person {m % 40} <person{m % 40}@example.com>"},
+                    {"name": "To", "value": "me@example.com, Team <team@example.com>"},
+                    {"name": "Subject", "value": f"Rollout plan {m % 10}"},
+                    {"name": "Date", "value": time.strftime("%a, %d %b %Y %H:%M:%S +0000", time.gmtime(now - m * 3600))},
+                ],
+                "body": {"size": 0},
+            },
+            "sizeEstimate": 15000 + m, "historyId": str(900000 + m), "internalDate": str(int((now - m * 3600) * 1000)),
+        }
+    return {"calendar_list": calendar_list, "events": calendar_events, "messages": gmail}
+
+
+class StubApi(BaseHTTPRequestHandler):
+    fixtures: Dict[str, Any] = {}
+    lock = threading.Lock()
+    bodies: List[bytes] = []
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        path = url.path
+        if path.endswith("/users/me/calendarList"):
+            resource = {"kind": "calendar#calendarList", "etag": '"p1"', "items": self.fixtures["calendar_list"]}
+        elif re.search(r"/calendars/[^/]+/events$", path):
+            calendar_id = path.split("/")[-2].replace("%40", "@")
+            resource = {"kind": "calendar#events", "etag": '"p2"', "summary": calendar_id, "timeZone": "Europe/Berlin",
+                        "updated": "2026-01-01T00:00:00Z", "accessRole": "owner",
+                        "defaultReminders": [{"method": "popup", "minutes": 10}],
+                        "items": self.fixtures["events"].get(calendar_id, [])[:int(query.get("maxResults", ["250"])[0])]}
+        elif path.endswith("/users/me/messages"):
+            ids = list(self.fixtures["messages"])[:int(query.get("maxResults", ["100"])[0])]
+            resource = {"messages": [{"id": i, "threadId": self.fixtures["messages"][i]["threadId"]} for i in ids],
+                        "resultSizeEstimate": len(ids)}
+        elif re.search(r"/users/me/messages/[^/]+$", path):
+            resource = self.fixtures["messages"][path.rsplit("/", 1)[-1]]
+        else:
+            self.send_error(404)
+            return
+        if "fields" in query:
+            resource = apply_mask(resource, parse_mask(query["fields"][0]))
+        body = json.dumps(resource).encode("utf-8")
+        with self.lock:
+            self.bodies.append(body)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=UTF-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args: Any) -> None:
+        pass
+
+
+# ----------------------------------------------------------------------
+
+def run_sync(google_sync, masked: bool, defaults: Dict[str, str]) -> Tuple[float, int, int, List[bytes]]:
+    """One calendar + email sync; returns (wall ms, requests, bytes, response bodies)"""
+    for name in MASK_NAMES:
+        setattr(google_sync, name, defaults[name] if masked else None)
+    StubApi.bodies = []
+    started = time.perf_counter()
+    calendar_items = google_sync.fetch_calendar_events("benchmark-user")
+    email_items = google_sync.fetch_gmail_emails("benchmark-user")
+    elapsed = (time.perf_counter() - started) * 1000
+    if not calendar_items or not email_items:
+        raise RuntimeError("sync returned no items; is the stub reachable?")
+    bodies = list(StubApi.bodies)
+    return elapsed, len(bodies), sum(len(body) for body in bodies), bodies
+
+
+def decode_ms(bodies: List[bytes], runs: int) -> float:
+    """Best-of-runs time to json.loads every response of one sync"""
+    best = None
+    for _ in range(runs):
+        started = time.perf_counter()
+        for body in bodies:
+            json.loads(body)
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calendars", type=int, default=3, help="Calendars in the stub calendar list")
+    parser.add_argument("--events", type=int, default=100, help="Events per calendar")
+    parser.add_argument("--messages", type=int, default=50, help="Gmail messages")
+    parser.add_argument("--runs", type=int, default=5, help="Runs to take the best of (reduces noise)")
+    args = parser.parse_args()
+
+    import httplib2
+    import googleapiclient.discovery
+    from services import google_sync
+
+    StubApi.fixtures = make_fixtures(args.calendars, args.events, args.messages)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubApi)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    endpoint = f"http://127.0.0.1:{server.server_address[1]}/"
+
+    # Point the real client at the stub: bundled discovery docs, no OAuth
+    real_build = googleapiclient.discovery.build
+    googleapiclient.discovery.build = lambda api, version, credentials=None, **kwargs: real_build(
+        api, version, http=httplib2.Http(), client_options={"api_endpoint": endpoint}, static_discovery=True
+    )
+    google_sync.authenticate_google = lambda user_id: object()
+    defaults = {name: getattr(google_sync, name) for name in MASK_NAMES}
+
+    results = {}
+    try:
+        for label, masked in (("full resources", False), ("fields= masks", True)):
+            best = None
+            for _ in range(max(1, args.runs)):
+                run = run_sync(google_sync, masked, defaults)
+                if best is None or run[0] < best[0]:
+                    best = run
+            elapsed, requests, size, bodies = best
+            results[label] = (elapsed, requests, size, decode_ms(bodies, args.runs))
+    finally:
+        server.shutdown()
+        shutil.rmtree(os.environ["USER_DATA_DIR"], ignore_errors=True)
+
+    print(f"sync of {args.calendars} calendars x {args.events} events + {args.messages} messages (best of {args.runs})")
+    print(f"  {'':16} {'requests':>8} {'bytes':>10} {'decode ms':>10} {'sync ms':>9}")
+    for label, (elapsed, requests, size, decode) in results.items():
+        print(f"  {label:16} {requests:8d} {size:10d} {decode:10.2f} {elapsed:9.1f}")
+    full, masked = results["full resources"], results["fields= masks"]
+    print(f"  masks transfer {100 * (1 - masked[2] / full[2]):.0f}% fewer bytes and decode "
+          f"{100 * (1 - masked[3] / full[3]):.0f}% faster")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Import-time benchmark for the backend.
+Runs `python -X importtime -c "import main"` and fails (exit code 1) when the
+import exceeds the budget or eagerly loads modules that should stay lazy.
+
+Usage:
+    python check_import_time.py [--budget-ms 2500] [--runs 3]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+BACKEND_DIR = Path(__file__).parent
+
+DEFAULT_BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "2500"))
+
+# Heavy modules that must only be imported on first use
+LAZY_MODULES = ("googleapiclient", "google_auth_oauthlib", "google.auth", "google.oauth2")
+
+
+def measure_import(module: str = "main") -> Tuple[float, List[Tuple[str, int, float]]]:
+    """
+    Import a module in a fresh interpreter with -X importtime.
+
+    Returns:
+        (cumulative ms for the module, [(name, depth, cumulative ms)] for every import)
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    imports = []
+    total_ms = 0.0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        cumulative_ms = int(cumulative) / 1000
+        imports.append((name.strip(), depth, cumulative_ms))
+        if name.strip() == module and depth == 0:
+            total_ms = cumulative_ms
+    return total_ms, imports
+
+
+def eager_lazy_modules(imports: List[Tuple[str, int, float]]) -> List[str]:
+    """Entries of LAZY_MODULES that were imported anyway (directly or via a submodule)"""
+    names = {name for name, _, _ in imports}
+    return [
+        lazy for lazy in LAZY_MODULES
+        if any(name == lazy or name.startswith(lazy + ".") for name in names)
+    ]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Check the backend's import time against a budget")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help="Maximum import time of main (ms)")
+    parser.add_argument("--runs", type=int, default=3, help="Runs to take the best of (reduces noise)")
+    parser.add_argument("--top", type=int, default=10, help="Heaviest direct imports to list")
+    args = parser.parse_args()
+
+    data_dir = BACKEND_DIR / "data"
+    data_dir_existed = data_dir.exists()
+
+    best_ms = None
+    best_imports: List[Tuple[str, int, float]] = []
+    for _ in range(max(1, args.runs)):
+        total_ms, imports = measure_import()
+        if best_ms is None or total_ms < best_ms:
+            best_ms, best_imports = total_ms, imports
+
+    print(f"import main: {best_ms:.0f} ms (best of {args.runs}, budget {args.budget_ms:.0f} ms)")
+    heaviest: Dict[str, float] = {}
+    for name, depth, cumulative_ms in best_imports:
+        if depth == 1:
+            heaviest[name] = max(heaviest.get(name, 0.0), cumulative_ms)
+    for name, cumulative_ms in sorted(heaviest.items(), key=lambda entry: -entry[1])[:args.top]:
+        print(f"  {cumulative_ms:8.1f} ms  {name}")
+
+    failures = []
+    if best_ms > args.budget_ms:
+        failures.append(f"import time {best_ms:.0f} ms exceeds the {args.budget_ms:.0f} ms budget")
+    eager = eager_lazy_modules(best_imports)
+    if eager:
+        failures.append(f"modules that should load lazily were imported: {', '.join(eager)}")
+    if not data_dir_existed and data_dir.exists():
+        failures.append("importing main created backend/data (import-time side effect)")
+
+    for failure in failures:
+        print(f"❌ {failure}")
+    if not failures:
+        print("✅ Import time within budget")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
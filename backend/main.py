@@ -1,27 +1,77 @@
-from fastapi import FastAPI, HTTPException, Header, Request
+from fastapi import FastAPI, HTTPException, Header, Request, Response, Query, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import Optional
 import json
 import httpx
 import hashlib
-from typing import List, Dict, Any
-from datetime import datetime, timedelta
+import heapq
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import List, Dict, Any, Tuple
+from datetime import date, datetime, timedelta
 import os
 import random
 from pathlib import Path
 
 # Import Google sync services
-from services.google_sync import authenticate_google, sync_all_google_data, get_sync_status, disconnect_google
-from services.data_loader import load_work_items
-from services.privacy import sanitize_for_llm
+from services.google_sync import authenticate_google, sync_all_google_data, get_sync_status, sync_status_records, disconnect_google
+from services.data_loader import get_data_fingerprint, get_data_changed_at
+from services.privacy import sanitized_work_items
+from services.threads import load_thread_items
+from services.context_graph import detect_contexts
+from services.contacts import contact_index, top_contacts, contact_item_summary, CONTACT_KINDS
+from services.load_history import record_cognitive_load, load_series, load_trend, RESOLUTIONS
+from services.derived_cache import derived_cache, deadline_priority, next_deadline_crossing
+from services.responses import FastJSONResponse, ndjson_response
+from services.pagination import paginate, page_info, data_version, StaleCursorError, DEFAULT_PAGE_SIZE
+from services.task_index import TaskIndex
+from services.prompt_packer import pack_prompt_data, estimate_tokens
+from services.embedding_index import retrieve_relevant_items
+from services.search_index import search_items
+from services.llm_gateway import llm_gateway, QueueFullError, PRIORITY_BACKGROUND
+from services.llm_router import llm_router, fallback_answer
+from services.fast_path import FastPathResponder
+from services.user_paths import validate_user_id, InvalidUserIdError
+from services.calendar_analytics import (
+    analyze_calendar, parse_events, work_zone, busy_by_day, day_free_blocks, FOCUS_BLOCK_MINUTES
+)
+from services.briefings import load_briefing, is_fresh, refresh_briefing, run_briefing_batch, briefing_loop, mark_active, verify_admin_token
+from services.push_sync import push_scheduler, push_renewal_loop, register_push, verify_pubsub_token, PushNotConfiguredError
 
 
 def get_user_id(request: Request, x_user_id: Optional[str] = Header(None)) -> str:
     """Extract user ID from header, fallback to 'default' for testing"""
     return x_user_id or "default"
 
-app = FastAPI(title="Productivity Dashboard API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Keep the assistant models warm, briefings fresh and push channels renewed for the lifetime of the server"""
+    warm_task = asyncio.create_task(llm_router.keep_warm())
+    briefing_task = asyncio.create_task(briefing_loop(generate_briefing))
+    renewal_task = asyncio.create_task(push_renewal_loop())
+    yield
+    warm_task.cancel()
+    briefing_task.cancel()
+    renewal_task.cancel()
+
+
+app = FastAPI(title="Productivity Dashboard API", default_response_class=FastJSONResponse, lifespan=lifespan)
+
+
+# Registered before CORS so rejections still carry CORS headers
+@app.middleware("http")
+async def validate_user_header(request: Request, call_next):
+    """Reject X-User-Id values that can't safely name a data directory; stamp valid users as active"""
+    user_id = request.headers.get("x-user-id")
+    if user_id:
+        try:
+            validate_user_id(user_id)
+        except InvalidUserIdError as e:
+            return FastJSONResponse({"detail": str(e)}, status_code=400)
+        mark_active(user_id)
+    return await call_next(request)
 
 # CORS middleware to allow Next.js frontend
 app.add_middleware(
@@ -30,12 +80,39 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Data-Age"],
 )
 
 # Ollama configuration
 OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434")
 OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "qwen2.5:3b-instruct")
 
+# Week-over-week change in average cognitive load (percent) reported as an insight
+LOAD_TREND_MIN_CHANGE = int(os.getenv("LOAD_TREND_MIN_CHANGE", "10"))
+
+# Days ahead searched for a free slot to suggest for the top task
+FOCUS_SUGGESTION_DAYS = int(os.getenv("FOCUS_SUGGESTION_DAYS", "3"))
+
+# Longest each dashboard view may be served stale (seconds) while it is recomputed in the
+# background, as view=seconds pairs; views not listed (or 0) are always recomputed inline
+def parse_max_staleness(value: str) -> Dict[str, float]:
+    """view=seconds pairs; malformed pairs are logged and skipped so a typo can't stop startup"""
+    limits = {}
+    for entry in value.split(","):
+        if not entry.strip():
+            continue
+        view, _, seconds = entry.partition("=")
+        try:
+            limits[view.strip()] = float(seconds)
+        except ValueError:
+            print(f"⚠️ Ignoring DASHBOARD_MAX_STALENESS entry {entry.strip()!r} (expected view=seconds)")
+    return limits
+
+
+DASHBOARD_MAX_STALENESS = parse_max_staleness(
+    os.getenv("DASHBOARD_MAX_STALENESS", "contexts=600,tasks=120,cognitive_load=300,insights=600,recommendations=300")
+)
+
 # Mock data path for fallback
 MOCK_DATA_PATH = Path(__file__).parent / "mock.json"
 
@@ -187,8 +264,17 @@ class AssistantQuery(BaseModel):
 # MOCK DATA FUNCTIONS - Load from mock.json file
 # ============================================================================
 
+def cached_view(user_id: str, view: str, compute) -> Any:
+    """Serve a derived view from the time-aware cache, recomputing when stale"""
+    return derived_cache.get_or_compute(user_id, view, get_data_fingerprint(user_id), compute)
+
+
 def get_active_contexts(user_id: str) -> List[Dict[str, Any]]:
     """Fetch contexts from Google data, with mock data fallback if empty"""
+    return cached_view(user_id, "contexts", lambda: _compute_active_contexts(user_id))
+
+
+def _compute_active_contexts(user_id: str) -> List[Dict[str, Any]]:
     print(f"🔍 get_active_contexts called with user_id: {user_id[:8]}...")
     
     # Check if user has real Google data
@@ -207,14 +293,19 @@ def get_active_contexts(user_id: str) -> List[Dict[str, Any]]:
         formatted = []
         for ctx in contexts[:2]:  # Limit to 2 contexts
             related_tasks = [t.get("title", "") for t in mock_data.get("tasks", []) 
-                           if t.get("context") == ctx.get("name")][:3]
+                           if t.get("context") == ctx.get("name")]
+            if not related_tasks:
+                related_tasks = ctx.get("tasks", [])
+            related_items = ctx.get("related_items", {}).get("emails", []) if isinstance(ctx.get("related_items"), dict) else []
             formatted.append({
                 "id": ctx.get("id", ""),
                 "name": ctx.get("name", ""),
-                "related_items": ctx.get("related_items", {}).get("emails", [])[:3] if isinstance(ctx.get("related_items"), dict) else [],
+                "related_items": related_items[:3],
+                "related_items_total": len(related_items),
                 "urgency": ctx.get("urgency", "medium"),
                 "deadline": ctx.get("deadline", ""),
-                "tasks": related_tasks if related_tasks else ctx.get("tasks", [])[:3]
+                "tasks": related_tasks[:3],
+                "tasks_total": len(related_tasks)
             })
         
         # Ensure we always have at least one context
@@ -248,59 +339,8 @@ def get_active_contexts(user_id: str) -> List[Dict[str, Any]]:
             print(f"   First context: {formatted[0].get('name', 'N/A')}")
         return formatted
     
-    # If we have real Google data, process it with user-specific naming
-    work_items = load_work_items(user_id, use_mock_if_empty=False)
-    print(f"   Processing {len(work_items)} real work items")
-    
-    import hashlib
-    user_hash = int(hashlib.md5(user_id.encode()).hexdigest(), 16)
-    user_variations = {
-        "projects": ["Project Alpha", "Project Beta", "Project Gamma", "Project Delta", "Project Echo"],
-        "teams": ["Engineering", "Design", "Marketing", "Sales", "Product"],
-        "topics": ["API Integration", "UI Redesign", "Market Analysis", "Client Presentation", "Code Review"]
-    }
-    project_idx = (user_hash // 10) % len(user_variations["projects"])
-    team_idx = (user_hash // 100) % len(user_variations["teams"])
-    topic_idx = (user_hash // 1000) % len(user_variations["topics"])
-    
-    user_project = user_variations["projects"][project_idx]
-    user_team = user_variations["teams"][team_idx]
-    user_topic = user_variations["topics"][topic_idx]
-    
-    # Extract context names from calendar events and emails with user-specific naming
-    google_contexts = {}
-    for item in work_items:
-        title = item.get("title", "").lower()
-        # User-specific context grouping
-        if any(word in title for word in ["meeting", "sync", "standup", "review"]):
-            context_name = f"{user_team} Meetings"
-        elif any(word in title for word in ["assignment", "paper", "project", "homework"]):
-            context_name = user_project
-        elif any(word in title for word in ["email", "message", "notification"]):
-            context_name = f"{user_team} Communication"
-        else:
-            # Default context with user-specific name
-            context_name = f"{user_topic} Work"
-            
-        if context_name not in google_contexts:
-            google_contexts[context_name] = {
-                "tasks": [],
-                "items": []
-            }
-        google_contexts[context_name]["tasks"].append(item.get("title", ""))
-        google_contexts[context_name]["items"].append(item.get("id", ""))
-    
-    # Format contexts to match expected structure
-    formatted = []
-    for idx, (context_name, context_data) in enumerate(google_contexts.items()):
-        formatted.append({
-            "id": f"ctx_{user_id[:8]}_{idx}",
-            "name": context_name,
-            "related_items": context_data["items"][:5],
-            "urgency": "high" if idx == 0 else "medium",
-            "deadline": "",
-            "tasks": list(set(context_data["tasks"]))[:3]
-        })
+    # If we have real Google data, use the clusters of who works together on what (built at sync)
+    formatted = detect_contexts(user_id)
     
     print(f"   Returning {len(formatted)} contexts from real data")
     return formatted
@@ -308,12 +348,22 @@ def get_active_contexts(user_id: str) -> List[Dict[str, Any]]:
 
 def get_prioritized_tasks(user_id: str) -> List[Dict[str, Any]]:
     """Fetch tasks from Google data, with mock data fallback if empty"""
-    # Load work items (with mock fallback if Google data is empty)
-    work_items = load_work_items(user_id, use_mock_if_empty=True)
-    
-    # Convert work items to task format
-    formatted = []
-    
+    return cached_view(user_id, "tasks", lambda: _compute_prioritized_tasks(user_id))
+
+
+# Email subjects containing any of these are treated as tasks
+TASK_KEYWORDS = ["action", "review", "approve", "complete", "submit", "deadline", "urgent", "important"]
+
+# Tasks at or above this priority count as urgent
+URGENT_PRIORITY = 75
+
+
+def _score_work_items(work_items: List[Dict[str, Any]], meeting_deadlines: List[str]):
+    """
+    Yield (priority_score, deadline, item) for every work item that is a task.
+    Calendar meetings come first, then emails, matching the task list order.
+    Meeting deadlines that drive the score are appended to meeting_deadlines.
+    """
     # Process calendar events as tasks
     for item in work_items:
         if item.get("source") == "calendar" and item.get("kind") == "meeting":
@@ -331,24 +381,12 @@ def get_prioritized_tasks(user_id: str) -> List[Dict[str, Any]]:
                 try:
                     deadline_dt = datetime.fromisoformat(deadline.replace("Z", "+00:00"))
                     days_until = (deadline_dt.date() - datetime.now().date()).days
-                    if days_until <= 1:
-                        priority_score = 85
-                    elif days_until <= 3:
-                        priority_score = 70
-                    elif days_until <= 7:
-                        priority_score = 60
+                    priority_score = deadline_priority(days_until)
+                    meeting_deadlines.append(deadline)
                 except:
                     pass
             
-            formatted.append({
-                "id": item.get("id", ""),
-                "title": f"Attend: {item.get('title', 'Meeting')}",
-                "context": "Calendar",
-                "deadline": deadline,
-                "priority_score": priority_score,
-                "status": "scheduled",
-                "explanation": f"Calendar meeting: {item.get('title', '')}"
-            })
+            yield priority_score, deadline, item
     
     # Process emails as tasks (especially unread emails)
     for item in work_items:
@@ -357,8 +395,7 @@ def get_prioritized_tasks(user_id: str) -> List[Dict[str, Any]]:
             status = item.get("status", "read")
             
             # Extract task keywords from email subject
-            task_keywords = ["action", "review", "approve", "complete", "submit", "deadline", "urgent", "important"]
-            is_task_email = any(keyword in title.lower() for keyword in task_keywords)
+            is_task_email = any(keyword in title.lower() for keyword in TASK_KEYWORDS)
             
             if is_task_email or status == "unread":
                 # Calculate priority: unread emails get higher priority
@@ -371,15 +408,45 @@ def get_prioritized_tasks(user_id: str) -> List[Dict[str, Any]]:
                 if "urgent" in content or "asap" in content:
                     priority_score = 90
                 
-                formatted.append({
-                    "id": item.get("id", ""),
-                    "title": title,
-                    "context": "Email",
-                    "deadline": item.get("timestamp", "")[:10] if item.get("timestamp") else "",
-                    "priority_score": priority_score,
-                    "status": "not_started",
-                    "explanation": f"Email task: {title} - {'Unread email requires action' if status == 'unread' else 'Email action item'}"
-                })
+                yield priority_score, item.get("timestamp", "")[:10] if item.get("timestamp") else "", item
+
+
+def _format_task(priority_score: int, deadline: str, item: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the task dict for a scored work item"""
+    if item.get("source") == "calendar":
+        return {
+            "id": item.get("id", ""),
+            "title": f"Attend: {item.get('title', 'Meeting')}",
+            "source": "calendar",
+            "context": "Calendar",
+            "deadline": deadline,
+            "priority_score": priority_score,
+            "status": "scheduled",
+            "explanation": f"Calendar meeting: {item.get('title', '')}"
+        }
+    title = item.get("title", "")
+    unread = item.get("status", "read") == "unread"
+    meta = item.get("meta") or {}
+    thread = f" ({meta['message_count']} messages, {meta.get('unread_count', 0)} unread)" if meta.get("message_count") else ""
+    return {
+        "id": item.get("id", ""),
+        "title": title,
+        "source": "email",
+        "context": "Email",
+        "deadline": deadline,
+        "priority_score": priority_score,
+        "status": "not_started",
+        "explanation": f"Email task: {title} - {'Unread email requires action' if unread else 'Email action item'}{thread}"
+    }
+
+
+def _compute_prioritized_tasks(user_id: str) -> List[Dict[str, Any]]:
+    # Load work items (with mock fallback if Google data is empty)
+    work_items = load_thread_items(user_id, use_mock_if_empty=True)
+    
+    # Convert work items to task format
+    meeting_deadlines = []
+    formatted = [_format_task(*scored) for scored in _score_work_items(work_items, meeting_deadlines)]
     
     # Ensure we always have at least one task with user-specific data
     if not formatted:
@@ -461,28 +528,196 @@ def get_prioritized_tasks(user_id: str) -> List[Dict[str, Any]]:
     # Sort by priority score
     formatted.sort(key=lambda x: x.get("priority_score", 0), reverse=True)
     
+    # Scores stay valid until the nearest deadline crosses a days_until threshold
+    derived_cache.expire_at(next_deadline_crossing(meeting_deadlines))
+    
     return formatted
 
 
+def select_top_tasks(user_id: str, k: int = 5, urgent_threshold: int = URGENT_PRIORITY) -> Dict[str, Any]:
+    """
+    Select the top-k tasks without materializing the full task list.
+    
+    Work items stream through a bounded min-heap keyed on priority (higher
+    wins), then deadline (earlier wins), then input order. Task dicts are
+    only built for the winners; urgent and total counts come from the same pass.
+    
+    Returns:
+        Dict with "tasks" (best first), "urgent_count" and "total"
+    """
+    return cached_view(user_id, f"top_tasks:{k}:{urgent_threshold}", lambda: _compute_top_tasks(user_id, k, urgent_threshold))
+
+
+def _deadline_rank(deadline: Optional[str]) -> int:
+    """Ordinal of a YYYY-MM-DD deadline; missing or malformed deadlines rank last"""
+    try:
+        return datetime.strptime(deadline[:10], "%Y-%m-%d").toordinal()
+    except (TypeError, ValueError):
+        return 10 ** 7
+
+
+def _compute_top_tasks(user_id: str, k: int, urgent_threshold: int) -> Dict[str, Any]:
+    work_items = load_thread_items(user_id, use_mock_if_empty=True)
+    meeting_deadlines = []
+    heap = []
+    urgent_count = 0
+    total = 0
+    for seq, (priority_score, deadline, item) in enumerate(_score_work_items(work_items, meeting_deadlines)):
+        total += 1
+        if priority_score >= urgent_threshold:
+            urgent_count += 1
+        if k <= 0:
+            continue
+        # Root of the min-heap is the current worst winner
+        entry = (priority_score, -_deadline_rank(deadline), -seq, deadline, item)
+        if len(heap) < k:
+            heapq.heappush(heap, entry)
+        elif entry[:3] > heap[0][:3]:
+            heapq.heapreplace(heap, entry)
+    
+    derived_cache.expire_at(next_deadline_crossing(meeting_deadlines))
+    
+    if total == 0:
+        # No scorable work items: reuse the full list's fallback tasks
+        tasks = get_prioritized_tasks(user_id)
+        return {
+            "tasks": tasks[:max(k, 0)],
+            "urgent_count": sum(1 for t in tasks if t.get("priority_score", 0) >= urgent_threshold),
+            "total": len(tasks)
+        }
+    
+    winners = sorted(heap, key=lambda e: e[:3], reverse=True)
+    return {
+        "tasks": [_format_task(priority_score, deadline, item) for priority_score, _, _, deadline, item in winners],
+        "urgent_count": urgent_count,
+        "total": total
+    }
+
+
+def get_task_index(user_id: str) -> TaskIndex:
+    """Filter index over the prioritized task list, rebuilt when tasks change"""
+    return cached_view(user_id, "task_index", lambda: TaskIndex(get_prioritized_tasks(user_id)))
+
+
+def get_calendar_analytics(user_id: str) -> Dict[str, Any]:
+    """Overlaps, back-to-back chains, context switches and fragmentation of the user's calendar"""
+    return cached_view(
+        user_id, "calendar_analytics",
+        lambda: analyze_calendar(load_thread_items(user_id, use_mock_if_empty=True))
+    )
+
+
+def get_busy_index(user_id: str) -> Dict[str, Any]:
+    """Day-bucketed merged busy intervals and the working-hours zone they are bucketed in"""
+    def compute():
+        events = parse_events(load_thread_items(user_id, use_mock_if_empty=True))
+        tz = work_zone(events)
+        return {"tz": tz, "days": busy_by_day(events, tz)}
+    return cached_view(user_id, "busy_index", compute)
+
+
+def get_day_free_blocks(user_id: str, day: date) -> List[Tuple[float, float]]:
+    """Free blocks within a day's working hours, cached per (user, day)"""
+    def compute():
+        index = get_busy_index(user_id)
+        return day_free_blocks(index["days"].get(day, []), day, index["tz"])
+    return cached_view(user_id, f"free_blocks:{day.isoformat()}", compute)
+
+
+def find_focus_blocks(
+    user_id: str,
+    start: Optional[date] = None,
+    days: int = 7,
+    min_minutes: int = FOCUS_BLOCK_MINUTES,
+    limit: int = 5,
+    include_weekends: bool = False,
+) -> Dict[str, Any]:
+    """
+    Largest free blocks in the user's working hours over a date range.
+    
+    Args:
+        user_id: User to search
+        start: First day (defaults to today in the calendar's timezone)
+        days: Number of days to search
+        min_minutes: Shortest block worth returning
+        limit: Maximum blocks returned
+        include_weekends: Search Saturdays and Sundays too
+    
+    Returns:
+        Dict with the searched range, timezone and blocks (largest first)
+    """
+    tz = get_busy_index(user_id)["tz"]
+    now = datetime.now(tz)
+    start = start or now.date()
+    now_ts = now.timestamp()
+    min_seconds = min_minutes * 60
+    
+    blocks = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        if not include_weekends and day.weekday() >= 5:
+            continue
+        for block_start, block_end in get_day_free_blocks(user_id, day):
+            # The rest of today only, starting on the next quarter hour
+            if block_start < now_ts:
+                block_start = -(-now_ts // 900) * 900
+            if block_end - block_start >= min_seconds:
+                blocks.append((block_start, block_end, day))
+    
+    largest = heapq.nsmallest(limit, blocks, key=lambda b: (b[0] - b[1], b[0]))
+    return {
+        "start": start.isoformat(),
+        "days": days,
+        "timezone": now.strftime("%z"),
+        "min_minutes": min_minutes,
+        "blocks": [
+            {
+                "day": day.isoformat(),
+                "start": datetime.fromtimestamp(block_start, tz).isoformat(),
+                "end": datetime.fromtimestamp(block_end, tz).isoformat(),
+                "minutes": round((block_end - block_start) / 60),
+            }
+            for block_start, block_end, day in largest
+        ],
+    }
+
+
 def get_cognitive_load(user_id: str) -> Dict[str, Any]:
     """Calculate cognitive load from Google data, with mock data fallback if empty"""
+    return cached_view(user_id, "cognitive_load", lambda: _record_load(user_id, _compute_cognitive_load(user_id)))
+
+
+def _record_load(user_id: str, load: Dict[str, Any]) -> Dict[str, Any]:
+    """Append a recomputed cognitive load to the user's time series"""
+    try:
+        record_cognitive_load(user_id, load)
+    except Exception as e:
+        print(f"⚠️ Failed to record cognitive load: {e}")
+    return load
+
+
+def _compute_cognitive_load(user_id: str) -> Dict[str, Any]:
     # Load work items (with mock fallback if Google data is empty)
-    work_items = load_work_items(user_id, use_mock_if_empty=True)
+    work_items = load_thread_items(user_id, use_mock_if_empty=True)
     
     # Calculate from actual data
     active_contexts_count = len(get_active_contexts(user_id))
-    tasks = get_prioritized_tasks(user_id)
-    urgent_tasks = [t for t in tasks if t.get("priority_score", 0) >= 75]
+    urgent_count = select_top_tasks(user_id, k=0)["urgent_count"]
     
     # Count calendar events (meetings) which contribute to cognitive load
     calendar_items = [item for item in work_items if item.get("source") == "calendar"]
-    email_items = [item for item in work_items if item.get("source") == "email"]
     
-    # Estimate context switches based on item count
-    switches = min(len(work_items) * 2, 20)  # Rough estimate
+    # Context switches, double-bookings and fragmentation from actual event times
+    calendar = get_calendar_analytics(user_id)
+    switches = round(calendar["context_switches_per_day"])
+    calendar_points = (
+        min(20, round(calendar["context_switches_per_day"] * 4))
+        + min(10, calendar["conflicts"] * 5)
+        + round(calendar["fragmentation"] * 10)
+    )
     
     # Calculate score (0-100)
-    score = min(100, (active_contexts_count * 15) + (len(urgent_tasks) * 10) + (len(calendar_items) * 3) + switches)
+    score = min(100, (active_contexts_count * 15) + (urgent_count * 10) + (len(calendar_items) * 3) + calendar_points)
     
     # If score is 0 and we have mock data, use user-specific mock cognitive load
     if score == 0 and work_items:
@@ -504,19 +739,28 @@ def get_cognitive_load(user_id: str) -> Dict[str, Any]:
         "score": score,
         "status": status,
         "active_contexts": active_contexts_count,
-        "urgent_tasks": len(urgent_tasks),
+        "urgent_tasks": urgent_count,
         "switches": switches,
-        "breakdown": f"{active_contexts_count} parallel contexts + {len(urgent_tasks)} urgent tasks + {len(calendar_items)} meetings + {switches} estimated switches"
+        "breakdown": (
+            f"{active_contexts_count} parallel contexts + {urgent_count} urgent tasks + {len(calendar_items)} meetings"
+            f" + {switches} context switches/day + {calendar['conflicts']} double-bookings"
+            f" + {round(calendar['fragmentation'] * 100)}% fragmented free time"
+        ),
+        "calendar": calendar
     }
 
 
 def get_latest_insights(user_id: str) -> List[Dict[str, Any]]:
     """Generate insights from Google data, with mock data fallback if empty"""
-    work_items = load_work_items(user_id, use_mock_if_empty=True)
+    return cached_view(user_id, "insights", lambda: _compute_latest_insights(user_id))
+
+
+def _compute_latest_insights(user_id: str) -> List[Dict[str, Any]]:
+    work_items = load_thread_items(user_id, use_mock_if_empty=True)
     
     # Generate simple insights from actual data
     insights = []
-    tasks = get_prioritized_tasks(user_id)
+    top = select_top_tasks(user_id, k=3)
     contexts = get_active_contexts(user_id)
     
     # Insight: Context switching
@@ -529,13 +773,25 @@ def get_latest_insights(user_id: str) -> List[Dict[str, Any]]:
         })
     
     # Insight: Urgent tasks
-    urgent_tasks = [t for t in tasks if t.get("priority_score", 0) >= 75]
-    if urgent_tasks:
+    urgent_count = top["urgent_count"]
+    if urgent_count:
         insights.append({
             "type": "deadline_proximity",
-            "severity": "high" if len(urgent_tasks) > 2 else "medium",
-            "tasks": [t.get("title") for t in urgent_tasks[:3]],
-            "message": f"{len(urgent_tasks)} urgent task(s) require immediate attention."
+            "severity": "high" if urgent_count > 2 else "medium",
+            "tasks": [t.get("title") for t in top["tasks"] if t.get("priority_score", 0) >= URGENT_PRIORITY],
+            "message": f"{urgent_count} urgent task(s) require immediate attention."
+        })
+    
+    # Insight: Cognitive load trend over the last week
+    get_cognitive_load(user_id)
+    trend = load_trend(user_id)
+    if trend and abs(trend["change_pct"]) >= LOAD_TREND_MIN_CHANGE:
+        direction = "up" if trend["change_pct"] > 0 else "down"
+        insights.append({
+            "type": "load_trend",
+            "severity": "low" if direction == "down" else "high" if trend["change_pct"] >= 2 * LOAD_TREND_MIN_CHANGE else "medium",
+            "change_pct": trend["change_pct"],
+            "message": f"Cognitive load is {direction} {abs(trend['change_pct'])}% this week (average {trend['current']} vs {trend['previous']})."
         })
     
     # If no insights, use user-specific mock insights
@@ -557,16 +813,19 @@ def get_latest_insights(user_id: str) -> List[Dict[str, Any]]:
 
 def get_recommendations(user_id: str) -> List[Dict[str, Any]]:
     """Generate recommendations from Google data, with mock data fallback if empty"""
-    work_items = load_work_items(user_id, use_mock_if_empty=True)
+    return cached_view(user_id, "recommendations", lambda: _compute_recommendations(user_id))
+
+
+def _compute_recommendations(user_id: str) -> List[Dict[str, Any]]:
+    work_items = load_thread_items(user_id, use_mock_if_empty=True)
     
     recommendations = []
-    tasks = get_prioritized_tasks(user_id)
+    top = select_top_tasks(user_id, k=1)
     cognitive_load = get_cognitive_load(user_id)
     
     # Recommendation: Focus on urgent tasks
-    urgent_tasks = [t for t in tasks if t.get("priority_score", 0) >= 75]
-    if urgent_tasks:
-        top_task = urgent_tasks[0]
+    if top["urgent_count"]:
+        top_task = top["tasks"][0]
         recommendations.append({
             "action": f"Prioritize '{top_task.get('title')}' today",
             "reason": f"Highest priority task (score: {top_task.get('priority_score')})",
@@ -581,6 +840,47 @@ def get_recommendations(user_id: str) -> List[Dict[str, Any]]:
             "expected_impact": "Reduce context switching and improve focus"
         })
     
+    # Recommendation: Protect a real free slot for the top task
+    if top["tasks"]:
+        upcoming = find_focus_blocks(user_id, days=FOCUS_SUGGESTION_DAYS, limit=1)["blocks"]
+        if upcoming:
+            block = upcoming[0]
+            block_start = datetime.fromisoformat(block["start"])
+            # Suggest a different slot once this one has started
+            derived_cache.expire_at(block_start.timestamp())
+            recommendations.append({
+                "action": (
+                    f"Block {block['start'][11:16]}-{block['end'][11:16]} on {block_start.strftime('%a %b %d')}"
+                    f" for '{top['tasks'][0].get('title')}'"
+                ),
+                "reason": f"Largest free block in your working hours over the next {FOCUS_SUGGESTION_DAYS} days ({block['minutes']} min)",
+                "expected_impact": "Uninterrupted time for your highest-priority task"
+            })
+    
+    # Recommendations from actual calendar structure
+    calendar = get_calendar_analytics(user_id)
+    if calendar["conflicts"]:
+        example = calendar["conflict_examples"][0]
+        recommendations.append({
+            "action": f"Resolve {calendar['conflicts']} double-booked meeting{'s' if calendar['conflicts'] > 1 else ''}",
+            "reason": f"'{example['first']}' overlaps '{example['second']}' on {example['start'][:10]}",
+            "expected_impact": "Avoid missed meetings and last-minute rescheduling"
+        })
+    chain = calendar["longest_chain"]
+    if chain and chain["meetings"] >= 3:
+        recommendations.append({
+            "action": f"Add buffers between back-to-back meetings on {chain['day']}",
+            "reason": f"{chain['meetings']} meetings back-to-back from {chain['start'][11:16]} to {chain['end'][11:16]}",
+            "expected_impact": "Short breaks reduce fatigue and carry-over between contexts"
+        })
+    fragmented = calendar["most_fragmented_day"]
+    if fragmented and fragmented["fragmentation"] >= 0.5 and fragmented["short_gap_minutes"] >= FOCUS_BLOCK_MINUTES:
+        recommendations.append({
+            "action": f"Consolidate meetings on {fragmented['day']}",
+            "reason": f"{fragmented['short_gap_minutes']} of {fragmented['free_minutes']} free minutes are in gaps under {FOCUS_BLOCK_MINUTES} min",
+            "expected_impact": "Turns scattered gaps into uninterrupted focus time"
+        })
+    
     # If no recommendations, use user-specific mock recommendations
     if not recommendations:
         mock_data = get_user_specific_mock_data(user_id)
@@ -595,6 +895,17 @@ def get_recommendations(user_id: str) -> List[Dict[str, Any]]:
     return recommendations
 
 
+# Deterministic answers for common assistant questions, served without the LLM
+fast_path = FastPathResponder({
+    "top_tasks": select_top_tasks,
+    "cognitive_load": get_cognitive_load,
+    "insights": get_latest_insights,
+    "recommendations": get_recommendations,
+    "work_items": load_thread_items,
+    "top_contacts": top_contacts,
+})
+
+
 # ============================================================================
 # SYNTHETIC DATA GENERATION FOR TRAINING
 # ============================================================================
@@ -704,10 +1015,10 @@ def get_synthetic_training_examples() -> str:
 # OLLAMA API CLIENT
 # ============================================================================
 
-async def call_ollama(messages: List[Dict[str, str]], model: str = None) -> str:
+async def call_ollama(messages: List[Dict[str, str]], model: str = None, base_url: str = None) -> str:
     """Call Ollama API with chat messages"""
     model = model or OLLAMA_MODEL
-    url = f"{OLLAMA_URL}/api/chat"
+    url = f"{base_url or OLLAMA_URL}/api/chat"
     
     payload = {
         "model": model,
@@ -729,6 +1040,102 @@ async def call_ollama(messages: List[Dict[str, str]], model: str = None) -> str:
             raise HTTPException(status_code=500, detail=f"Ollama API error: {str(e)}")
 
 
+# ============================================================================
+# RESPONSE HELPERS
+# ============================================================================
+
+def paged(items: List[Any], user_id: str, cursor: Optional[str], limit: Optional[int], scope: Any = None):
+    """
+    Return (page, page_info) for a list view, mapping cursor errors to HTTP errors.
+    scope identifies the filter set, so cursors can't be replayed across filters.
+    """
+    try:
+        version = data_version((get_data_fingerprint(user_id), scope))
+        page, next_cursor = paginate(items, cursor, limit or DEFAULT_PAGE_SIZE, version)
+    except StaleCursorError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return page, page_info(next_cursor, len(items))
+
+
+def dashboard_records(user_id: str):
+    """
+    Yield dashboard views one record at a time for NDJSON streaming.
+    Each view is computed only when the stream reaches it (contexts go out
+    before tasks are scored) and is read from the shared derived cache, so a
+    request holds one encoded record at a time rather than a copy of the views.
+    """
+    for context in get_active_contexts(user_id):
+        yield "context", context
+    for task in get_prioritized_tasks(user_id):
+        yield "task", task
+    yield "cognitive_load", get_cognitive_load(user_id)
+    for insight in get_latest_insights(user_id):
+        yield "insight", insight
+    for recommendation in get_recommendations(user_id):
+        yield "recommendation", recommendation
+
+
+DASHBOARD_VIEWS = (
+    ("contexts", get_active_contexts),
+    ("tasks", get_prioritized_tasks),
+    ("cognitive_load", get_cognitive_load),
+    ("insights", get_latest_insights),
+    ("recommendations", get_recommendations),
+)
+
+# Background dashboard recomputations in flight, one per user
+_dashboard_refreshes: Dict[str, asyncio.Task] = {}
+
+
+def schedule_dashboard_refresh(user_id: str) -> None:
+    """Recompute a user's dashboard views off the request path (no-op if already running)"""
+    task = _dashboard_refreshes.get(user_id)
+    if task is not None and not task.done():
+        return
+
+    def recompute() -> None:
+        for _, get_view in DASHBOARD_VIEWS:
+            get_view(user_id)
+
+    async def refresh() -> None:
+        try:
+            await asyncio.to_thread(recompute)
+        except Exception as e:
+            print(f"⚠️ Background dashboard refresh failed for {user_id[:8]}...: {e}")
+        finally:
+            _dashboard_refreshes.pop(user_id, None)
+
+    _dashboard_refreshes[user_id] = asyncio.create_task(refresh())
+
+
+def dashboard_snapshot(user_id: str, allow_stale: bool = True) -> Tuple[Dict[str, Any], float]:
+    """
+    Dashboard views, stale-while-revalidate: a view outdated for at most its
+    DASHBOARD_MAX_STALENESS is served from its last snapshot while the
+    dashboard is recomputed in the background; others are computed inline.
+    allow_stale=False computes every outdated view inline.
+
+    Returns:
+        (views by name, data age: seconds the oldest served view has been outdated)
+    """
+    fingerprint = get_data_fingerprint(user_id)
+    changed_at = get_data_changed_at(user_id)
+    views = {}
+    age = 0.0
+    for view, get_view in DASHBOARD_VIEWS:
+        snapshot = derived_cache.peek(user_id, view, fingerprint, changed_at)
+        if snapshot is not None and snapshot[1] <= (DASHBOARD_MAX_STALENESS.get(view, 0.0) if allow_stale else 0.0):
+            views[view] = snapshot[0]
+            age = max(age, snapshot[1])
+        else:
+            views[view] = get_view(user_id)
+    if age > 0:
+        schedule_dashboard_refresh(user_id)
+    return views, age
+
+
 # ============================================================================
 # API ENDPOINTS
 # ============================================================================
@@ -763,65 +1170,99 @@ async def health():
         }
 
 
-@app.post("/assistant")
-async def ask_assistant(request: AssistantQuery, http_request: Request, x_user_id: Optional[str] = Header(None)):
-    try:
-        # Require user ID - don't fallback to default
-        if not x_user_id:
-            raise HTTPException(status_code=400, detail="User ID is required. Please ensure you're logged in.")
-        
-        user_id = x_user_id
-        # Fetch current system state from Google data ONLY (no mock data)
-        contexts = get_active_contexts(user_id)
-        tasks = get_prioritized_tasks(user_id)
-        cognitive_load = get_cognitive_load(user_id)
-        insights = get_latest_insights(user_id)
-        recommendations = get_recommendations(user_id)
-        
-        # Get synthetic training examples
-        training_examples = get_synthetic_training_examples()
-        
-        # Generate additional synthetic data for context (optional, can be toggled)
-        use_synthetic_data = os.getenv("USE_SYNTHETIC_DATA", "false").lower() == "true"
-        if use_synthetic_data:
-            synthetic_contexts = generate_synthetic_contexts(3)
-            synthetic_tasks = generate_synthetic_tasks(5)
-            synthetic_insights = generate_synthetic_insights(2)
-            # Merge with real data (or use only synthetic for training)
-            all_contexts = contexts + synthetic_contexts
-            all_tasks = tasks + synthetic_tasks
-            all_insights = insights + synthetic_insights
-        else:
-            all_contexts = contexts
-            all_tasks = tasks
-            all_insights = insights
-        
-        # Sanitize work items for LLM (privacy-safe)
-        work_items = load_work_items(user_id)
-        sanitized_items = sanitize_for_llm(work_items)
-        
-        # Separate emails and calendar events for better context
-        emails = [item for item in sanitized_items if item.get("source") == "email"]
-        calendar_events = [item for item in sanitized_items if item.get("source") == "calendar"]
-        
-        # Format data for the prompt with training examples
-        system_prompt = f"""You are an intelligent work assistant analyzing a user's digital work environment.
+def build_assistant_prompt(
+    user_id: str,
+    query: str,
+    token_budget: Optional[int] = None,
+    retrieved_items: Optional[List[Dict[str, Any]]] = None,
+) -> Dict[str, Any]:
+    """
+    Build the assistant system prompt from the user's current data.
+    
+    Args:
+        user_id: User to build the prompt for
+        query: User query, used to rank which items make it into the prompt
+        token_budget: Token budget for the data sections (defaults to PROMPT_DATA_TOKEN_BUDGET)
+        retrieved_items: Sanitized items retrieved from the embedding index for this query
+    
+    Returns:
+        Dict with "system_prompt" and "context_used" statistics
+    """
+    # Fetch current system state from Google data ONLY (no mock data)
+    contexts = get_active_contexts(user_id)
+    tasks = get_prioritized_tasks(user_id)
+    cognitive_load = get_cognitive_load(user_id)
+    insights = get_latest_insights(user_id)
+    recommendations = get_recommendations(user_id)
+    
+    # Get synthetic training examples
+    training_examples = get_synthetic_training_examples()
+    
+    # Generate additional synthetic data for context (optional, can be toggled)
+    use_synthetic_data = os.getenv("USE_SYNTHETIC_DATA", "false").lower() == "true"
+    if use_synthetic_data:
+        synthetic_contexts = generate_synthetic_contexts(3)
+        synthetic_tasks = generate_synthetic_tasks(5)
+        synthetic_insights = generate_synthetic_insights(2)
+        # Merge with real data (or use only synthetic for training)
+        all_contexts = contexts + synthetic_contexts
+        all_tasks = tasks + synthetic_tasks
+        all_insights = insights + synthetic_insights
+    else:
+        all_contexts = contexts
+        all_tasks = tasks
+        all_insights = insights
+    
+    # Sanitized work items for LLM (privacy-safe), precomputed at sync time
+    sanitized_items = sanitized_work_items(user_id)
+    
+    # Separate emails and calendar events for better context
+    retrieved_items = retrieved_items or []
+    retrieved_ids = {item.get("id") for item in retrieved_items}
+    emails = [item for item in sanitized_items if item.get("source") == "email" and item.get("id") not in retrieved_ids]
+    calendar_events = [item for item in sanitized_items if item.get("source") == "calendar" and item.get("id") not in retrieved_ids]
+    
+    # Pack the most relevant items into the prompt's token budget
+    packing = pack_prompt_data(
+        {
+            "contexts": all_contexts,
+            "tasks": all_tasks,
+            "retrieved": retrieved_items,
+            "emails": emails,
+            "calendar": calendar_events,
+            "insights": all_insights,
+            "recommendations": recommendations,
+        },
+        query,
+        token_budget,
+    )
+    packed = packing["sections"]
+    
+    def section_header(name: str) -> str:
+        stats = packing["stats"][name]
+        return f"showing {stats['packed']} of {stats['available']}"
+    
+    # Format data for the prompt with training examples
+    system_prompt = f"""You are an intelligent work assistant analyzing a user's digital work environment.
 
 {training_examples}
 
 === CURRENT SYSTEM DATA ===
 
-ACTIVE CONTEXTS:
-{json.dumps(all_contexts, indent=2)}
+ACTIVE CONTEXTS ({section_header("contexts")}):
+{packed["contexts"] or "No active contexts"}
+
+TASKS BY PRIORITY ({section_header("tasks")}) [score] title | context | deadline | status:
+{packed["tasks"] or "No tasks"}
 
-TASKS BY PRIORITY:
-{json.dumps(all_tasks, indent=2)}
+RECENT EMAILS ({section_header("emails")}) subject | sender | status | date | labels | preview:
+{packed["emails"] or "No recent emails available"}
 
-RECENT EMAILS ({len(emails)} emails):
-{json.dumps(emails[:15], indent=2) if emails else "No recent emails available"}
+UPCOMING CALENDAR EVENTS ({section_header("calendar")}) title | time | attendees:
+{packed["calendar"] or "No upcoming calendar events"}
 
-UPCOMING CALENDAR EVENTS ({len(calendar_events)} events):
-{json.dumps(calendar_events[:15], indent=2) if calendar_events else "No upcoming calendar events"}
+MOST RELEVANT TO THIS QUESTION ({section_header("retrieved")}, searched across all synced emails and events):
+{packed["retrieved"] or "No additional matches"}
 
 COGNITIVE LOAD ANALYSIS:
 Current Score: {cognitive_load['score']}/100
@@ -832,10 +1273,10 @@ Contributing Factors:
 - Recent Context Switches: {cognitive_load['switches']}
 
 BEHAVIORAL INSIGHTS:
-{json.dumps(all_insights, indent=2)}
+{packed["insights"] or "No insights"}
 
 RECOMMENDATIONS:
-{json.dumps(recommendations, indent=2)}
+{packed["recommendations"] or "No recommendations"}
 
 === YOUR ROLE ===
 You help users understand their work patterns and make better decisions.
@@ -857,6 +1298,47 @@ RESPONSE STYLE:
 - Explain the "why" behind insights
 - Suggest concrete next actions
 - Match the tone and structure of the training examples"""
+    
+    return {
+        "system_prompt": system_prompt,
+        "context_used": {
+            "contexts": len(all_contexts),
+            "tasks": len(all_tasks),
+            "load_score": cognitive_load['score'],
+            "synthetic_data_enabled": use_synthetic_data,
+            "packed": packing["stats"],
+            "prompt_tokens": {
+                "data_used": packing["tokens_used"],
+                "data_budget": packing["token_budget"],
+                "total_estimate": estimate_tokens(system_prompt)
+            }
+        }
+    }
+
+
+@app.post("/assistant")
+async def ask_assistant(request: AssistantQuery, http_request: Request, x_user_id: Optional[str] = Header(None)):
+    try:
+        # Require user ID - don't fallback to default
+        if not x_user_id:
+            raise HTTPException(status_code=400, detail="User ID is required. Please ensure you're logged in.")
+        
+        user_id = x_user_id
+
+        # Common questions are answered from the derived views, skipping retrieval and the LLM
+        fast = fast_path.answer(user_id, request.query)
+        if fast:
+            return {
+                "response": fast["response"],
+                "model": None,
+                "fallback": None,
+                "intent": fast["intent"],
+                "context_used": {"fast_path": True, "confidence": fast["confidence"]}
+            }
+
+        retrieved_items = await retrieve_relevant_items(user_id, request.query)
+        prompt = build_assistant_prompt(user_id, request.query, retrieved_items=retrieved_items)
+        system_prompt = prompt["system_prompt"]
 
         # Call Ollama model
         messages = [
@@ -864,54 +1346,198 @@ RESPONSE STYLE:
             {"role": "user", "content": request.query}
         ]
         
-        response_text = await call_ollama(messages, OLLAMA_MODEL)
+        # Route to a model, queue behind the LLM gateway (cancelled if the client
+        # disconnects) and fall back to a template answer when the SLO is breached
+        route = llm_router.choose(request.query)
+        fallback = None
+        try:
+            response_text = await asyncio.wait_for(
+                llm_gateway.run(
+                    user_id,
+                    lambda: call_ollama(messages, route.model, route.url),
+                    is_disconnected=http_request.is_disconnected
+                ),
+                timeout=llm_router.slo_seconds
+            )
+        except asyncio.TimeoutError:
+            llm_router.counters["fallback_timeout"] += 1
+            fallback = "latency_slo"
+        except HTTPException as e:
+            print(f"⚠️ Ollama call failed, answering from template: {e.detail}")
+            llm_router.counters["fallback_error"] += 1
+            fallback = "model_error"
+        if fallback:
+            response_text = fallback_answer(
+                get_recommendations(user_id),
+                select_top_tasks(user_id, k=1)["tasks"],
+                get_cognitive_load(user_id)
+            )
         
         return {
             "response": response_text,
-            "context_used": {
-                "contexts": len(all_contexts),
-                "tasks": len(all_tasks),
-                "load_score": cognitive_load['score'],
-                "synthetic_data_enabled": use_synthetic_data
-            }
+            "model": route.model if not fallback else None,
+            "fallback": fallback,
+            "intent": None,
+            "context_used": prompt["context_used"]
         }
         
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+BRIEFING_QUERY = "Give me my focus briefing for today: what to do first, what can wait, and one way to reduce my cognitive load."
+
+
+async def generate_briefing(user_id: str) -> Dict[str, Any]:
+    """Generate a user's daily briefing with the assistant pipeline, at background priority"""
+    retrieved_items = await retrieve_relevant_items(user_id, BRIEFING_QUERY)
+    # Prompt building reads and packs the user's views; keep it off the event loop during batches
+    prompt = await asyncio.to_thread(build_assistant_prompt, user_id, BRIEFING_QUERY, retrieved_items=retrieved_items)
+    messages = [
+        {"role": "system", "content": prompt["system_prompt"]},
+        {"role": "user", "content": BRIEFING_QUERY}
+    ]
+    route = llm_router.large
+    briefing = await llm_gateway.run(
+        user_id,
+        lambda: call_ollama(messages, route.model, route.url),
+        priority=PRIORITY_BACKGROUND
+    )
+    return {"briefing": briefing, "model": route.model}
+
+
+@app.get("/api/briefing")
+async def get_briefing(background_tasks: BackgroundTasks, x_user_id: Optional[str] = Header(None)):
+    """
+    Get the precomputed "today's focus" briefing.
+    If the user's data changed since it was generated, the previous briefing (or a
+    template answer when there is none) is served and a new one is generated in the background.
+    """
+    try:
+        if not x_user_id:
+            raise HTTPException(status_code=400, detail="User ID is required")
+        user_id = x_user_id
+
+        stored = load_briefing(user_id)
+        if is_fresh(user_id, stored):
+            return {
+                "briefing": stored["briefing"],
+                "model": stored.get("model"),
+                "generated_at": stored.get("generated_at"),
+                "status": "fresh"
+            }
+
+        background_tasks.add_task(refresh_briefing, user_id, generate_briefing)
+        if stored:
+            return {
+                "briefing": stored["briefing"],
+                "model": stored.get("model"),
+                "generated_at": stored.get("generated_at"),
+                "status": "stale"
+            }
+        return {
+            "briefing": fallback_answer(
+                get_recommendations(user_id),
+                select_top_tasks(user_id, k=1)["tasks"],
+                get_cognitive_load(user_id)
+            ),
+            "model": None,
+            "generated_at": None,
+            "status": "pending"
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/briefing/batch")
+async def run_briefings(force: bool = False, x_admin_token: Optional[str] = Header(None)):
+    """
+    Regenerate briefings for all active users whose data changed (force=true: all of them).
+    Admin only (X-Admin-Token = BRIEFING_ADMIN_TOKEN); the background loop does this on its own.
+    """
+    if not verify_admin_token(x_admin_token):
+        raise HTTPException(status_code=403, detail="Admin token required")
+    try:
+        return await run_briefing_batch(generate_briefing, force=force)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/llm/metrics")
+async def llm_metrics():
+    """LLM gateway queue depth, queue-wait vs. generation timings, routing and fast-path stats"""
+    return {**llm_gateway.metrics(), "router": llm_router.metrics(), "fast_path": fast_path.metrics()}
+
+
 @app.get("/api/dashboard")
-async def get_dashboard_data(x_user_id: Optional[str] = Header(None)):
-    """Get all dashboard data in one endpoint"""
+async def get_dashboard_data(
+    response: Response,
+    x_user_id: Optional[str] = Header(None),
+    response_format: Optional[str] = Query(None, alias="format"),
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+):
+    """
+    Get all dashboard data in one endpoint.
+    Pass format=ndjson to stream records, or limit/cursor to page tasks and contexts.
+    Outdated views may be served from their last snapshot while they recompute;
+    X-Data-Age gives how long (seconds) the served data has been outdated.
+    """
     try:
         if not x_user_id:
             print(f"⚠️ WARNING: No user ID provided in /api/dashboard headers")
             raise HTTPException(status_code=400, detail="User ID is required")
         user_id = x_user_id
         print(f"✅ Loading dashboard data for user: {user_id[:8]}...")
-        contexts = get_active_contexts(user_id)
-        tasks = get_prioritized_tasks(user_id)
-        cognitive_load = get_cognitive_load(user_id)
-        insights = get_latest_insights(user_id)
-        recommendations = get_recommendations(user_id)
+        
+        if response_format == "ndjson":
+            return ndjson_response(dashboard_records(user_id))
+        
+        # Cursors are tied to the current data version, so paged requests never get snapshots
+        result, data_age = dashboard_snapshot(user_id, allow_stale=limit is None and not cursor)
+        contexts = result["contexts"]
+        tasks = result["tasks"]
+        response.headers["X-Data-Age"] = str(int(data_age))
         
         print(f"✅ Dashboard data loaded for user {user_id[:8]}... - {len(contexts)} contexts, {len(tasks)} tasks")
         
-        return {
-            "contexts": contexts,
-            "tasks": tasks,
-            "cognitive_load": cognitive_load,
-            "insights": insights,
-            "recommendations": recommendations
-        }
+        if limit is not None or cursor:
+            # Page tasks and contexts in lockstep: both cursors encode the same offset
+            result["tasks"], task_page = paged(tasks, user_id, cursor, limit)
+            result["contexts"], context_page = paged(contexts, user_id, cursor, limit)
+            result["page"] = {
+                "next_cursor": task_page["next_cursor"] or context_page["next_cursor"],
+                "total_tasks": task_page["total"],
+                "total_contexts": context_page["total"]
+            }
+        return result
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Error loading dashboard data: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/api/contexts")
-async def get_contexts(x_user_id: Optional[str] = Header(None)):
-    """Get active work contexts"""
+async def get_contexts(
+    x_user_id: Optional[str] = Header(None),
+    response_format: Optional[str] = Query(None, alias="format"),
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    name: Optional[str] = None,
+    urgency: Optional[str] = None,
+):
+    """
+    Get active work contexts.
+    Filters: name, urgency. format=ndjson streams, limit/cursor pages.
+    """
     try:
         if not x_user_id:
             print(f"⚠️ WARNING: No user ID provided in headers. Available headers: {x_user_id}")
@@ -923,15 +1549,43 @@ async def get_contexts(x_user_id: Optional[str] = Header(None)):
         # Log first context name to verify user-specific data
         if contexts:
             print(f"   First context: {contexts[0].get('name', 'N/A')}")
+        filters = (name, urgency)
+        if any(f is not None for f in filters):
+            contexts = [
+                c for c in contexts
+                if (name is None or c.get("name", "").lower() == name.lower())
+                and (urgency is None or c.get("urgency") == urgency)
+            ]
+        if response_format == "ndjson":
+            return ndjson_response(("context", context) for context in contexts)
+        if limit is not None or cursor or any(f is not None for f in filters):
+            page, info = paged(contexts, user_id, cursor, limit, scope=filters)
+            return {"contexts": page, "page": info}
         return {"contexts": contexts}
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Error loading contexts: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/api/tasks")
-async def get_tasks(x_user_id: Optional[str] = Header(None)):
-    """Get prioritized tasks"""
+async def get_tasks(
+    x_user_id: Optional[str] = Header(None),
+    response_format: Optional[str] = Query(None, alias="format"),
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    min_priority: Optional[int] = None,
+    source: Optional[str] = None,
+    context: Optional[str] = None,
+    deadline_from: Optional[date] = None,
+    deadline_to: Optional[date] = None,
+):
+    """
+    Get prioritized tasks.
+    Filters: min_priority, source, context, deadline_from/deadline_to (YYYY-MM-DD; 422 otherwise).
+    format=ndjson streams, limit/cursor pages; page.total counts all matches.
+    """
     try:
         if not x_user_id:
             print(f"⚠️ WARNING: No user ID provided in headers")
@@ -943,12 +1597,61 @@ async def get_tasks(x_user_id: Optional[str] = Header(None)):
         # Log first task to verify user-specific data
         if tasks:
             print(f"   Top task: {tasks[0].get('title', 'N/A')} (score: {tasks[0].get('priority_score', 0)})")
+        filters = (min_priority, source, context, deadline_from, deadline_to)
+        if any(f is not None for f in filters):
+            tasks = get_task_index(user_id).filter(
+                min_priority=min_priority,
+                source=source,
+                context=context,
+                deadline_from=deadline_from,
+                deadline_to=deadline_to
+            )
+        if response_format == "ndjson":
+            return ndjson_response(("task", task) for task in tasks)
+        if limit is not None or cursor or any(f is not None for f in filters):
+            page, info = paged(tasks, user_id, cursor, limit, scope=filters)
+            return {"tasks": page, "page": info}
         return {"tasks": tasks}
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Error loading tasks: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/tasks/top")
+async def get_top_tasks(k: int = Query(5, ge=0, le=100), x_user_id: Optional[str] = Header(None)):
+    """Get the k highest-priority tasks plus the urgent task count"""
+    try:
+        if not x_user_id:
+            raise HTTPException(status_code=400, detail="User ID is required")
+        user_id = x_user_id
+        return select_top_tasks(user_id, k=k)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/search")
+async def search(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=200),
+    source: Optional[str] = None,
+    x_user_id: Optional[str] = Header(None),
+):
+    """Full-text search over synced emails and calendar events"""
+    try:
+        if not x_user_id:
+            raise HTTPException(status_code=400, detail="User ID is required")
+        user_id = x_user_id
+        return search_items(user_id, q, limit=limit, source=source)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.get("/api/cognitive-load")
 async def get_cognitive_load_data(x_user_id: Optional[str] = Header(None)):
     """Get cognitive load metrics"""
@@ -961,6 +1664,120 @@ async def get_cognitive_load_data(x_user_id: Optional[str] = Header(None)):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/cognitive-load/history")
+async def get_cognitive_load_history(
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    resolution: str = Query("hourly"),
+    limit: int = Query(1000, ge=1, le=10000),
+    x_user_id: Optional[str] = Header(None),
+):
+    """
+    Cognitive load over time. start/end are ISO 8601 dates or datetimes (default: the last 7 days);
+    resolution is raw, hourly or daily (UTC buckets with average, min and max).
+    """
+    try:
+        if not x_user_id:
+            raise HTTPException(status_code=400, detail="User ID is required")
+        if resolution not in RESOLUTIONS:
+            raise HTTPException(status_code=400, detail=f"resolution must be one of: {', '.join(RESOLUTIONS)}")
+        user_id = x_user_id
+        try:
+            end_ts = datetime.fromisoformat(end).astimezone().timestamp() if end else time.time()
+            start_ts = datetime.fromisoformat(start).astimezone().timestamp() if start else end_ts - 7 * 86400
+        except ValueError:
+            raise HTTPException(status_code=400, detail="start and end must be ISO 8601 dates or datetimes")
+        # Make sure the current score is part of the series
+        get_cognitive_load(user_id)
+        points = load_series(user_id, start_ts, end_ts, resolution, limit)
+        return {
+            "resolution": resolution,
+            "start": datetime.fromtimestamp(start_ts).astimezone().isoformat(),
+            "end": datetime.fromtimestamp(end_ts).astimezone().isoformat(),
+            "points": points,
+            "trend": load_trend(user_id)
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/focus-blocks")
+async def get_focus_blocks(
+    start: Optional[str] = None,
+    days: int = Query(7, ge=1, le=31),
+    min_minutes: int = Query(FOCUS_BLOCK_MINUTES, ge=15, le=600),
+    limit: int = Query(5, ge=1, le=50),
+    include_weekends: bool = False,
+    x_user_id: Optional[str] = Header(None),
+):
+    """Largest free blocks in working hours from start (YYYY-MM-DD, default today) over days"""
+    try:
+        if not x_user_id:
+            raise HTTPException(status_code=400, detail="User ID is required")
+        user_id = x_user_id
+        try:
+            start_day = date.fromisoformat(start) if start else None
+        except ValueError:
+            raise HTTPException(status_code=400, detail="start must be YYYY-MM-DD")
+        return find_focus_blocks(user_id, start_day, days, min_minutes, limit, include_weekends)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/contacts")
+async def get_contacts(
+    kind: str = Query("all"),
+    limit: int = Query(10, ge=1, le=100),
+    x_user_id: Optional[str] = Header(None),
+):
+    """Most frequent contacts (kind: all, meetings or emails), your own address excluded"""
+    try:
+        if not x_user_id:
+            raise HTTPException(status_code=400, detail="User ID is required")
+        if kind not in CONTACT_KINDS:
+            raise HTTPException(status_code=400, detail=f"kind must be one of: {', '.join(CONTACT_KINDS)}")
+        user_id = x_user_id
+        return {"contacts": top_contacts(user_id, kind=kind, limit=limit)}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/contacts/items")
+async def get_contact_items(
+    who: str = Query(..., min_length=1),
+    role: str = Query("any"),
+    limit: int = Query(50, ge=1, le=500),
+    x_user_id: Optional[str] = Header(None),
+):
+    """Items involving a contact (address, name or address local part); role=from for emails they sent"""
+    try:
+        if not x_user_id:
+            raise HTTPException(status_code=400, detail="User ID is required")
+        if role not in ("any", "from"):
+            raise HTTPException(status_code=400, detail="role must be 'any' or 'from'")
+        user_id = x_user_id
+        index = contact_index(user_id)
+        contact = index.lookup(who)
+        if contact is None:
+            raise HTTPException(status_code=404, detail="Contact not found")
+        items = index.items_for(contact, role)
+        return {
+            "contact": contact.to_dict(),
+            "items": [contact_item_summary(item) for item in items[:limit]],
+            "total": len(items)
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.get("/api/insights")
 async def get_insights(x_user_id: Optional[str] = Header(None)):
     """Get behavioral insights"""
@@ -1032,17 +1849,71 @@ async def google_sync(x_user_id: Optional[str] = Header(None)):
 
 
 @app.get("/api/google/status")
-async def google_status(x_user_id: Optional[str] = Header(None)):
-    """Check if Google is connected and get sync status"""
+async def google_status(
+    x_user_id: Optional[str] = Header(None),
+    response_format: Optional[str] = Query(None, alias="format"),
+):
+    """Check if Google is connected and get sync status (format=ndjson streams records)"""
     try:
         if not x_user_id:
             raise HTTPException(status_code=400, detail="User ID is required")
         user_id = x_user_id
+        if response_format == "ndjson":
+            return ndjson_response(sync_status_records(user_id))
         return get_sync_status(user_id)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/google/push/register")
+async def google_push_register(x_user_id: Optional[str] = Header(None)):
+    """Open (or replace) the user's Calendar watch channel and Gmail Pub/Sub watch"""
+    try:
+        if not x_user_id:
+            raise HTTPException(status_code=400, detail="User ID is required")
+        return await asyncio.to_thread(register_push, x_user_id)
+    except HTTPException:
+        raise
+    except PushNotConfiguredError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Push registration error: {str(e)}")
+
+
+@app.post("/api/google/push/calendar")
+async def google_push_calendar(request: Request):
+    """
+    Calendar events.watch notifications. Identified by the signed channel token
+    (no X-User-Id); schedules a debounced incremental calendar sync.
+    """
+    try:
+        return push_scheduler.handle_calendar({k.lower(): v for k, v in request.headers.items()})
+    except PermissionError as e:
+        raise HTTPException(status_code=403, detail=str(e))
+
+
+@app.post("/api/google/push/gmail")
+async def google_push_gmail(request: Request, token: Optional[str] = Query(None)):
+    """
+    Gmail Pub/Sub push endpoint (subscription URL carries ?token=PUSH_VERIFICATION_TOKEN);
+    schedules a debounced incremental mailbox sync for the notified address.
+    """
+    if not verify_pubsub_token(token):
+        raise HTTPException(status_code=403, detail="Invalid verification token")
+    try:
+        return push_scheduler.handle_gmail(await request.json())
+    except ValueError as e:
+        # Malformed messages are acknowledged so Pub/Sub does not redeliver them forever
+        print(f"⚠️ Dropped Gmail push: {e}")
+        return {"status": "ignored", "reason": str(e)}
+
+
+@app.get("/api/google/push/metrics")
+async def google_push_metrics():
+    """Push notification counters (received, duplicates, coalesced, syncs, ...)"""
+    return push_scheduler.stats
+
+
 @app.post("/api/google/disconnect")
 async def google_disconnect(x_user_id: Optional[str] = Header(None)):
     """Disconnect Google account and remove saved token"""
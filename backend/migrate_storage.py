@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+One-shot migration to the sharded per-user storage layout.
+Moves data/<user_id>/ to data/users/<shard>/<user_id>/ and token_<user_id>.json to
+tokens/<shard>/<user_id>.json, then rebuilds data/users.idx.
+
+Stop the backend before running it. Safe to re-run: already-migrated users are skipped.
+
+Usage:
+    python migrate_storage.py [--dry-run]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+from pathlib import Path
+
+from services.user_paths import storage
+
+
+def move(source: Path, target: Path, dry_run: bool) -> bool:
+    """Move a file or directory unless the target already exists"""
+    if target.exists():
+        print(f"  ⚠️ {target} already exists, leaving {source} in place")
+        return False
+    print(f"  {source} -> {target}")
+    if not dry_run:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.replace(source, target)
+        except OSError:
+            # Different filesystem (e.g. USER_TOKEN_DIR on another volume)
+            shutil.move(str(source), str(target))
+    return True
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Migrate per-user data and tokens to the sharded layout")
+    parser.add_argument("--dry-run", action="store_true", help="Only print what would be moved")
+    args = parser.parse_args()
+
+    moved_dirs = moved_tokens = skipped = 0
+
+    print(f"Data: {storage.data_root} -> {storage.users_root}/<shard>/<user_id>/")
+    for user_id, source in list(storage.iter_legacy_dirs()):
+        if move(source, storage.sharded_user_dir(user_id), args.dry_run):
+            moved_dirs += 1
+            # Cached paths (and created-directory marks) still point at the old location
+            storage.forget(user_id)
+        else:
+            skipped += 1
+
+    print(f"Tokens: {storage.legacy_token_root}/token_<user_id>.json -> {storage.token_root}/<shard>/<user_id>.json")
+    for user_id, source in list(storage.iter_legacy_tokens()):
+        if move(source, storage.sharded_token_file(user_id), args.dry_run):
+            moved_tokens += 1
+            storage.forget(user_id)
+        else:
+            skipped += 1
+
+    if args.dry_run:
+        print(f"Dry run: would move {moved_dirs} data directories and {moved_tokens} tokens ({skipped} conflicts)")
+        return 0
+
+    users = storage.rebuild_index()
+    print(f"✅ Moved {moved_dirs} data directories and {moved_tokens} tokens; {users} users in {storage.index_file}")
+    if skipped:
+        print(f"⚠️ {skipped} items were left in place because their target already exists")
+    return 1 if skipped else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for Google push notifications.
+Posts Calendar watch-channel notifications (X-Goog-* headers) or Gmail Pub/Sub push
+envelopes to a running backend, so push sync can be exercised without a public URL.
+
+Usage:
+    python send_push_notification.py calendar --user USER_ID [--calendar ID] [--count 5] [--state exists]
+    python send_push_notification.py gmail --email me@example.com --history-id 12345 [--count 5]
+"""
+
+import argparse
+import base64
+import json
+import os
+import sys
+import uuid
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import quote
+
+import httpx
+
+from services.push_sync import calendar_channels, channel_token, load_push_state, PUSH_VERIFICATION_TOKEN
+
+DEFAULT_SERVER = os.getenv("PUSH_TEST_SERVER", "http://localhost:8000")
+
+
+def calendar_notification(user_id: str, message_number: int, state: str = "exists", calendar_id: Optional[str] = None) -> Dict[str, str]:
+    """
+    Headers of a Calendar notification for one of the user's registered channels
+    (the given calendar's, else the first), signed like Google echoes it
+    """
+    channels = calendar_channels(load_push_state(user_id))
+    calendar_id = calendar_id or next(iter(channels), "primary")
+    channel = channels.get(calendar_id) or {}
+    return {
+        "X-Goog-Channel-ID": channel.get("channel_id", "unregistered"),
+        "X-Goog-Channel-Token": channel_token(user_id),
+        "X-Goog-Resource-ID": channel.get("resource_id", "unregistered"),
+        "X-Goog-Resource-State": state,
+        "X-Goog-Resource-URI": f"https://www.googleapis.com/calendar/v3/calendars/{quote(calendar_id, safe='')}/events",
+        "X-Goog-Message-Number": str(message_number),
+    }
+
+
+def gmail_envelope(email: str, history_id: int, message_id: str) -> Dict[str, Any]:
+    """Pub/Sub push envelope carrying a Gmail {emailAddress, historyId} notification"""
+    data = json.dumps({"emailAddress": email, "historyId": history_id}).encode("utf-8")
+    return {
+        "message": {
+            "data": base64.b64encode(data).decode("ascii"),
+            "messageId": message_id,
+            "publishTime": "",
+        },
+        "subscription": "projects/local/subscriptions/gmail-push",
+    }
+
+
+def send(client: httpx.Client, args: argparse.Namespace, index: int) -> Tuple[int, Any]:
+    if args.source == "calendar":
+        response = client.post(
+            "/api/google/push/calendar",
+            headers=calendar_notification(args.user, args.first_number + index, args.state, args.calendar),
+        )
+    else:
+        message_id = args.message_id or f"local-{uuid.uuid4().hex[:12]}"
+        response = client.post(
+            "/api/google/push/gmail",
+            params={"token": args.token},
+            json=gmail_envelope(args.email, args.history_id + (0 if args.repeat else index), message_id),
+        )
+    try:
+        body = response.json()
+    except ValueError:
+        body = response.text
+    return response.status_code, body
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", choices=("calendar", "gmail"))
+    parser.add_argument("--server", default=DEFAULT_SERVER, help="Backend base URL")
+    parser.add_argument("--count", type=int, default=1, help="Notifications to send (a burst)")
+    parser.add_argument("--user", help="Calendar: user whose channel is notified")
+    parser.add_argument("--calendar", help="Calendar: calendar whose channel is notified (default: first registered)")
+    parser.add_argument("--state", default="exists", help="Calendar: X-Goog-Resource-State (sync, exists, not_exists)")
+    parser.add_argument("--first-number", type=int, default=1, help="Calendar: first X-Goog-Message-Number")
+    parser.add_argument("--email", help="Gmail: mailbox address in the notification")
+    parser.add_argument("--history-id", type=int, default=1, help="Gmail: historyId of the first notification")
+    parser.add_argument("--message-id", help="Gmail: fixed Pub/Sub messageId")
+    parser.add_argument("--repeat", action="store_true", help="Gmail: resend one message (redelivery)")
+    parser.add_argument("--token", default=PUSH_VERIFICATION_TOKEN, help="Gmail: ?token= verification token")
+    args = parser.parse_args()
+
+    if args.source == "calendar" and not args.user:
+        parser.error("calendar notifications need --user")
+    if args.source == "gmail" and not args.email:
+        parser.error("gmail notifications need --email")
+    if args.repeat and not args.message_id:
+        # Resend one Pub/Sub message (a redelivery)
+        args.message_id = f"local-{uuid.uuid4().hex[:12]}"
+
+    failures = 0
+    with httpx.Client(base_url=args.server, timeout=10) as client:
+        for index in range(max(1, args.count)):
+            status, body = send(client, args, index)
+            failures += status >= 400
+            print(f"{index + 1:3d}  HTTP {status}  {body}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
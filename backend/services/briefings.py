@@ -0,0 +1,203 @@
+"""
+Precomputed daily briefings
+Stores one generated "today's focus" briefing per user, keyed by a data fingerprint,
+and regenerates them in batches through the LLM gateway at background priority
+"""
+
+import asyncio
+import hmac
+import json
+import os
+import time
+from datetime import date
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from services.data_loader import get_data_fingerprint, get_user_data_dir, get_user_calendar_file, get_user_email_file
+from services.llm_gateway import QueueFullError
+from services.pagination import data_version
+from services.user_paths import ensure_user_dir, known_users
+
+BRIEFING_FILE = "briefing.json"
+
+# Touched when the user makes an API request; only user-originated signals count as activity
+LAST_SEEN_FILE = "last_seen"
+
+# Seconds between last_seen touches for one user (keeps the per-request cost to a dict lookup)
+LAST_SEEN_RESOLUTION = 3600
+
+# Briefings generated at once by a batch run (the gateway still caps Ollama concurrency)
+BRIEFING_BATCH_CONCURRENCY = int(os.getenv("BRIEFING_BATCH_CONCURRENCY", "2"))
+
+# Seconds between background batch runs (0 disables the periodic job)
+BRIEFING_BATCH_INTERVAL = float(os.getenv("BRIEFING_BATCH_INTERVAL", "1800"))
+
+# Users who made a request or whose synced data changed within this many days are considered active
+BRIEFING_ACTIVE_DAYS = float(os.getenv("BRIEFING_ACTIVE_DAYS", "7"))
+
+# X-Admin-Token required by POST /api/briefing/batch (unset: the endpoint is disabled)
+BRIEFING_ADMIN_TOKEN = os.getenv("BRIEFING_ADMIN_TOKEN", "")
+
+# Users with a generation in flight (prevents duplicate work across batch and API)
+_in_flight = set()
+
+# user_id -> time last_seen was last touched by this process
+_last_seen = {}
+
+
+def briefing_fingerprint(user_id: str) -> str:
+    """Version of the inputs a briefing depends on: the user's data and today's date"""
+    return data_version((get_data_fingerprint(user_id), date.today().isoformat()))
+
+
+def load_briefing(user_id: str) -> Optional[Dict[str, Any]]:
+    """Stored briefing for a user, or None"""
+    briefing_file = get_user_data_dir(user_id) / BRIEFING_FILE
+    if not briefing_file.exists():
+        return None
+    try:
+        with open(briefing_file, "r") as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"Error loading briefing: {e}")
+        return None
+
+
+def save_briefing(user_id: str, briefing: Dict[str, Any]) -> None:
+    user_dir = ensure_user_dir(user_id)
+    tmp_file = user_dir / (BRIEFING_FILE + ".tmp")
+    with open(tmp_file, "w") as f:
+        json.dump(briefing, f, indent=2)
+    os.replace(tmp_file, user_dir / BRIEFING_FILE)
+
+
+def verify_admin_token(token: Optional[str]) -> bool:
+    """Whether a request carries the configured admin token (always False when none is configured)"""
+    return bool(BRIEFING_ADMIN_TOKEN) and hmac.compare_digest(token or "", BRIEFING_ADMIN_TOKEN)
+
+
+def is_fresh(user_id: str, briefing: Optional[Dict[str, Any]]) -> bool:
+    return bool(briefing) and briefing.get("fingerprint") == briefing_fingerprint(user_id)
+
+
+def mark_active(user_id: str) -> None:
+    """Stamp a user's last request time (at most once per LAST_SEEN_RESOLUTION; never creates the data dir)"""
+    now = time.time()
+    if now - _last_seen.get(user_id, 0) < LAST_SEEN_RESOLUTION:
+        return
+    user_dir = get_user_data_dir(user_id)
+    if not user_dir.is_dir():
+        return
+    _last_seen[user_id] = now
+    try:
+        (user_dir / LAST_SEEN_FILE).touch()
+    except OSError as e:
+        print(f"Error stamping last access: {e}")
+
+
+def last_active(user_id: str) -> float:
+    """
+    Latest user-originated activity: a request (last_seen) or a change to the
+    synced calendar/email data. Files the background jobs write themselves
+    (briefing.json, load history, push state, derived indexes) are ignored,
+    so a batch run can't keep a user "active" forever.
+    """
+    latest = 0.0
+    for path in (get_user_data_dir(user_id) / LAST_SEEN_FILE, get_user_calendar_file(user_id), get_user_email_file(user_id)):
+        try:
+            latest = max(latest, path.stat().st_mtime)
+        except FileNotFoundError:
+            continue
+    return latest
+
+
+def list_active_users(active_days: float = BRIEFING_ACTIVE_DAYS) -> List[str]:
+    """Known users with user-originated activity within the last active_days days"""
+    cutoff = time.time() - active_days * 86400
+    return [user_id for user_id in known_users() if last_active(user_id) >= cutoff]
+
+
+async def refresh_briefing(
+    user_id: str,
+    generate: Callable[[str], Awaitable[Dict[str, Any]]],
+    force: bool = False,
+) -> str:
+    """
+    Regenerate a user's briefing if their data changed since it was generated.
+
+    Args:
+        user_id: User to refresh
+        generate: Coroutine producing {"briefing", "model"} for a user
+        force: Regenerate even if the stored briefing is current
+
+    Returns:
+        "generated", "fresh", "in_flight", "deferred" (gateway full) or "failed"
+    """
+    if not force and is_fresh(user_id, load_briefing(user_id)):
+        return "fresh"
+    if user_id in _in_flight:
+        return "in_flight"
+    _in_flight.add(user_id)
+    try:
+        # Fingerprint taken before generating: a sync during generation leaves it stale
+        fingerprint = briefing_fingerprint(user_id)
+        result = await generate(user_id)
+        save_briefing(user_id, {
+            "briefing": result["briefing"],
+            "model": result.get("model"),
+            "fingerprint": fingerprint,
+            "generated_at": time.time(),
+        })
+        return "generated"
+    except QueueFullError:
+        return "deferred"
+    except Exception as e:
+        print(f"⚠️ Briefing generation failed for user {user_id[:8]}...: {e}")
+        return "failed"
+    finally:
+        _in_flight.discard(user_id)
+
+
+async def run_briefing_batch(
+    generate: Callable[[str], Awaitable[Dict[str, Any]]],
+    user_ids: Optional[Iterable[str]] = None,
+    force: bool = False,
+    concurrency: int = BRIEFING_BATCH_CONCURRENCY,
+) -> Dict[str, Any]:
+    """
+    Refresh briefings for many users with bounded concurrency.
+
+    Args:
+        generate: Coroutine producing {"briefing", "model"} for a user
+        user_ids: Users to refresh (defaults to list_active_users())
+        force: Regenerate current briefings too
+        concurrency: Maximum briefings generated at once
+
+    Returns:
+        Dict with per-outcome counts, the user count and elapsed seconds
+    """
+    started = time.perf_counter()
+    users = list(user_ids) if user_ids is not None else list_active_users()
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def refresh(user_id: str) -> str:
+        async with semaphore:
+            return await refresh_briefing(user_id, generate, force)
+
+    outcomes = await asyncio.gather(*(refresh(user_id) for user_id in users))
+    counts: Dict[str, int] = {}
+    for outcome in outcomes:
+        counts[outcome] = counts.get(outcome, 0) + 1
+    return {"users": len(users), "outcomes": counts, "elapsed_seconds": round(time.perf_counter() - started, 2)}
+
+
+async def briefing_loop(generate: Callable[[str], Awaitable[Dict[str, Any]]]) -> None:
+    """Periodically refresh active users' briefings; runs for the application's lifetime"""
+    if BRIEFING_BATCH_INTERVAL <= 0:
+        return
+    while True:
+        await asyncio.sleep(BRIEFING_BATCH_INTERVAL)
+        try:
+            stats = await run_briefing_batch(generate)
+            print(f"📰 Briefing batch: {stats}")
+        except Exception as e:
+            print(f"⚠️ Briefing batch failed: {e}")
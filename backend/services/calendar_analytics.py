@@ -0,0 +1,333 @@
+"""
+Interval analytics over calendar events
+Parses events into sorted intervals once, then measures overlaps, back-to-back chains,
+context switches, free-time fragmentation and free blocks with O(n log n) sweeps
+"""
+
+import heapq
+import os
+from collections import Counter, defaultdict
+from datetime import date, datetime, time, timezone
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from services.data_loader import parse_timestamp
+
+# Working hours used for fragmentation (local to each event) and free-time search
+WORK_DAY_START_HOUR = int(os.getenv("WORK_DAY_START_HOUR", "9"))
+WORK_DAY_END_HOUR = int(os.getenv("WORK_DAY_END_HOUR", "18"))
+
+# IANA zone for free-time search (e.g. "Europe/Berlin"); unset = the calendar's most common offset
+WORK_TIMEZONE = os.getenv("WORK_TIMEZONE", "").strip()
+
+# Meetings separated by at most this many seconds form a back-to-back chain
+BACK_TO_BACK_GAP_SECONDS = 5 * 60
+
+# Free gaps shorter than this are too short for focused work
+FOCUS_BLOCK_MINUTES = int(os.getenv("FOCUS_BLOCK_MINUTES", "60"))
+
+# Attendees present in at least this share of events are the user themself
+SELF_ATTENDEE_SHARE = 0.8
+
+# Consecutive meetings whose attendee sets overlap less than this are a context switch
+SAME_CONTEXT_JACCARD = 0.5
+
+# Conflict pairs listed in the summary (all are counted)
+MAX_CONFLICT_EXAMPLES = 5
+
+
+class Event(NamedTuple):
+    start: float
+    end: float
+    day: date
+    tz: Any
+    item_id: str
+    title: str
+    context: frozenset
+
+
+def parse_events(work_items: List[Dict[str, Any]]) -> List[Event]:
+    """
+    Timed calendar events as intervals sorted by (start, end).
+    All-day entries and zero-length markers (e.g. deadlines) are skipped.
+    """
+    calendar = [item for item in work_items if item.get("source") == "calendar"]
+    attendee_counts = Counter(
+        p.lower() for item in calendar for p in set(item.get("participants") or [])
+    )
+    self_addresses = set()
+    if len(calendar) >= 3:
+        threshold = SELF_ATTENDEE_SHARE * len(calendar)
+        self_addresses = {p for p, count in attendee_counts.items() if count >= threshold}
+
+    events = []
+    for item in calendar:
+        raw_start = item.get("timestamp", "")
+        if len(raw_start) <= 10:
+            continue
+        start = parse_timestamp(raw_start)
+        end = parse_timestamp(item.get("deadline", ""))
+        if not start or not end or end <= start:
+            continue
+        attendees = frozenset(p.lower() for p in item.get("participants") or []) - self_addresses
+        title = item.get("title", "")
+        events.append(Event(
+            start.timestamp(),
+            end.timestamp(),
+            start.date(),
+            start.tzinfo,
+            item.get("id", ""),
+            title,
+            attendees or frozenset([title.lower().strip()]),
+        ))
+    # Explicit key: the tz field has no ordering
+    events.sort(key=lambda e: (e.start, e.end, e.item_id))
+    return events
+
+
+def merge_intervals(intervals: List[Tuple[float, float]]) -> List[Tuple[float, float]]:
+    """Union of (start, end) intervals sorted by start, as non-overlapping blocks"""
+    merged: List[Tuple[float, float]] = []
+    for start, end in intervals:
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def merge_busy(events: List[Event]) -> List[Tuple[float, float]]:
+    """Union of the events' intervals as sorted, non-overlapping (start, end) blocks"""
+    return merge_intervals([(event.start, event.end) for event in events])
+
+
+def find_conflicts(events: List[Event]) -> Tuple[int, List[Tuple[Event, Event]]]:
+    """
+    Overlapping event pairs, via a sweep with a min-heap of active end times.
+
+    Returns:
+        (pair count, first MAX_CONFLICT_EXAMPLES pairs)
+    """
+    active: List[Tuple[float, int]] = []
+    count = 0
+    examples = []
+    for index, event in enumerate(events):
+        while active and active[0][0] <= event.start:
+            heapq.heappop(active)
+        count += len(active)
+        for _, other in active:
+            if len(examples) >= MAX_CONFLICT_EXAMPLES:
+                break
+            examples.append((events[other], event))
+        heapq.heappush(active, (event.end, index))
+    return count, examples
+
+
+def double_booked_seconds(events: List[Event]) -> float:
+    """Time covered by two or more events (endpoint sweep)"""
+    points = sorted([(e.start, 1) for e in events] + [(e.end, -1) for e in events])
+    total = 0.0
+    active = 0
+    previous = None
+    for moment, delta in points:
+        if previous is not None and active >= 2:
+            total += moment - previous
+        active += delta
+        previous = moment
+    return total
+
+
+def back_to_back_chains(events: List[Event]) -> List[List[Event]]:
+    """Runs of 2+ events each starting within BACK_TO_BACK_GAP_SECONDS of the run's end"""
+    chains = []
+    current: List[Event] = []
+    chain_end = 0.0
+    for event in events:
+        if current and event.start - chain_end <= BACK_TO_BACK_GAP_SECONDS and event.day == current[-1].day:
+            current.append(event)
+            chain_end = max(chain_end, event.end)
+            continue
+        if len(current) >= 2:
+            chains.append(current)
+        current = [event]
+        chain_end = event.end
+    if len(current) >= 2:
+        chains.append(current)
+    return chains
+
+
+def _same_context(a: frozenset, b: frozenset) -> bool:
+    return len(a & b) / len(a | b) >= SAME_CONTEXT_JACCARD
+
+
+def context_switches(events: List[Event]) -> Dict[date, int]:
+    """Per day: consecutive meetings whose attendees (or title) change context"""
+    switches: Dict[date, int] = defaultdict(int)
+    for previous, event in zip(events, events[1:]):
+        if previous.day == event.day and not _same_context(previous.context, event.context):
+            switches[event.day] += 1
+    return switches
+
+
+def work_window(day: date, tz: Any) -> Tuple[float, float]:
+    """Working hours of a day as epoch seconds in the given timezone"""
+    tz = tz or timezone.utc
+    start = datetime.combine(day, time(WORK_DAY_START_HOUR), tzinfo=tz).timestamp()
+    end = datetime.combine(day, time(WORK_DAY_END_HOUR), tzinfo=tz).timestamp()
+    return start, end
+
+
+def free_gaps(busy: List[Tuple[float, float]], window_start: float, window_end: float) -> List[Tuple[float, float]]:
+    """Free (start, end) gaps inside a window, given sorted merged busy blocks"""
+    gaps = []
+    cursor = window_start
+    for start, end in busy:
+        if end <= cursor:
+            continue
+        if start >= window_end:
+            break
+        if start > cursor:
+            gaps.append((cursor, start))
+        cursor = max(cursor, end)
+    if cursor < window_end:
+        gaps.append((cursor, window_end))
+    return gaps
+
+
+def fragmentation_by_day(events: List[Event]) -> Dict[date, Dict[str, float]]:
+    """
+    Per day with meetings: the share of free working time that sits in gaps
+    shorter than FOCUS_BLOCK_MINUTES (1.0 = no usable focus time).
+    """
+    by_day: Dict[date, List[Event]] = defaultdict(list)
+    for event in events:
+        by_day[event.day].append(event)
+
+    result = {}
+    min_gap = FOCUS_BLOCK_MINUTES * 60
+    for day, day_events in by_day.items():
+        window_start, window_end = work_window(day, day_events[0].tz)
+        gaps = free_gaps(merge_busy(day_events), window_start, window_end)
+        free = sum(end - start for start, end in gaps)
+        short = sum(end - start for start, end in gaps if end - start < min_gap)
+        result[day] = {
+            "fragmentation": round(short / free, 2) if free else 1.0,
+            "free_minutes": round(free / 60),
+            "short_gap_minutes": round(short / 60),
+        }
+    return result
+
+
+def dominant_tz(events: List[Event]) -> Any:
+    """Most common timezone among the events (UTC if there are none)"""
+    counts = Counter(event.tz for event in events if event.tz is not None)
+    return counts.most_common(1)[0][0] if counts else timezone.utc
+
+
+def load_zone(name: str) -> Optional[ZoneInfo]:
+    """IANA zone by name, or None (logged) if it is empty or unknown"""
+    if not name:
+        return None
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        print(f"⚠️ Unknown WORK_TIMEZONE {name!r}, using the calendar's offset")
+        return None
+
+
+_work_zone = load_zone(WORK_TIMEZONE)
+
+
+def work_zone(events: List[Event]) -> Any:
+    """
+    Zone for working hours: WORK_TIMEZONE when set, else the events' most
+    common offset. A real zone keeps the hours right across DST changes;
+    the fixed offset is only a fallback.
+    """
+    return _work_zone or dominant_tz(events)
+
+
+def busy_by_day(events: List[Event], tz: Any = None) -> Dict[date, List[Tuple[float, float]]]:
+    """
+    Day-bucketed busy index: merged busy blocks per day, keyed by the date
+    in tz (each event's own offset if None). Events crossing midnight are
+    added to every day they touch.
+    """
+    buckets: Dict[date, List[Tuple[float, float]]] = defaultdict(list)
+    for event in events:
+        event_tz = tz or event.tz or timezone.utc
+        day = datetime.fromtimestamp(event.start, event_tz).date() if tz else event.day
+        last_day = datetime.fromtimestamp(event.end, event_tz).date()
+        while day <= last_day:
+            buckets[day].append((event.start, event.end))
+            day = date.fromordinal(day.toordinal() + 1)
+    return {day: merge_intervals(sorted(intervals)) for day, intervals in buckets.items()}
+
+
+def day_free_blocks(busy: List[Tuple[float, float]], day: date, tz: Any) -> List[Tuple[float, float]]:
+    """Free (start, end) blocks within a day's working hours, earliest first"""
+    window_start, window_end = work_window(day, tz)
+    return free_gaps(busy, window_start, window_end)
+
+
+def _iso(moment: float, tz: Any) -> str:
+    return datetime.fromtimestamp(moment, tz or timezone.utc).isoformat()
+
+
+def analyze_calendar(work_items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Calendar metrics for a user's work items.
+
+    Returns:
+        Dict with event/day counts, conflicts, back-to-back chains, context
+        switches and fragmentation (totals, per-day averages and worst days)
+    """
+    events = parse_events(work_items)
+    if not events:
+        return {
+            "events": 0, "meeting_days": 0, "meeting_minutes": 0,
+            "conflicts": 0, "conflict_examples": [], "double_booked_minutes": 0,
+            "back_to_back_chains": 0, "longest_chain": None,
+            "context_switches": 0, "context_switches_per_day": 0.0, "busiest_day": None,
+            "fragmentation": 0.0, "most_fragmented_day": None,
+        }
+
+    conflict_count, conflict_pairs = find_conflicts(events)
+    chains = back_to_back_chains(events)
+    switches = context_switches(events)
+    fragmentation = fragmentation_by_day(events)
+    meetings_per_day = Counter(event.day for event in events)
+    days = len(meetings_per_day)
+
+    longest = max(chains, key=len) if chains else None
+    busiest = max(meetings_per_day, key=lambda d: (switches.get(d, 0), meetings_per_day[d]))
+    most_fragmented = max(fragmentation, key=lambda d: (fragmentation[d]["fragmentation"], -fragmentation[d]["free_minutes"]))
+
+    return {
+        "events": len(events),
+        "meeting_days": days,
+        "meeting_minutes": round(sum(start_end[1] - start_end[0] for start_end in merge_busy(events)) / 60),
+        "conflicts": conflict_count,
+        "conflict_examples": [
+            {"first": a.title, "second": b.title, "start": _iso(b.start, b.tz)}
+            for a, b in conflict_pairs
+        ],
+        "double_booked_minutes": round(double_booked_seconds(events) / 60),
+        "back_to_back_chains": len(chains),
+        "longest_chain": {
+            "meetings": len(longest),
+            "day": longest[0].day.isoformat(),
+            "start": _iso(longest[0].start, longest[0].tz),
+            "end": _iso(max(e.end for e in longest), longest[0].tz),
+        } if longest else None,
+        "context_switches": sum(switches.values()),
+        "context_switches_per_day": round(sum(switches.values()) / days, 1),
+        "busiest_day": {
+            "day": busiest.isoformat(),
+            "meetings": meetings_per_day[busiest],
+            "switches": switches.get(busiest, 0),
+        },
+        "fragmentation": round(sum(f["fragmentation"] for f in fragmentation.values()) / days, 2),
+        "most_fragmented_day": {"day": most_fragmented.isoformat(), **fragmentation[most_fragmented]},
+    }
@@ -0,0 +1,223 @@
+"""
+Contact index over a user's work items
+Parses participant header values once (RFC 5322 via email.utils), interns the addresses and maps
+each contact to the items they appear on, so contact queries never rescan work items
+"""
+
+import sys
+from datetime import datetime, timezone
+from email.utils import formataddr, getaddresses, parseaddr
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from services.data_loader import load_work_items, get_data_fingerprint, parse_timestamp
+
+# Distinct raw participant strings whose parse is memoized
+PARSE_CACHE_SIZE = 65536
+
+# Contacts on at least this share of items are the user themself
+SELF_CONTACT_SHARE = 0.8
+
+CONTACT_KINDS = ("all", "meetings", "emails")
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_participant(raw: str) -> Tuple[str, str]:
+    """
+    Parse one participant value ("Jane Doe <Jane@X.com>", "jane@x.com", "team").
+
+    Returns:
+        (interned lowercase address, display name); the address falls back to
+        the trimmed value when it is not an email address
+    """
+    name, address = parseaddr(raw or "")
+    address = (address or raw or "").strip().lower()
+    return sys.intern(address), name.strip()
+
+
+def split_address_header(value: str) -> List[str]:
+    """Participants of a To/Cc header, split per RFC 5322 (commas inside quoted names are kept)"""
+    participants = []
+    for name, address in getaddresses([value or ""]):
+        if address:
+            participants.append(formataddr((name, address)))
+    return participants
+
+
+def participant_label(raw: str) -> str:
+    """Short label for a participant: the local part of their address"""
+    return parse_participant(raw)[0].partition("@")[0]
+
+
+class Contact:
+    __slots__ = ("address", "name", "item_ids", "meetings", "emails", "sent", "last_seen")
+
+    def __init__(self, address: str):
+        self.address = address
+        self.name = ""
+        self.item_ids: List[str] = []
+        self.meetings = 0
+        self.emails = 0
+        self.sent = 0
+        self.last_seen = 0.0
+
+    def count(self, kind: str) -> int:
+        if kind == "meetings":
+            return self.meetings
+        if kind == "emails":
+            return self.emails
+        return self.meetings + self.emails
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "address": self.address,
+            "name": self.name,
+            "meetings": self.meetings,
+            "emails": self.emails,
+            "sent": self.sent,
+            "items": len(self.item_ids),
+            "last_seen": datetime.fromtimestamp(self.last_seen, timezone.utc).isoformat() if self.last_seen else None,
+        }
+
+
+class ContactIndex:
+    """
+    Contacts of one user's work items.
+
+    Each contact keeps the IDs of the items they appear on (in item order),
+    meeting/email counts, the emails they sent (first participant of an
+    email is its sender) and when they were last seen.
+    """
+
+    def __init__(self, work_items: List[Dict[str, Any]]):
+        self.contacts: Dict[str, Contact] = {}
+        self.items: Dict[str, Dict[str, Any]] = {}
+        self.sent_ids: Dict[str, List[str]] = {}
+        for item in work_items:
+            self._add(item)
+        self.self_addresses = self._find_self()
+
+    def _add(self, item: Dict[str, Any]) -> None:
+        item_id = item.get("id", "")
+        if not item_id:
+            return
+        self.items[item_id] = item
+        is_meeting = item.get("source") == "calendar"
+        seen_at = self._item_time(item)
+        seen = set()
+        for position, raw in enumerate(item.get("participants") or []):
+            address, name = parse_participant(raw)
+            if not address or address in seen:
+                continue
+            seen.add(address)
+            contact = self.contacts.get(address)
+            if contact is None:
+                contact = self.contacts[address] = Contact(address)
+            if name and not contact.name:
+                contact.name = name
+            contact.item_ids.append(item_id)
+            if is_meeting:
+                contact.meetings += 1
+            else:
+                contact.emails += 1
+                if position == 0:
+                    contact.sent += 1
+                    self.sent_ids.setdefault(address, []).append(item_id)
+            contact.last_seen = max(contact.last_seen, seen_at)
+
+    def _find_self(self) -> set:
+        if len(self.items) < 3:
+            return set()
+        threshold = SELF_CONTACT_SHARE * len(self.items)
+        return {address for address, contact in self.contacts.items() if len(contact.item_ids) >= threshold}
+
+    def top(self, kind: str = "all", limit: int = 10, include_self: bool = False) -> List[Contact]:
+        """Most frequent contacts for a kind ("all", "meetings" or "emails"), most recent first on ties"""
+        candidates = [
+            contact for contact in self.contacts.values()
+            if contact.count(kind) and (include_self or contact.address not in self.self_addresses)
+        ]
+        candidates.sort(key=lambda c: (-c.count(kind), -c.last_seen, c.address))
+        return candidates[:limit]
+
+    def lookup(self, who: str) -> Optional[Contact]:
+        """
+        Find a contact by address, display name or address local part
+        (case-insensitive); a unique partial match is accepted too.
+        """
+        address, name = parse_participant(who)
+        if address in self.contacts:
+            return self.contacts[address]
+        wanted = (name or who).strip().lower()
+        partial = []
+        for contact in self.contacts.values():
+            labels = (contact.name.lower(), contact.address.partition("@")[0])
+            if wanted in labels:
+                return contact
+            if any(wanted in label for label in labels if label):
+                partial.append(contact)
+        return partial[0] if len(partial) == 1 else None
+
+    def items_for(self, contact: Contact, role: str = "any") -> List[Dict[str, Any]]:
+        """Items a contact appears on ("any") or sent ("from"), most recent first"""
+        item_ids = self.sent_ids.get(contact.address, []) if role == "from" else contact.item_ids
+        return sorted((self.items[item_id] for item_id in item_ids), key=self._item_time, reverse=True)
+
+    @staticmethod
+    def _item_time(item: Dict[str, Any]) -> float:
+        moment = parse_timestamp(item.get("timestamp", ""))
+        return moment.timestamp() if moment else 0.0
+
+
+class ContactViewCache:
+    """Contact index per user, built at sync time and tagged with the data fingerprint"""
+
+    def __init__(self):
+        self._indexes: Dict[str, Tuple[Any, ContactIndex]] = {}
+        self.stats = {"hits": 0, "builds": 0}
+
+    def refresh(self, user_id: str, work_items: List[Dict[str, Any]]) -> ContactIndex:
+        index = ContactIndex(work_items)
+        self._indexes[user_id] = (get_data_fingerprint(user_id), index)
+        self.stats["builds"] += 1
+        return index
+
+    def get(self, user_id: str) -> Optional[ContactIndex]:
+        cached = self._indexes.get(user_id)
+        if cached and cached[0] == get_data_fingerprint(user_id):
+            self.stats["hits"] += 1
+            return cached[1]
+        return None
+
+    def invalidate_user(self, user_id: str) -> None:
+        self._indexes.pop(user_id, None)
+
+
+contact_views = ContactViewCache()
+
+
+def contact_index(user_id: str) -> ContactIndex:
+    """
+    A user's contact index (individual messages and meetings, with mock
+    fallback). Built at sync time; rebuilt only when the data changed
+    outside a sync.
+    """
+    cached = contact_views.get(user_id)
+    if cached is not None:
+        return cached
+    return contact_views.refresh(user_id, load_work_items(user_id, use_mock_if_empty=True))
+
+
+def top_contacts(user_id: str, kind: str = "all", limit: int = 10) -> List[Dict[str, Any]]:
+    """Most frequent contacts of a user as dicts, the user's own address excluded"""
+    return [contact.to_dict() for contact in contact_index(user_id).top(kind, limit)]
+
+
+def contact_item_summary(item: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": item.get("id", ""),
+        "source": item.get("source", ""),
+        "title": item.get("title", ""),
+        "timestamp": item.get("timestamp", ""),
+        "status": item.get("status", ""),
+    }
@@ -0,0 +1,430 @@
+"""
+Context detection from a participant co-occurrence graph
+Keeps a weighted graph of who appears together on emails and meetings per user, updated
+incrementally on sync, and clusters it (union-find seeded by shared subject terms) into contexts
+"""
+
+import hashlib
+import json
+import os
+import re
+from bisect import bisect_left
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from services.contacts import parse_participant
+from services.data_loader import get_data_fingerprint, get_user_data_dir, parse_timestamp
+from services.derived_cache import derived_cache
+from services.prompt_packer import query_terms
+from services.threads import load_thread_items
+from services.user_paths import ensure_user_dir
+
+CONTEXT_GRAPH_FILE = "context_graph.json"
+
+# Items two people must share before they are linked into the same context
+MIN_EDGE_WEIGHT = int(os.getenv("CONTEXT_MIN_EDGE_WEIGHT", "2"))
+
+# Items with more participants (announcements, all-hands) add no edges
+MAX_ITEM_PARTICIPANTS = 25
+
+# Participants on at least this share of items are the user themself (or a list they read)
+SELF_PARTICIPANT_SHARE = 0.5
+
+# Distinctive subject terms two items must share to be seeded into one context
+SEED_MIN_SHARED_TERMS = 2
+
+# Subject terms on more than this share (or number) of items are too common to seed or name contexts
+MAX_TERM_SHARE = 0.2
+MAX_TERM_ITEMS = 50
+
+MAX_CONTEXTS = int(os.getenv("MAX_CONTEXTS", "8"))
+
+# Days ahead a meeting or unread mail makes a context urgent
+URGENT_WITHIN_DAYS = 2
+
+_REPLY_PREFIX_RE = re.compile(r"^\s*((re|fwd?|aw|wg|sv)\s*:\s*)+", re.IGNORECASE)
+_SUBJECT_NOISE = frozenset("re fw fwd meeting invitation updated accepted declined call sync".split())
+
+
+def subject_terms(title: str) -> List[str]:
+    """Content words of a subject line, without reply/forward prefixes"""
+    return sorted(query_terms(_REPLY_PREFIX_RE.sub("", title or "")) - _SUBJECT_NOISE)
+
+
+def _display_term(word: str) -> str:
+    """Title-case a subject word, keeping acronyms ("API") as written"""
+    return word if word.isupper() else word.capitalize()
+
+
+def _item_signature(participants: List[str], terms: List[str]) -> str:
+    return hashlib.sha1(json.dumps([participants, terms]).encode("utf-8")).hexdigest()[:16]
+
+
+def _edge_key(a: str, b: str) -> str:
+    return f"{a}\t{b}" if a < b else f"{b}\t{a}"
+
+
+class _UnionFind:
+    def __init__(self):
+        self.parent: Dict[str, str] = {}
+
+    def find(self, node: str) -> str:
+        root = self.parent.setdefault(node, node)
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while node != root:
+            self.parent[node], node = root, self.parent[node]
+        return root
+
+    def union(self, a: str, b: str) -> None:
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            self.parent[root_b] = root_a
+
+
+class ContextGraph:
+    """
+    Participant co-occurrence graph over a user's work items.
+
+    Each item is stored with its normalized participants and subject terms;
+    edge weights count the items two participants share. apply() diffs the
+    current items against the stored ones, so a sync only touches the edges
+    of new, changed or removed items.
+    """
+
+    def __init__(self):
+        # item_id -> {"sig", "participants", "terms", "title", "source", "status", "timestamp", "deadline"}
+        self.items: Dict[str, Dict[str, Any]] = {}
+        self.edges: Dict[str, int] = {}
+        self.participant_counts: Dict[str, int] = {}
+        self.term_counts: Dict[str, int] = {}
+
+    # ------------------------------------------------------------------
+    # Incremental maintenance
+    # ------------------------------------------------------------------
+
+    def _add(self, item_id: str, entry: Dict[str, Any], sign: int) -> None:
+        participants = entry["participants"]
+        for participant in participants:
+            self._bump(self.participant_counts, participant, sign)
+        for term in entry["terms"]:
+            self._bump(self.term_counts, term, sign)
+        if len(participants) <= MAX_ITEM_PARTICIPANTS:
+            for i, a in enumerate(participants):
+                for b in participants[i + 1:]:
+                    self._bump(self.edges, _edge_key(a, b), sign)
+        if sign > 0:
+            self.items[item_id] = entry
+        else:
+            self.items.pop(item_id, None)
+
+    @staticmethod
+    def _bump(counts: Dict[str, int], key: str, delta: int) -> None:
+        value = counts.get(key, 0) + delta
+        if value > 0:
+            counts[key] = value
+        else:
+            counts.pop(key, None)
+
+    def apply(self, work_items: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Bring the graph in line with the user's current work items.
+
+        Returns:
+            Counts of added, updated, removed and unchanged items
+        """
+        stats = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+        seen = set()
+        for item in work_items:
+            item_id = item.get("id", "")
+            if not item_id:
+                continue
+            seen.add(item_id)
+            participants = sorted({parse_participant(p)[0] for p in item.get("participants") or []} - {""})
+            terms = subject_terms(item.get("title", ""))
+            entry = {
+                "sig": _item_signature(participants, terms),
+                "participants": participants,
+                "terms": terms,
+                "title": _REPLY_PREFIX_RE.sub("", item.get("title", "")).strip(),
+                "source": item.get("source", ""),
+                "status": item.get("status", ""),
+                "timestamp": item.get("timestamp", ""),
+                "deadline": item.get("deadline", ""),
+            }
+            previous = self.items.get(item_id)
+            if previous and previous["sig"] == entry["sig"]:
+                # Same graph contribution; refresh display fields only
+                self.items[item_id] = entry
+                stats["unchanged"] += 1
+                continue
+            if previous:
+                self._add(item_id, previous, -1)
+                stats["updated"] += 1
+            else:
+                stats["added"] += 1
+            self._add(item_id, entry, 1)
+        for item_id in [item_id for item_id in self.items if item_id not in seen]:
+            self._add(item_id, self.items[item_id], -1)
+            stats["removed"] += 1
+        return stats
+
+    # ------------------------------------------------------------------
+    # Clustering
+    # ------------------------------------------------------------------
+
+    def self_addresses(self) -> set:
+        """Participants present on so many items that they do not separate contexts"""
+        if len(self.items) < 3:
+            return set()
+        threshold = SELF_PARTICIPANT_SHARE * len(self.items)
+        return {p for p, count in self.participant_counts.items() if count >= threshold}
+
+    def distinctive_terms(self) -> set:
+        limit = max(2, min(MAX_TERM_ITEMS, MAX_TERM_SHARE * len(self.items)))
+        return {term for term, count in self.term_counts.items() if count <= limit}
+
+    def clusters(self) -> List[List[str]]:
+        """
+        Item IDs grouped into contexts, largest first.
+
+        People linked by at least MIN_EDGE_WEIGHT shared items form one group;
+        each item joins the group of its most frequent participant, and items
+        sharing SEED_MIN_SHARED_TERMS distinctive subject terms are merged.
+        """
+        ignored = self.self_addresses()
+        distinctive = self.distinctive_terms()
+        forest = _UnionFind()
+
+        for key, weight in self.edges.items():
+            if weight >= MIN_EDGE_WEIGHT:
+                a, b = key.split("\t")
+                if a not in ignored and b not in ignored:
+                    forest.union("p:" + a, "p:" + b)
+
+        by_term: Dict[str, List[str]] = {}
+        for item_id, entry in self.items.items():
+            forest.find("i:" + item_id)
+            people = [p for p in entry["participants"] if p not in ignored]
+            if people:
+                anchor = max(people, key=lambda p: (self.participant_counts.get(p, 0), p))
+                forest.union("p:" + anchor, "i:" + item_id)
+            for term in entry["terms"]:
+                if term in distinctive:
+                    by_term.setdefault(term, []).append(item_id)
+
+        # Seed: items whose subjects share enough distinctive terms
+        for item_id, entry in self.items.items():
+            shared = Counter(
+                other for term in entry["terms"] if term in distinctive
+                for other in by_term.get(term, ()) if other > item_id
+            )
+            for other, count in shared.items():
+                if count >= SEED_MIN_SHARED_TERMS:
+                    forest.union("i:" + item_id, "i:" + other)
+
+        groups: Dict[str, List[str]] = {}
+        for item_id in self.items:
+            groups.setdefault(forest.find("i:" + item_id), []).append(item_id)
+        return sorted(groups.values(), key=lambda ids: (-len(ids), min(ids)))
+
+    def context_name(self, item_ids: List[str], taken: set) -> str:
+        """
+        Name a context after the subject terms most specific to it (frequent in
+        the context, rare elsewhere), else after its main participant.
+        """
+        terms = Counter(t for item_id in item_ids for t in self.items[item_id]["terms"])
+        scored = sorted(
+            ((count * count / self.term_counts[term], term) for term, count in terms.items()
+             if count >= 2 or len(item_ids) == 1),
+            reverse=True,
+        )
+        if scored:
+            spelled = {}
+            for item_id in item_ids:
+                for word in re.findall(r"[A-Za-z0-9]+", self.items[item_id]["title"]):
+                    if word.lower() not in spelled or word.isupper():
+                        spelled[word.lower()] = word
+            name = " ".join(_display_term(spelled.get(term, term)) for _, term in scored[:2])
+        else:
+            ignored = self.self_addresses()
+            people = Counter(p for item_id in item_ids for p in self.items[item_id]["participants"] if p not in ignored)
+            if people:
+                name = f"With {people.most_common(1)[0][0].partition('@')[0]}"
+            else:
+                name = self.items[item_ids[0]]["title"] or "General"
+        if name in taken:
+            name = f"{name} ({len(taken) + 1})"
+        taken.add(name)
+        return name
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"items": self.items, "edges": self.edges}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ContextGraph":
+        graph = cls()
+        graph.edges = dict(data.get("edges", {}))
+        graph.items = dict(data.get("items", {}))
+        for entry in graph.items.values():
+            for participant in entry["participants"]:
+                graph.participant_counts[participant] = graph.participant_counts.get(participant, 0) + 1
+            for term in entry["terms"]:
+                graph.term_counts[term] = graph.term_counts.get(term, 0) + 1
+        return graph
+
+
+def load_context_graph(user_id: str) -> ContextGraph:
+    """Stored graph for a user (empty if none was built yet)"""
+    graph_file = get_user_data_dir(user_id) / CONTEXT_GRAPH_FILE
+    if graph_file.exists():
+        try:
+            with open(graph_file, "r") as f:
+                return ContextGraph.from_dict(json.load(f))
+        except Exception as e:
+            print(f"Error loading context graph: {e}")
+    return ContextGraph()
+
+
+def save_context_graph(user_id: str, graph: ContextGraph) -> None:
+    user_dir = ensure_user_dir(user_id)
+    tmp_file = user_dir / (CONTEXT_GRAPH_FILE + ".tmp")
+    with open(tmp_file, "w") as f:
+        json.dump(graph.to_dict(), f)
+    os.replace(tmp_file, user_dir / CONTEXT_GRAPH_FILE)
+
+
+def update_context_graph(user_id: str, work_items: List[Dict[str, Any]], graph: Optional[ContextGraph] = None) -> Tuple[ContextGraph, Dict[str, int]]:
+    """
+    Apply a user's current (thread-aggregated) work items to their graph (the
+    stored one unless given), saving it when anything changed. Called on sync.
+    """
+    graph = graph if graph is not None else load_context_graph(user_id)
+    stats = graph.apply(work_items)
+    if stats["added"] or stats["updated"] or stats["removed"]:
+        save_context_graph(user_id, graph)
+    return graph, stats
+
+
+def build_contexts(user_id: str, graph: ContextGraph, limit: int = MAX_CONTEXTS) -> List[Dict[str, Any]]:
+    """
+    Time-independent part of a user's contexts: clusters, names and tasks, plus
+    what urgency needs (unread count, sorted meeting ends). Computed at sync time.
+
+    Returns:
+        [{"context": /api/contexts fields except urgency and deadline, "unread", "meeting_ends"}],
+        largest first; items in no multi-item cluster are only listed when there
+        are no larger clusters
+    """
+    clusters = graph.clusters()
+    multi = [ids for ids in clusters if len(ids) > 1]
+    built = []
+    taken: set = set()
+    for idx, item_ids in enumerate((multi or clusters)[:limit]):
+        entries = [graph.items[item_id] for item_id in item_ids]
+        unique_tasks = list(dict.fromkeys(entry["title"] for entry in entries if entry["title"]))
+        meeting_ends = sorted(filter(None, (
+            parse_timestamp(entry["deadline"]) for entry in entries if entry["source"] == "calendar"
+        )))
+        built.append({
+            "context": {
+                "id": f"ctx_{user_id[:8]}_{idx}",
+                "name": graph.context_name(item_ids, taken),
+                "related_items": item_ids[:5],
+                "related_items_total": len(item_ids),
+                "tasks": unique_tasks[:3],
+                "tasks_total": len(unique_tasks)
+            },
+            "unread": sum(1 for entry in entries if entry["status"] == "unread"),
+            "meeting_ends": meeting_ends,
+        })
+    return built
+
+
+class ContextViewCache:
+    """
+    Context graph and its clusters per user, applied at sync time and tagged with
+    the data fingerprint. The request path only adds urgency to the cached clusters.
+    """
+
+    def __init__(self):
+        # user_id -> (fingerprint, graph, built contexts)
+        self._views: Dict[str, Tuple[Any, ContextGraph, List[Dict[str, Any]]]] = {}
+        self.stats = {"hits": 0, "builds": 0}
+
+    def refresh(self, user_id: str, work_items: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+        """
+        Apply a user's thread-aggregated work items to their graph and re-cluster.
+
+        Returns:
+            (built contexts, graph apply stats)
+        """
+        fingerprint = get_data_fingerprint(user_id)
+        cached = self._views.get(user_id)
+        graph, stats = update_context_graph(user_id, work_items, cached[1] if cached else None)
+        built = build_contexts(user_id, graph)
+        self._views[user_id] = (fingerprint, graph, built)
+        self.stats["builds"] += 1
+        return built, stats
+
+    def get(self, user_id: str) -> Optional[List[Dict[str, Any]]]:
+        cached = self._views.get(user_id)
+        if cached and cached[0] == get_data_fingerprint(user_id):
+            self.stats["hits"] += 1
+            return cached[2]
+        return None
+
+    def invalidate_user(self, user_id: str) -> None:
+        self._views.pop(user_id, None)
+
+
+context_views = ContextViewCache()
+
+
+def _context_urgency(unread: int, meeting_ends: List[datetime], now: datetime) -> Tuple[str, str, Optional[datetime]]:
+    """
+    ("high"/"medium", nearest upcoming meeting end date or "", next change) for a
+    context. The result changes when the nearest meeting comes within
+    URGENT_WITHIN_DAYS or when it ends (the next meeting then becomes the deadline).
+    """
+    upcoming = bisect_left(meeting_ends, now)
+    deadline = meeting_ends[upcoming] if upcoming < len(meeting_ends) else None
+    urgent = unread >= 2 or (deadline is not None and (deadline - now).days < URGENT_WITHIN_DAYS)
+    changes_at = None
+    if deadline is not None:
+        crossing = deadline - timedelta(days=URGENT_WITHIN_DAYS)
+        changes_at = crossing if crossing > now else deadline
+    return ("high" if urgent else "medium"), (deadline.strftime("%Y-%m-%d") if deadline else ""), changes_at
+
+
+def detect_contexts(user_id: str, limit: int = MAX_CONTEXTS) -> List[Dict[str, Any]]:
+    """
+    A user's contexts from their synced data, in the /api/contexts format.
+    Clusters come from the graph applied at sync time (re-applied here only
+    when the data changed outside a sync); only urgency is computed per call.
+
+    Args:
+        user_id: User whose contexts to detect
+        limit: Maximum number of contexts
+
+    Returns:
+        Contexts, largest first
+    """
+    built = context_views.get(user_id)
+    if built is None:
+        built, _ = context_views.refresh(user_id, load_thread_items(user_id, use_mock_if_empty=False))
+    now = datetime.now(timezone.utc)
+
+    formatted = []
+    for context in built[:limit]:
+        urgency, deadline, changes_at = _context_urgency(context["unread"], context["meeting_ends"], now)
+        if changes_at is not None:
+            # Urgency and deadline hold until the meeting nears or ends
+            derived_cache.expire_at(changes_at.timestamp())
+        formatted.append({**context["context"], "urgency": urgency, "deadline": deadline})
+    return formatted
@@ -6,19 +6,35 @@ Provides fallback to mock data if Google sync hasn't run
 import json
 import hashlib
 from pathlib import Path
-from typing import List, Dict, Any
-from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+
+from services.user_paths import DATA_DIR, user_dir
 
 BASE_DIR = Path(__file__).parent.parent
 MOCK_DATA_PATH = BASE_DIR / "mock.json"
-DATA_DIR = BASE_DIR / "data"
+
+
+def parse_timestamp(value: str) -> Optional[datetime]:
+    """Parse an ISO 8601 or RFC 2822 (email Date header) timestamp to an aware datetime"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        try:
+            parsed = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
 
 
 def get_user_data_dir(user_id: str) -> Path:
-    """Get data directory for a specific user"""
-    user_dir = DATA_DIR / user_id
-    user_dir.mkdir(parents=True, exist_ok=True)
-    return user_dir
+    """Get data directory for a specific user (not created; writers call ensure_user_dir)"""
+    return user_dir(user_id)
 
 def get_user_calendar_file(user_id: str) -> Path:
     """Get calendar data file for a specific user"""
@@ -29,6 +45,32 @@ def get_user_email_file(user_id: str) -> Path:
     return get_user_data_dir(user_id) / "emails.json"
 
 
+def get_data_fingerprint(user_id: str) -> tuple:
+    """
+    Identify the current version of a user's data.
+    Changes whenever synced files are rewritten or the mock dataset toggles.
+    """
+    stamps = []
+    for data_file in (get_user_calendar_file(user_id), get_user_email_file(user_id)):
+        try:
+            stat = data_file.stat()
+            stamps.append((stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            stamps.append(None)
+    return (tuple(stamps), _sync_counter.get(user_id))
+
+
+def get_data_changed_at(user_id: str) -> Optional[float]:
+    """When the user's synced files were last rewritten (epoch seconds), or None without synced files"""
+    mtimes = []
+    for data_file in (get_user_calendar_file(user_id), get_user_email_file(user_id)):
+        try:
+            mtimes.append(data_file.stat().st_mtime)
+        except FileNotFoundError:
+            continue
+    return max(mtimes) if mtimes else None
+
+
 def load_google_calendar_data(user_id: str) -> List[Dict[str, Any]]:
     """Load calendar data from Google sync for a specific user"""
     try:
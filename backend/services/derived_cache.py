@@ -0,0 +1,222 @@
+"""
+Time-aware cache for derived dashboard views
+Each cached view remembers the next instant its time-dependent output could change, and
+outdated views stay available as stale snapshots for stale-while-revalidate serving
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, date, time as dt_time, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# days_until thresholds used by deadline-based priority scoring (<=1, <=3, <=7 days)
+DEADLINE_THRESHOLDS = (1, 3, 7)
+
+# Maximum number of (user, view) entries kept in memory
+MAX_ENTRIES = 10000
+
+# Fingerprint of entries invalidated with keep_stale (never matches real data)
+_INVALIDATED = object()
+
+
+def deadline_priority(days_until: int) -> int:
+    """Map days until a deadline to a priority score"""
+    if days_until <= DEADLINE_THRESHOLDS[0]:
+        return 85
+    elif days_until <= DEADLINE_THRESHOLDS[1]:
+        return 70
+    elif days_until <= DEADLINE_THRESHOLDS[2]:
+        return 60
+    return 50
+
+
+def _local_midnight(day: date) -> float:
+    """Epoch seconds of local midnight starting the given day (DST-safe)"""
+    return datetime.combine(day, dt_time.min).astimezone().timestamp()
+
+
+def next_deadline_crossing(deadlines: Iterable[str], today: Optional[date] = None) -> Optional[float]:
+    """
+    Compute when the nearest deadline threshold crossing happens.
+
+    A deadline D changes its priority when the local date reaches
+    D - 7, D - 3 or D - 1 days. Scores never change again once the
+    last threshold has been crossed.
+
+    Args:
+        deadlines: Deadline dates as YYYY-MM-DD (or ISO datetime) strings
+        today: Local date to evaluate against (defaults to today)
+
+    Returns:
+        Epoch seconds of the next change, or None if no future change exists
+    """
+    today = today or datetime.now().date()
+    nearest = None
+    for deadline in deadlines:
+        if not deadline:
+            continue
+        try:
+            deadline_day = date.fromisoformat(deadline[:10])
+        except ValueError:
+            continue
+        for threshold in DEADLINE_THRESHOLDS:
+            crossing = deadline_day - timedelta(days=threshold)
+            if crossing > today and (nearest is None or crossing < nearest):
+                nearest = crossing
+    return _local_midnight(nearest) if nearest else None
+
+
+class _Entry:
+    __slots__ = ("value", "expires_at", "fingerprint", "computed_at", "stale_since")
+
+    def __init__(self, value: Any, expires_at: Optional[float], fingerprint: Any, computed_at: float):
+        self.value = value
+        self.expires_at = expires_at
+        self.fingerprint = fingerprint
+        self.computed_at = computed_at
+        # When the value was first known to be outdated (None while current)
+        self.stale_since: Optional[float] = None
+
+
+class DerivedCache:
+    """
+    In-memory cache of derived per-user views.
+
+    Entries are dropped when the user's data fingerprint changes or when the
+    recorded expiry instant passes. Views computed inside another view's
+    computation propagate their expiry to the outer view, so composite views
+    (cognitive load, insights) expire together with the tasks they use.
+
+    Cached values are shared between requests and must not be mutated.
+    """
+
+    def __init__(self, max_entries: int = MAX_ENTRIES, clock: Callable[[], float] = time.time):
+        self._entries: "OrderedDict[Tuple[str, str], _Entry]" = OrderedDict()
+        self._max_entries = max_entries
+        self._clock = clock
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+
+    def _frames(self) -> List[Dict[str, Optional[float]]]:
+        if not hasattr(self._local, "frames"):
+            self._local.frames = []
+        return self._local.frames
+
+    def expire_at(self, instant: Optional[float]) -> None:
+        """Record that the view being computed may change at the given instant"""
+        frames = self._frames()
+        if instant is None or not frames:
+            return
+        current = frames[-1]["expires_at"]
+        if current is None or instant < current:
+            frames[-1]["expires_at"] = instant
+
+    def get_or_compute(self, user_id: str, view: str, fingerprint: Any, compute: Callable[[], Any]) -> Any:
+        """
+        Return a cached view, recomputing it if missing, stale or expired.
+
+        Args:
+            user_id: Owner of the view
+            view: View name (e.g. "tasks")
+            fingerprint: Value identifying the current version of the user's data
+            compute: Callable producing the view; may call expire_at()
+
+        Returns:
+            The view value
+        """
+        key = (user_id, view)
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.fingerprint == fingerprint and (
+                entry.expires_at is None or now < entry.expires_at
+            ):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self.expire_at(entry.expires_at)
+                return entry.value
+            self.misses += 1
+
+        frames = self._frames()
+        frames.append({"expires_at": None})
+        try:
+            value = compute()
+        finally:
+            frame = frames.pop()
+
+        entry = _Entry(value, frame["expires_at"], fingerprint, now)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+        self.expire_at(entry.expires_at)
+        return value
+
+    def peek(self, user_id: str, view: str, fingerprint: Any, changed_at: Optional[float] = None) -> Optional[Tuple[Any, float]]:
+        """
+        Last computed value of a view, current or not, without recomputing.
+
+        Args:
+            user_id: Owner of the view
+            view: View name
+            fingerprint: Current version of the user's data
+            changed_at: When the data last changed (epoch seconds), if known; an
+                outdated value is stale from then, not from when it is first read
+
+        Returns:
+            (value, staleness): seconds since the value became outdated (0.0 if
+            it is current), or None if the view was never computed
+        """
+        key = (user_id, view)
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.fingerprint == fingerprint and (entry.expires_at is None or now < entry.expires_at):
+                self.hits += 1
+                return entry.value, 0.0
+            if entry.fingerprint == fingerprint:
+                # Expired views went stale at their expiry
+                stale_since = entry.expires_at
+            else:
+                # Changed data: at the change (never before the value was computed), else when first noticed
+                stale_since = max(changed_at, entry.computed_at) if changed_at is not None else now
+            if entry.stale_since is None or stale_since < entry.stale_since:
+                entry.stale_since = stale_since
+            self.stale_hits += 1
+            return entry.value, max(0.0, now - entry.stale_since)
+
+    def invalidate_user(self, user_id: str, keep_stale: bool = False) -> None:
+        """
+        Drop every cached view for a user. With keep_stale, the views are only
+        marked outdated: they recompute on next use but peek() still serves them.
+        """
+        now = self._clock()
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == user_id]:
+                if keep_stale:
+                    entry = self._entries[key]
+                    entry.fingerprint = _INVALIDATED
+                    if entry.stale_since is None:
+                        entry.stale_since = now
+                else:
+                    del self._entries[key]
+
+    def expires_at(self, user_id: str, view: str) -> Optional[float]:
+        """Expiry instant recorded for a cached view, if any"""
+        entry = self._entries.get((user_id, view))
+        return entry.expires_at if entry else None
+
+    def stats(self) -> Dict[str, int]:
+        """Cache hit/miss counters (stale_hits: outdated values served by peek)"""
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses, "stale_hits": self.stale_hits}
+
+
+# Shared cache instance used by the API
+derived_cache = DerivedCache()
@@ -0,0 +1,195 @@
+"""
+Local embedding index for retrieval-augmented assistant answers
+Embeds sanitized work items via Ollama and stores them per user in a memory-mapped matrix
+"""
+
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+import numpy as np
+
+from services.data_loader import get_user_data_dir
+from services.user_paths import ensure_user_dir
+from services.privacy import sanitized_work_items
+
+OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434")
+OLLAMA_EMBED_MODEL = os.getenv("OLLAMA_EMBED_MODEL", "nomic-embed-text")
+
+# Number of texts sent to Ollama per embedding request
+EMBED_BATCH_SIZE = 32
+
+MATRIX_FILE = "embeddings.f32"
+META_FILE = "embeddings.json"
+
+
+def item_text(item: Dict[str, Any]) -> str:
+    """Text embedded for a sanitized work item: title plus content snippet"""
+    return f"{item.get('title', '')}\n{item.get('content', '')}".strip()
+
+
+def _text_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize rows so dot products are cosine similarities"""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32)
+
+
+def embed_texts(texts: List[str], model: str = None) -> np.ndarray:
+    """
+    Embed texts with the Ollama embeddings endpoint.
+
+    Returns:
+        float32 matrix of shape (len(texts), dim), L2-normalized
+    """
+    model = model or OLLAMA_EMBED_MODEL
+    vectors = []
+    with httpx.Client(timeout=60.0) as client:
+        for start in range(0, len(texts), EMBED_BATCH_SIZE):
+            batch = texts[start:start + EMBED_BATCH_SIZE]
+            response = client.post(f"{OLLAMA_URL}/api/embed", json={"model": model, "input": batch})
+            response.raise_for_status()
+            vectors.extend(response.json().get("embeddings", []))
+    return _normalize(np.asarray(vectors, dtype=np.float32))
+
+
+async def aembed_query(query: str, model: str = None) -> np.ndarray:
+    """Embed a single query without blocking the event loop"""
+    model = model or OLLAMA_EMBED_MODEL
+    async with httpx.AsyncClient(timeout=30.0) as client:
+        response = await client.post(f"{OLLAMA_URL}/api/embed", json={"model": model, "input": [query]})
+        response.raise_for_status()
+        return _normalize(np.asarray(response.json().get("embeddings", []), dtype=np.float32))[0]
+
+
+def _load_meta(user_id: str) -> Optional[Dict[str, Any]]:
+    meta_file = get_user_data_dir(user_id) / META_FILE
+    if not meta_file.exists():
+        return None
+    try:
+        with open(meta_file, "r") as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"Error loading embedding index metadata: {e}")
+        return None
+
+
+def _open_matrix(user_id: str, meta: Dict[str, Any]) -> Optional[np.memmap]:
+    matrix_file = get_user_data_dir(user_id) / MATRIX_FILE
+    if not meta.get("ids") or not matrix_file.exists():
+        return None
+    return np.memmap(matrix_file, dtype=np.float32, mode="r", shape=(len(meta["ids"]), meta["dim"]))
+
+
+def update_index(user_id: str, sanitized: List[Dict[str, Any]]) -> Dict[str, int]:
+    """
+    Bring a user's embedding index up to date with their (sanitized) work items.
+
+    Only items that are new or whose sanitized text changed are sent to
+    Ollama; unchanged rows are copied from the existing matrix. The new
+    matrix is written next to the old one and swapped in atomically.
+
+    Returns:
+        Counts of embedded, reused and total items
+
+    Raises:
+        ValueError: if an item still carries raw fields (not sanitized)
+    """
+    if any("participants" in item for item in sanitized):
+        # Raw work items carry the full participant list; never embed them to disk
+        raise ValueError("update_index expects sanitized work items")
+    ids = [item["id"] for item in sanitized]
+    texts = [item_text(item) for item in sanitized]
+    hashes = [_text_hash(text) for text in texts]
+
+    meta = _load_meta(user_id)
+    if meta and meta.get("model") != OLLAMA_EMBED_MODEL:
+        meta = None
+    old_rows = {}
+    old_matrix = None
+    if meta:
+        old_matrix = _open_matrix(user_id, meta)
+        old_rows = {
+            (item_id, text_hash): row
+            for row, (item_id, text_hash) in enumerate(zip(meta["ids"], meta["hashes"]))
+        }
+
+    reuse = [old_rows.get((item_id, text_hash)) for item_id, text_hash in zip(ids, hashes)]
+    missing = [i for i, row in enumerate(reuse) if row is None or old_matrix is None]
+    fresh = embed_texts([texts[i] for i in missing]) if missing else None
+
+    if fresh is not None and len(fresh):
+        dim = fresh.shape[1]
+    elif meta:
+        dim = meta["dim"]
+    else:
+        dim = 0
+
+    user_dir = ensure_user_dir(user_id)
+    tmp_matrix = user_dir / (MATRIX_FILE + ".tmp")
+    if ids and dim:
+        matrix = np.memmap(tmp_matrix, dtype=np.float32, mode="w+", shape=(len(ids), dim))
+        fresh_rows = dict(zip(missing, range(len(missing))))
+        for i, row in enumerate(reuse):
+            matrix[i] = fresh[fresh_rows[i]] if i in fresh_rows else old_matrix[row]
+        matrix.flush()
+        del matrix
+    else:
+        tmp_matrix.write_bytes(b"")
+    del old_matrix
+
+    os.replace(tmp_matrix, user_dir / MATRIX_FILE)
+    tmp_meta = user_dir / (META_FILE + ".tmp")
+    with open(tmp_meta, "w") as f:
+        json.dump({"model": OLLAMA_EMBED_MODEL, "dim": dim, "ids": ids, "hashes": hashes}, f)
+    os.replace(tmp_meta, user_dir / META_FILE)
+
+    return {"embedded": len(missing), "reused": len(ids) - len(missing), "total": len(ids)}
+
+
+def search(user_id: str, query_vector: np.ndarray, k: int = 8) -> List[Tuple[str, float]]:
+    """
+    Find the k items most similar to a query vector.
+
+    Returns:
+        List of (item_id, cosine similarity), best first
+    """
+    meta = _load_meta(user_id)
+    if not meta:
+        return []
+    matrix = _open_matrix(user_id, meta)
+    if matrix is None or matrix.shape[1] != query_vector.shape[0]:
+        return []
+    scores = matrix @ query_vector
+    k = min(k, len(scores))
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top])]
+    return [(meta["ids"][i], float(scores[i])) for i in top]
+
+
+async def retrieve_relevant_items(user_id: str, query: str, k: int = 8) -> List[Dict[str, Any]]:
+    """
+    Return the sanitized work items most relevant to a query.
+    Falls back to an empty list if the index or embedding model is unavailable.
+    """
+    try:
+        if not _load_meta(user_id):
+            return []
+        matches = search(user_id, await aembed_query(query), k)
+    except Exception as e:
+        print(f"⚠️ Embedding retrieval unavailable: {e}")
+        return []
+    if not matches:
+        return []
+    by_id = {item["id"]: item for item in sanitized_work_items(user_id, use_mock_if_empty=False)}
+    retrieved = []
+    for item_id, score in matches:
+        if item_id in by_id:
+            retrieved.append(dict(by_id[item_id], relevance_score=round(score, 4)))
+    return retrieved
@@ -0,0 +1,264 @@
+"""
+Deterministic fast path for common assistant questions
+Classifies the query into a known intent and answers from the derived views without calling the LLM
+"""
+
+import os
+import re
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from services.data_loader import parse_timestamp
+from services.prompt_packer import query_terms
+
+# Minimum confidence before a query is answered without the LLM
+FAST_PATH_THRESHOLD = float(os.getenv("ASSISTANT_FAST_PATH_THRESHOLD", "0.75"))
+
+# Words that never count against an intent ("what should I do right now")
+_FILLER = frozenset(
+    "now right currently current next day morning afternoon tonight week need get please tell show "
+    "give know think really much many most lot us ok okay hey hi there go".split()
+)
+
+# Intent -> (trigger patterns, vocabulary). A query must hit a trigger; the
+# confidence is the share of its content words the intent's vocabulary explains,
+# so "what should I focus on" is answered here but "what should I focus on for
+# the Q3 budget review" goes to the LLM.
+INTENTS: Dict[str, Tuple[Tuple[re.Pattern, ...], frozenset]] = {
+    "focus": (
+        tuple(re.compile(p) for p in (
+            r"\bfocus\b", r"\bprioriti[sz]e\b", r"\bwork on\b", r"\bwhat'?s next\b",
+            r"\btop (task|priority|priorities)\b", r"\bstart with\b", r"\bdo first\b",
+        )),
+        frozenset(
+            "focus focusing prioritize prioritise priority priorities top task tasks work working "
+            "start first important urgent do".split()
+        ),
+    ),
+    "cognitive_load": (
+        tuple(re.compile(p) for p in (
+            r"\bcognitive load\b", r"\bload\b.*\b(high|heavy|score)\b", r"\boverwhelm", r"\bstress",
+            r"\bso busy\b",
+        )),
+        frozenset(
+            "cognitive load high heavy score stressed stress overwhelmed overwhelming busy mental "
+            "feel feeling am so".split()
+        ),
+    ),
+    "meetings_today": (
+        tuple(re.compile(p) for p in (
+            r"\bmeetings?\b", r"\bcalendar\b", r"\bschedule\b", r"\bagenda\b", r"\bevents?\b",
+        )),
+        frozenset(
+            "meeting meetings calendar schedule scheduled agenda event events today tomorrow have "
+            "got upcoming on".split()
+        ),
+    ),
+    "top_contacts": (
+        tuple(re.compile(p) for p in (
+            r"\bwho\b.*\b(meet|meeting|email|emailing|talk|talking|work|working|hear)\w*\b.*\bmost\b",
+            r"\bmost (frequent|common|contacted)\b.*\b(contacts?|people|person)\b", r"\btop contacts?\b",
+        )),
+        frozenset(
+            "meet meeting meetings email emails emailing mail talk talking work working hear from most "
+            "frequent frequently common contacts contact contacted people person top am do often".split()
+        ),
+    ),
+    "productivity_issue": (
+        tuple(re.compile(p) for p in (
+            r"\bproductivity (issue|problem)s?\b", r"\bbottleneck", r"\bcontext switch", r"\bbiggest (issue|problem)\b",
+            r"\bslowing me down\b",
+        )),
+        frozenset(
+            "biggest productivity issue issues problem problems bottleneck bottlenecks context switch "
+            "switching slowing down main".split()
+        ),
+    ),
+}
+
+
+def classify_intent(query: str) -> Tuple[Optional[str], float]:
+    """
+    Map a query to a known intent.
+
+    Returns:
+        (intent, confidence in [0, 1]); intent is None when no trigger matches
+    """
+    lowered = query.lower().strip()
+    terms = query_terms(lowered) - _FILLER
+    best: Tuple[Optional[str], float] = (None, 0.0)
+    for intent, (patterns, vocabulary) in INTENTS.items():
+        if not any(p.search(lowered) for p in patterns):
+            continue
+        confidence = len(terms & vocabulary) / len(terms) if terms else 1.0
+        if confidence > best[1]:
+            best = (intent, confidence)
+    return best
+
+
+# ----------------------------------------------------------------------------
+# Templated responders
+# ----------------------------------------------------------------------------
+
+def _describe_task(task: Dict[str, Any]) -> str:
+    deadline = f", due {task['deadline']}" if task.get("deadline") else ""
+    return f"'{task.get('title')}' (score {task.get('priority_score')}{deadline})"
+
+
+def answer_focus(user_id: str, views: Dict[str, Callable]) -> str:
+    top = views["top_tasks"](user_id, k=3)["tasks"]
+    if not top:
+        return "You have no open tasks right now - a good moment for deep work on your own priorities."
+    parts = [f"Focus on {_describe_task(top[0])} first."]
+    if len(top) > 1:
+        parts.append("After that: " + ", then ".join(_describe_task(t) for t in top[1:]) + ".")
+    recommendations = views["recommendations"](user_id)
+    if recommendations:
+        parts.append(f"Tip: {recommendations[0].get('action')} - {recommendations[0].get('reason')}.")
+    return " ".join(parts)
+
+
+def answer_cognitive_load(user_id: str, views: Dict[str, Callable]) -> str:
+    load = views["cognitive_load"](user_id)
+    parts = [
+        f"Your cognitive load is {load.get('score')}/100 ({load.get('status')}) because you're juggling "
+        f"{load.get('active_contexts')} active contexts and {load.get('urgent_tasks')} urgent tasks, "
+        f"with about {load.get('switches')} context switches a day."
+    ]
+    if load.get("breakdown"):
+        parts.append(f"Breakdown: {load['breakdown']}.")
+    recommendations = views["recommendations"](user_id)
+    if recommendations:
+        parts.append(f"To bring it down: {recommendations[0].get('action')}.")
+    return " ".join(parts)
+
+
+def answer_meetings(user_id: str, views: Dict[str, Callable], query: str = "") -> str:
+    day_label = "tomorrow" if "tomorrow" in query.lower() else "today"
+    target = datetime.now().date() + timedelta(days=1 if day_label == "tomorrow" else 0)
+    meetings = []
+    all_day = []
+    for item in views["work_items"](user_id):
+        if item.get("source") != "calendar":
+            continue
+        raw_start = item.get("timestamp", "")
+        title = item.get("title", "Untitled meeting")
+        if 0 < len(raw_start) <= 10:
+            # All-day event: a calendar date (end exclusive), not a UTC instant
+            try:
+                first_day = date.fromisoformat(raw_start)
+                raw_end = item.get("deadline") or ""
+                end_day = date.fromisoformat(raw_end) if len(raw_end) == 10 else first_day + timedelta(days=1)
+            except ValueError:
+                continue
+            if first_day <= target < max(end_day, first_day + timedelta(days=1)):
+                all_day.append(title)
+            continue
+        start = parse_timestamp(raw_start)
+        if start and start.astimezone().date() == target:
+            meetings.append((start.astimezone(), title))
+    meetings.sort()
+    if not meetings and not all_day:
+        return f"You have no meetings scheduled {day_label}."
+    listed = ", ".join([f"{title} (all day)" for title in all_day] + [f"{title} at {start.strftime('%H:%M')}" for start, title in meetings])
+    count = len(meetings) + len(all_day)
+    noun = "meeting" if count == 1 else "meetings"
+    return f"You have {count} {noun} {day_label}: {listed}."
+
+
+def answer_top_contacts(user_id: str, views: Dict[str, Callable], query: str = "") -> str:
+    lowered = query.lower()
+    kind = "meetings" if "meet" in lowered else "emails" if "mail" in lowered else "all"
+    contacts = views["top_contacts"](user_id, kind=kind, limit=3)
+    activity = {"meetings": "meet with", "emails": "email with", "all": "work with"}[kind]
+    if not contacts:
+        return f"I don't see anyone you {activity} in your current data."
+
+    def count(n: int, noun: str) -> str:
+        return f"{n} {noun}" if n == 1 else f"{n} {noun}s"
+
+    def describe(contact: Dict[str, Any]) -> str:
+        who = contact.get("name") or contact.get("address")
+        if kind == "meetings":
+            return f"{who} ({count(contact['meetings'], 'meeting')})"
+        if kind == "emails":
+            return f"{who} ({count(contact['emails'], 'email')})"
+        return f"{who} ({count(contact['meetings'], 'meeting')}, {count(contact['emails'], 'email')})"
+
+    parts = [f"The person you {activity} most is {describe(contacts[0])}."]
+    if len(contacts) > 1:
+        parts.append("Next: " + ", ".join(describe(c) for c in contacts[1:]) + ".")
+    return " ".join(parts)
+
+
+def answer_productivity_issue(user_id: str, views: Dict[str, Callable]) -> str:
+    insights = views["insights"](user_id)
+    if not insights:
+        return "I don't see a clear productivity issue in your current data."
+    severity_rank = {"high": 0, "medium": 1, "low": 2}
+    worst = min(insights, key=lambda i: severity_rank.get(i.get("severity"), 3))
+    parts = [f"Your biggest issue right now: {worst.get('message')}"]
+    recommendations = views["recommendations"](user_id)
+    if recommendations:
+        parts.append(f"Recommended: {recommendations[0].get('action')} - {recommendations[0].get('reason')}.")
+    return " ".join(parts)
+
+
+class FastPathResponder:
+    """
+    Answers high-confidence common intents from the derived views.
+
+    Args:
+        views: Accessors for the user's data: "top_tasks" (user_id, k),
+            "top_contacts" (user_id, kind, limit), "cognitive_load", "insights",
+            "recommendations" and "work_items", each taking the user ID
+        threshold: Minimum classifier confidence for a fast-path answer
+    """
+
+    def __init__(self, views: Dict[str, Callable], threshold: float = FAST_PATH_THRESHOLD):
+        self.views = views
+        self.threshold = threshold
+        self.counters = {"queries": 0, "hits": 0, "below_threshold": 0, "no_intent": 0}
+        self.hits_by_intent = {intent: 0 for intent in INTENTS}
+
+    def answer(self, user_id: str, query: str) -> Optional[Dict[str, Any]]:
+        """
+        Answer a query deterministically if it is a known intent.
+
+        Returns:
+            Dict with "response", "intent" and "confidence", or None when the
+            query should go to the LLM
+        """
+        self.counters["queries"] += 1
+        intent, confidence = classify_intent(query)
+        if intent is None:
+            self.counters["no_intent"] += 1
+            return None
+        if confidence < self.threshold:
+            self.counters["below_threshold"] += 1
+            return None
+
+        if intent == "focus":
+            response = answer_focus(user_id, self.views)
+        elif intent == "cognitive_load":
+            response = answer_cognitive_load(user_id, self.views)
+        elif intent == "meetings_today":
+            response = answer_meetings(user_id, self.views, query)
+        elif intent == "top_contacts":
+            response = answer_top_contacts(user_id, self.views, query)
+        else:
+            response = answer_productivity_issue(user_id, self.views)
+
+        self.counters["hits"] += 1
+        self.hits_by_intent[intent] += 1
+        return {"response": response, "intent": intent, "confidence": round(confidence, 2)}
+
+    def metrics(self) -> Dict[str, Any]:
+        queries = self.counters["queries"]
+        return {
+            "threshold": self.threshold,
+            "counters": dict(self.counters),
+            "hits_by_intent": dict(self.hits_by_intent),
+            "hit_rate": round(self.counters["hits"] / queries, 3) if queries else 0.0,
+        }
+
@@ -6,14 +6,20 @@ Handles OAuth2 authentication and data fetching from Google APIs
 import os
 import json
 import pickle
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime, timedelta, timezone
-from typing import List, Dict, Any, Optional
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
+from typing import List, Dict, Any, Iterator, Optional, Tuple, TYPE_CHECKING
+
+from services.data_loader import get_user_data_dir, get_user_calendar_file, get_user_email_file, parse_timestamp
+from services.user_paths import ensure_user_dir, ensure_token_file, token_file
+from services.contacts import split_address_header
+
+# The Google client libraries are slow to import; they are loaded on the first
+# auth or sync call so workers that never sync don't pay for them at boot
+if TYPE_CHECKING:
+    from google.oauth2.credentials import Credentials
 
 # Google API scopes
 SCOPES = [
@@ -24,35 +30,41 @@ SCOPES = [
 # Paths
 BASE_DIR = Path(__file__).parent.parent
 CREDENTIALS_FILE = BASE_DIR / "credentials.json"
-DATA_DIR = BASE_DIR / "data"
 
-# Create data directory if it doesn't exist
-DATA_DIR.mkdir(exist_ok=True)
+# Calendars fetched in parallel per sync, and the most calendars synced per user
+CALENDAR_SYNC_WORKERS = int(os.getenv("CALENDAR_SYNC_WORKERS", "4"))
+MAX_SYNC_CALENDARS = int(os.getenv("MAX_SYNC_CALENDARS", "20"))
+
+# Partial-response masks: exactly the fields the WorkItem conversions and sync bookkeeping
+# read, so Google sends (and we decode) nothing else. benchmark_sync_payloads.py measures them.
+CALENDAR_LIST_FIELDS = "nextPageToken,items(id,summary,summaryOverride,primary,selected,deleted)"
+CALENDAR_EVENT_FIELDS = (
+    "nextPageToken,items(id,iCalUID,status,summary,description,location,hangoutLink,htmlLink,"
+    "start(dateTime,date),end(dateTime,date),attendees/email,organizer/email)"
+)
+CALENDAR_CHANNEL_FIELDS = "id,resourceId,expiration"
+GMAIL_LIST_FIELDS = "messages/id"
+GMAIL_MESSAGE_FIELDS = "id,threadId,labelIds,snippet,payload/headers(name,value)"
+GMAIL_HISTORY_FIELDS = (
+    "historyId,nextPageToken,history(messagesAdded/message/id,messagesDeleted/message/id,"
+    "labelsAdded/message(id,labelIds),labelsRemoved/message(id,labelIds))"
+)
+GMAIL_PROFILE_FIELDS = "emailAddress,historyId"
+GMAIL_WATCH_FIELDS = "historyId,expiration"
 
 def get_user_token_file(user_id: str) -> Path:
     """Get token file path for a specific user"""
-    return BASE_DIR / f"token_{user_id}.json"
-
-def get_user_data_dir(user_id: str) -> Path:
-    """Get data directory for a specific user"""
-    user_dir = DATA_DIR / user_id
-    user_dir.mkdir(parents=True, exist_ok=True)
-    return user_dir
-
-def get_user_calendar_file(user_id: str) -> Path:
-    """Get calendar data file for a specific user"""
-    return get_user_data_dir(user_id) / "calendar.json"
-
-def get_user_email_file(user_id: str) -> Path:
-    """Get email data file for a specific user"""
-    return get_user_data_dir(user_id) / "emails.json"
+    return token_file(user_id)
 
-
-def authenticate_google(user_id: str) -> Optional[Credentials]:
+def authenticate_google(user_id: str) -> Optional["Credentials"]:
     """
     Handle OAuth2 authentication for Google APIs.
     Returns authenticated credentials or None if authentication fails.
     """
+    from google.auth.transport.requests import Request
+    from google.oauth2.credentials import Credentials
+    from google_auth_oauthlib.flow import InstalledAppFlow
+    
     creds = None
     TOKEN_FILE = get_user_token_file(user_id)
     
@@ -87,6 +99,7 @@ def authenticate_google(user_id: str) -> Optional[Credentials]:
         
         # Save credentials for future use
         try:
+            TOKEN_FILE = ensure_token_file(user_id)
             with open(TOKEN_FILE, 'w') as token:
                 token.write(creds.to_json())
         except Exception as e:
@@ -95,9 +108,144 @@ def authenticate_google(user_id: str) -> Optional[Credentials]:
     return creds
 
 
+def event_to_work_item(event: Dict[str, Any], calendar: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Convert a Calendar API event (from the given calendarList entry) to a WorkItem"""
+    start = event.get('start', {}).get('dateTime', event.get('start', {}).get('date'))
+    end = event.get('end', {}).get('dateTime', event.get('end', {}).get('date'))
+    
+    # Extract attendees
+    attendees = []
+    for attendee in event.get('attendees', []):
+        email = attendee.get('email', '')
+        if email:
+            attendees.append(email)
+    
+    return {
+        "id": f"calendar_{event.get('id', '')}",
+        "source": "calendar",
+        "kind": "meeting",
+        "title": event.get('summary', 'No Title'),
+        "content": event.get('description', '')[:500] if event.get('description') else '',  # Limit content
+        "timestamp": start or datetime.now(timezone.utc).isoformat(),
+        "participants": attendees,
+        "deadline": end or start,
+        "status": "scheduled",
+        "meta": {
+            "location": event.get('location', ''),
+            "meeting_link": event.get('hangoutLink', ''),
+            "organizer": event.get('organizer', {}).get('email', ''),
+            "calendar_id": event.get('id', ''),
+            "html_link": event.get('htmlLink', ''),
+            "ical_uid": event.get('iCalUID', ''),
+            "calendar_name": (calendar or {}).get('summaryOverride') or (calendar or {}).get('summary', ''),
+            "source_calendar_id": (calendar or {}).get('id', '')
+        }
+    }
+
+
+def list_sync_calendars(service) -> List[Dict[str, Any]]:
+    """
+    Calendars to sync: the primary calendar plus every calendar the user shows
+    (selected) in Google Calendar, primary first, capped at MAX_SYNC_CALENDARS.
+    """
+    calendars = []
+    page_token = None
+    while True:
+        result = service.calendarList().list(pageToken=page_token, fields=CALENDAR_LIST_FIELDS).execute()
+        calendars.extend(result.get('items', []))
+        page_token = result.get('nextPageToken')
+        if not page_token:
+            break
+    selected = [c for c in calendars if (c.get('primary') or c.get('selected')) and not c.get('deleted')]
+    selected.sort(key=lambda c: not c.get('primary'))
+    return selected[:MAX_SYNC_CALENDARS] or [{"id": "primary", "primary": True}]
+
+
+def fetch_calendars_concurrently(creds: "Credentials", calendars: List[Dict[str, Any]], paginate: bool = False, **params: Any) -> List[Tuple[Dict[str, Any], List[Dict[str, Any]], Optional[str]]]:
+    """
+    events.list on each calendar with a bounded pool of CALENDAR_SYNC_WORKERS
+    threads (each with its own client; API clients are not thread-safe).
+    A calendar that fails is logged and reported with its error, so callers
+    can tell it apart from a calendar without events.
+    
+    Returns:
+        (calendar, events, error) triples in the order of calendars; error is None on success
+    """
+    from googleapiclient.discovery import build
+    
+    local = threading.local()
+    
+    def fetch(calendar: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        if not hasattr(local, 'service'):
+            local.service = build('calendar', 'v3', credentials=creds, cache_discovery=False)
+        events = []
+        page_token = None
+        try:
+            while True:
+                result = local.service.events().list(
+                    calendarId=calendar['id'], pageToken=page_token, fields=CALENDAR_EVENT_FIELDS, **params
+                ).execute()
+                events.extend(result.get('items', []))
+                page_token = result.get('nextPageToken')
+                if not paginate or not page_token:
+                    break
+        except Exception as e:
+            print(f"Error fetching calendar {calendar.get('summary', calendar['id'])}: {e}")
+            return [], str(e)
+        return events, None
+    
+    workers = max(1, min(CALENDAR_SYNC_WORKERS, len(calendars)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return [(calendar, events, error) for calendar, (events, error) in zip(calendars, pool.map(fetch, calendars))]
+
+
+def from_calendar(item: Dict[str, Any], calendar: Dict[str, Any]) -> bool:
+    """Whether a stored calendar WorkItem came from the given calendar (older items only carry its name)"""
+    meta = item.get('meta') or {}
+    if meta.get('source_calendar_id'):
+        return meta['source_calendar_id'] == calendar['id']
+    name = calendar.get('summaryOverride') or calendar.get('summary', '')
+    return meta.get('calendar_name', '') == name
+
+
+def event_key(item: Dict[str, Any]) -> Tuple[str, str]:
+    """
+    Identity of a calendar WorkItem across calendars: iCalUID and start (instances
+    of a recurring event share the iCalUID). Items without an iCalUID use their ID.
+    """
+    return ((item.get('meta') or {}).get('ical_uid') or item.get('id', ''), item.get('timestamp', ''))
+
+
+def merge_calendar_items(calendar_events: List[Tuple[Dict[str, Any], List[Dict[str, Any]], Optional[str]]], stored: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+    """
+    WorkItems of all calendars, each event kept once (first calendar wins), ordered by start.
+    A calendar that failed to fetch keeps its items from stored (the previous calendar file).
+    """
+    items = []
+    seen = set()
+    for calendar, events, error in calendar_events:
+        if error is not None:
+            for item in stored or []:
+                if from_calendar(item, calendar) and event_key(item) not in seen:
+                    seen.add(event_key(item))
+                    items.append(item)
+            continue
+        for event in events:
+            if event.get('status') == 'cancelled':
+                continue
+            item = event_to_work_item(event, calendar)
+            key = event_key(item)
+            if key not in seen:
+                seen.add(key)
+                items.append(item)
+    items.sort(key=_item_time)
+    return items
+
+
 def fetch_calendar_events(user_id: str, days_back: int = 7, days_forward: int = 14) -> List[Dict[str, Any]]:
     """
-    Fetch calendar events and convert to WorkItem format.
+    Fetch events of the user's selected calendars (concurrently) and convert
+    to WorkItem format. Events on several calendars are kept once (by iCalUID).
     
     Args:
         days_back: Number of days to look back
@@ -106,64 +254,40 @@ def fetch_calendar_events(user_id: str, days_back: int = 7, days_forward: int =
     Returns:
         List of calendar events in WorkItem format
     """
+    from googleapiclient.discovery import build
+    from googleapiclient.errors import HttpError
+    
     try:
         creds = authenticate_google(user_id)
         if not creds:
             return []
         
         service = build('calendar', 'v3', credentials=creds)
+        calendars = list_sync_calendars(service)
         
         # Calculate time range
         time_min = (datetime.now(timezone.utc) - timedelta(days=days_back)).isoformat()
         time_max = (datetime.now(timezone.utc) + timedelta(days=days_forward)).isoformat()
         
-        # Fetch events
-        events_result = service.events().list(
-            calendarId='primary',
+        # Fetch events of every calendar concurrently
+        calendar_events = fetch_calendars_concurrently(
+            creds,
+            calendars,
             timeMin=time_min,
             timeMax=time_max,
             maxResults=100,
             singleEvents=True,
             orderBy='startTime'
-        ).execute()
+        )
         
-        events = events_result.get('items', [])
-        
-        # Convert to WorkItem format
-        work_items = []
-        for event in events:
-            start = event.get('start', {}).get('dateTime', event.get('start', {}).get('date'))
-            end = event.get('end', {}).get('dateTime', event.get('end', {}).get('date'))
-            
-            # Extract attendees
-            attendees = []
-            for attendee in event.get('attendees', []):
-                email = attendee.get('email', '')
-                if email:
-                    attendees.append(email)
-            
-            work_item = {
-                "id": f"calendar_{event.get('id', '')}",
-                "source": "calendar",
-                "kind": "meeting",
-                "title": event.get('summary', 'No Title'),
-                "content": event.get('description', '')[:500] if event.get('description') else '',  # Limit content
-                "timestamp": start or datetime.now(timezone.utc).isoformat(),
-                "participants": attendees,
-                "deadline": end or start,
-                "status": "scheduled",
-                "meta": {
-                    "location": event.get('location', ''),
-                    "meeting_link": event.get('hangoutLink', ''),
-                    "organizer": event.get('organizer', {}).get('email', ''),
-                    "calendar_id": event.get('id', ''),
-                    "html_link": event.get('htmlLink', '')
-                }
-            }
-            work_items.append(work_item)
+        # Convert to WorkItem format; events shared between calendars are kept once
+        CALENDAR_DATA_FILE = get_user_calendar_file(user_id)
+        failed = [calendar for calendar, _, error in calendar_events if error is not None]
+        stored = _load_items(CALENDAR_DATA_FILE) if failed else []
+        work_items = merge_calendar_items(calendar_events, stored)
         
         # Save to user-specific file
-        CALENDAR_DATA_FILE = get_user_calendar_file(user_id)
+        ensure_user_dir(user_id)
         with open(CALENDAR_DATA_FILE, 'w') as f:
             json.dump(work_items, f, indent=2, default=str)
         
@@ -180,6 +304,37 @@ def fetch_calendar_events(user_id: str, days_back: int = 7, days_forward: int =
         return []
 
 
+def message_to_work_item(message: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a Gmail API message (metadata format) to a WorkItem"""
+    headers = {h['name']: h['value'] for h in message.get('payload', {}).get('headers', [])}
+    
+    # Extract participants
+    participants = []
+    if headers.get('From'):
+        participants.append(headers['From'])
+    if headers.get('To'):
+        participants.extend(split_address_header(headers['To']))
+    
+    # Get labels
+    labels = message.get('labelIds', [])
+    
+    return {
+        "id": f"email_{message.get('id', '')}",
+        "source": "email",
+        "kind": "email",
+        "title": headers.get('Subject', 'No Subject'),
+        "content": message.get('snippet', '')[:200] if message.get('snippet') else '',  # Preview only
+        "timestamp": headers.get('Date', datetime.now(timezone.utc).isoformat()),
+        "participants": participants[:10],  # Limit participants
+        "status": "unread" if "UNREAD" in labels else "read",
+        "meta": {
+            "thread_id": message.get('threadId', ''),
+            "labels": labels,
+            "message_id": message.get('id', '')
+        }
+    }
+
+
 def fetch_gmail_emails(user_id: str, max_results: int = 50, days_back: int = 7) -> List[Dict[str, Any]]:
     """
     Fetch recent email metadata (privacy-safe, no full content).
@@ -191,6 +346,9 @@ def fetch_gmail_emails(user_id: str, max_results: int = 50, days_back: int = 7)
     Returns:
         List of emails in WorkItem format
     """
+    from googleapiclient.discovery import build
+    from googleapiclient.errors import HttpError
+    
     try:
         creds = authenticate_google(user_id)
         if not creds:
@@ -206,7 +364,8 @@ def fetch_gmail_emails(user_id: str, max_results: int = 50, days_back: int = 7)
         results = service.users().messages().list(
             userId='me',
             maxResults=max_results,
-            q=query
+            q=query,
+            fields=GMAIL_LIST_FIELDS
         ).execute()
         
         messages = results.get('messages', [])
@@ -219,43 +378,18 @@ def fetch_gmail_emails(user_id: str, max_results: int = 50, days_back: int = 7)
                     userId='me',
                     id=msg['id'],
                     format='metadata',
-                    metadataHeaders=['Subject', 'From', 'To', 'Date']
+                    metadataHeaders=['Subject', 'From', 'To', 'Date'],
+                    fields=GMAIL_MESSAGE_FIELDS
                 ).execute()
                 
-                headers = {h['name']: h['value'] for h in message.get('payload', {}).get('headers', [])}
-                
-                # Extract participants
-                participants = []
-                if headers.get('From'):
-                    participants.append(headers['From'])
-                if headers.get('To'):
-                    participants.extend([p.strip() for p in headers['To'].split(',')])
-                
-                # Get labels
-                labels = message.get('labelIds', [])
-                
-                work_item = {
-                    "id": f"email_{message.get('id', '')}",
-                    "source": "email",
-                    "kind": "email",
-                    "title": headers.get('Subject', 'No Subject'),
-                    "content": message.get('snippet', '')[:200] if message.get('snippet') else '',  # Preview only
-                    "timestamp": headers.get('Date', datetime.now(timezone.utc).isoformat()),
-                    "participants": participants[:10],  # Limit participants
-                    "status": "unread" if "UNREAD" in labels else "read",
-                    "meta": {
-                        "thread_id": message.get('threadId', ''),
-                        "labels": labels,
-                        "message_id": message.get('id', '')
-                    }
-                }
-                work_items.append(work_item)
+                work_items.append(message_to_work_item(message))
                 
             except Exception as e:
                 print(f"Error processing email {msg.get('id')}: {e}")
                 continue
         
         # Save to user-specific file
+        ensure_user_dir(user_id)
         EMAIL_DATA_FILE = get_user_email_file(user_id)
         with open(EMAIL_DATA_FILE, 'w') as f:
             json.dump(work_items, f, indent=2, default=str)
@@ -273,6 +407,329 @@ def fetch_gmail_emails(user_id: str, max_results: int = 50, days_back: int = 7)
         return []
 
 
+class GoogleNotConnectedError(Exception):
+    """Raised when a background sync runs for a user without a usable Google token"""
+
+
+def load_credentials(user_id: str) -> "Credentials":
+    """
+    Saved credentials for background (push-triggered) syncs, refreshed if
+    expired. Never starts the interactive OAuth flow.
+    
+    Raises:
+        GoogleNotConnectedError: If the user has no token or it cannot be refreshed
+    """
+    from google.auth.transport.requests import Request
+    from google.oauth2.credentials import Credentials
+    
+    TOKEN_FILE = get_user_token_file(user_id)
+    if not TOKEN_FILE.exists():
+        raise GoogleNotConnectedError("Google account not connected")
+    creds = Credentials.from_authorized_user_file(str(TOKEN_FILE), SCOPES)
+    if not creds.valid:
+        if not (creds.expired and creds.refresh_token):
+            raise GoogleNotConnectedError("Google token is invalid; reconnect the account")
+        try:
+            creds.refresh(Request())
+        except Exception as e:
+            raise GoogleNotConnectedError(f"Google token refresh failed: {e}")
+        with open(TOKEN_FILE, 'w') as token:
+            token.write(creds.to_json())
+    return creds
+
+
+def _service(user_id: str, api: str, version: str):
+    from googleapiclient.discovery import build
+    return build(api, version, credentials=load_credentials(user_id), cache_discovery=False)
+
+
+def _load_items(path: Path) -> List[Dict[str, Any]]:
+    if not path.exists():
+        return []
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def _save_items(user_id: str, path: Path, items: List[Dict[str, Any]]) -> None:
+    ensure_user_dir(user_id)
+    tmp_file = path.with_suffix(".tmp")
+    with open(tmp_file, 'w') as f:
+        json.dump(items, f, indent=2, default=str)
+    os.replace(tmp_file, path)
+
+
+def _item_time(item: Dict[str, Any]) -> datetime:
+    return parse_timestamp(item.get('timestamp', '')) or datetime.min.replace(tzinfo=timezone.utc)
+
+
+def sync_calendar_changes(user_id: str, updated_min: str, days_back: int = 7, days_forward: int = 14) -> Dict[str, Any]:
+    """
+    Apply events changed since updated_min on any synced calendar to the user's
+    calendar file. Cancelled events are removed; events that left the sync
+    window are dropped; events already stored from another calendar are kept once.
+    
+    Args:
+        updated_min: RFC 3339 time of the previous sync (overlap it slightly for clock skew)
+    
+    Returns:
+        {"updated", "removed", "events", "calendars"} counts and "failed" (names of
+        calendars that could not be fetched; their changes are not applied, so the
+        caller must not advance its updatedMin past this sync)
+    """
+    from googleapiclient.discovery import build
+    
+    creds = load_credentials(user_id)
+    calendars = list_sync_calendars(build('calendar', 'v3', credentials=creds, cache_discovery=False))
+    window_start = datetime.now(timezone.utc) - timedelta(days=days_back)
+    calendar_events = fetch_calendars_concurrently(
+        creds,
+        calendars,
+        paginate=True,
+        timeMin=window_start.isoformat(),
+        timeMax=(datetime.now(timezone.utc) + timedelta(days=days_forward)).isoformat(),
+        updatedMin=updated_min,
+        showDeleted=True,
+        singleEvents=True,
+        maxResults=250
+    )
+    
+    CALENDAR_DATA_FILE = get_user_calendar_file(user_id)
+    items = {item['id']: item for item in _load_items(CALENDAR_DATA_FILE)}
+    updated = removed = 0
+    for _, events, _ in calendar_events:
+        for event in events:
+            if event.get('status') == 'cancelled':
+                removed += items.pop(f"calendar_{event.get('id', '')}", None) is not None
+    keys = {event_key(item): item_id for item_id, item in items.items()}
+    for calendar, events, _ in calendar_events:
+        for event in events:
+            if event.get('status') == 'cancelled':
+                continue
+            item = event_to_work_item(event, calendar)
+            if keys.setdefault(event_key(item), item['id']) != item['id']:
+                continue
+            items[item['id']] = item
+            updated += 1
+    
+    kept = [
+        item for item in items.values()
+        if (parse_timestamp(item.get('deadline') or item.get('timestamp', '')) or window_start) >= window_start
+    ]
+    kept.sort(key=_item_time)
+    if updated or removed or len(kept) != len(items):
+        _save_items(user_id, CALENDAR_DATA_FILE, kept)
+    failed = [calendar.get('summary', calendar['id']) for calendar, _, error in calendar_events if error is not None]
+    return {"updated": updated, "removed": removed, "events": len(kept), "calendars": len(calendars), "failed": failed}
+
+
+def gmail_profile(user_id: str) -> Dict[str, Any]:
+    """The user's Gmail address and current mailbox historyId"""
+    return _service(user_id, 'gmail', 'v1').users().getProfile(userId='me', fields=GMAIL_PROFILE_FIELDS).execute()
+
+
+def sync_gmail_history(user_id: str, start_history_id: str, max_results: int = 50, days_back: int = 7) -> Dict[str, Any]:
+    """
+    Apply Gmail history since start_history_id to the user's email file:
+    new messages are fetched (metadata only), label changes update read state
+    and deleted messages are removed. Falls back to a full fetch when the
+    history ID is too old for Gmail to serve.
+    
+    Returns:
+        {"history_id", "added", "updated", "removed", "emails", "full_resync"}
+    """
+    from googleapiclient.errors import HttpError
+    
+    service = _service(user_id, 'gmail', 'v1')
+    records = []
+    history_id = start_history_id
+    page_token = None
+    try:
+        while True:
+            result = service.users().history().list(
+                userId='me',
+                startHistoryId=start_history_id,
+                historyTypes=['messageAdded', 'messageDeleted', 'labelAdded', 'labelRemoved'],
+                pageToken=page_token,
+                fields=GMAIL_HISTORY_FIELDS
+            ).execute()
+            records.extend(result.get('history', []))
+            history_id = result.get('historyId', history_id)
+            page_token = result.get('nextPageToken')
+            if not page_token:
+                break
+    except HttpError as e:
+        if e.resp.status != 404:
+            raise
+        # History expired (about a week); resynchronize from scratch
+        history_id = gmail_profile(user_id).get('historyId')
+        emails = fetch_gmail_emails(user_id, max_results=max_results, days_back=days_back)
+        return {"history_id": history_id, "added": len(emails), "updated": 0, "removed": 0, "emails": len(emails), "full_resync": True}
+    
+    # Net effect per message, in history order
+    added: Dict[str, bool] = {}
+    labels: Dict[str, List[str]] = {}
+    deleted = set()
+    for record in records:
+        for entry in record.get('messagesAdded', []):
+            message = entry.get('message', {})
+            added[message.get('id')] = True
+            deleted.discard(message.get('id'))
+        for entry in record.get('labelsAdded', []) + record.get('labelsRemoved', []):
+            message = entry.get('message', {})
+            labels[message.get('id')] = message.get('labelIds', [])
+        for entry in record.get('messagesDeleted', []):
+            deleted.add(entry.get('message', {}).get('id'))
+    
+    EMAIL_DATA_FILE = get_user_email_file(user_id)
+    items = {item['id']: item for item in _load_items(EMAIL_DATA_FILE)}
+    counts = {"added": 0, "updated": 0, "removed": 0}
+    for message_id in deleted:
+        counts["removed"] += items.pop(f"email_{message_id}", None) is not None
+    for message_id in added:
+        if message_id in deleted or f"email_{message_id}" in items:
+            continue
+        try:
+            message = service.users().messages().get(
+                userId='me',
+                id=message_id,
+                format='metadata',
+                metadataHeaders=['Subject', 'From', 'To', 'Date'],
+                fields=GMAIL_MESSAGE_FIELDS
+            ).execute()
+        except HttpError as e:
+            print(f"Error processing email {message_id}: {e}")
+            continue
+        if 'DRAFT' in message.get('labelIds', []):
+            continue
+        items[f"email_{message_id}"] = message_to_work_item(message)
+        counts["added"] += 1
+    for message_id, label_ids in labels.items():
+        item = items.get(f"email_{message_id}")
+        if item is None or message_id in added:
+            continue
+        item["status"] = "unread" if "UNREAD" in label_ids else "read"
+        item.setdefault("meta", {})["labels"] = label_ids
+        counts["updated"] += 1
+    
+    # Same window as a full fetch: the newest max_results messages of the last days_back days
+    cutoff = datetime.now(timezone.utc) - timedelta(days=days_back)
+    kept = sorted((item for item in items.values() if _item_time(item) >= cutoff), key=_item_time, reverse=True)[:max_results]
+    if any(counts.values()) or len(kept) != len(items):
+        _save_items(user_id, EMAIL_DATA_FILE, kept)
+    return {"history_id": history_id, **counts, "emails": len(kept), "full_resync": False}
+
+
+def sync_calendar_ids(user_id: str) -> List[str]:
+    """IDs of the calendars a sync covers (see list_sync_calendars)"""
+    return [calendar['id'] for calendar in list_sync_calendars(_service(user_id, 'calendar', 'v3'))]
+
+
+def watch_calendar(user_id: str, calendar_id: str, channel_id: str, address: str, token: str, ttl_seconds: int) -> Dict[str, Any]:
+    """
+    Open a Calendar events.watch channel on one calendar (one channel per synced calendar).
+    
+    Returns:
+        Channel resource ({"id", "resourceId", "expiration" (epoch ms), ...})
+    """
+    return _service(user_id, 'calendar', 'v3').events().watch(
+        calendarId=calendar_id,
+        body={
+            "id": channel_id,
+            "type": "web_hook",
+            "address": address,
+            "token": token,
+            "params": {"ttl": str(ttl_seconds)}
+        },
+        fields=CALENDAR_CHANNEL_FIELDS
+    ).execute()
+
+
+def stop_calendar_channel(user_id: str, channel_id: str, resource_id: str) -> None:
+    """Close a Calendar watch channel (renewed channels are replaced, not extended)"""
+    _service(user_id, 'calendar', 'v3').channels().stop(
+        body={"id": channel_id, "resourceId": resource_id}
+    ).execute()
+
+
+def watch_gmail(user_id: str, topic: str) -> Dict[str, Any]:
+    """
+    Ask Gmail to publish mailbox changes to a Pub/Sub topic (must be re-issued within 7 days).
+    
+    Returns:
+        {"historyId", "expiration" (epoch ms)}
+    """
+    return _service(user_id, 'gmail', 'v1').users().watch(
+        userId='me',
+        body={"topicName": topic},
+        fields=GMAIL_WATCH_FIELDS
+    ).execute()
+
+
+def stop_gmail_watch(user_id: str) -> None:
+    """Stop Gmail push notifications for the user's mailbox"""
+    _service(user_id, 'gmail', 'v1').users().stop(userId='me').execute()
+
+
+def refresh_derived_data(user_id: str) -> List[str]:
+    """
+    Rebuild everything derived from a user's synced files: thread views,
+    contacts, context graph, sanitized views, search and embedding indexes.
+    Run after every full or incremental sync.
+    
+    Returns:
+        Errors of steps that failed (the remaining steps still run)
+    """
+    errors = []
+    
+    from services.data_loader import load_work_items
+    synced_items = load_work_items(user_id, use_mock_if_empty=False)
+    
+    # Collapse email threads; only threads with new or changed messages are re-merged
+    from services.threads import thread_views, load_thread_items
+    thread_items = thread_views.refresh(user_id, synced_items, use_mock_if_empty=False)
+    load_thread_items(user_id)
+    
+    # Contact index for "who do I meet most" / "everything from X" queries
+    from services.contacts import contact_views
+    contact_views.refresh(user_id, synced_items or load_work_items(user_id, use_mock_if_empty=True))
+    
+    # Apply new and changed threads to the participant graph and re-cluster it for context detection
+    try:
+        from services.context_graph import context_views
+        _, graph_stats = context_views.refresh(user_id, thread_items)
+        print(f"🕸️ Context graph for {user_id[:8]}...: {graph_stats}")
+    except Exception as e:
+        errors.append(f"Context graph update failed: {str(e)}")
+    
+    # Precompute sanitized views so the assistant never sanitizes on the request path
+    from services.privacy import sanitized_views, sanitized_work_items
+    sanitized_items = sanitized_views.refresh(user_id, thread_items, use_mock_if_empty=False)
+    sanitized_work_items(user_id)
+    
+    # Refresh the full-text search index incrementally
+    try:
+        from services.search_index import update_search_index
+        search_stats = update_search_index(user_id, synced_items)
+        print(f"🔎 Search index for {user_id[:8]}...: {search_stats}")
+    except Exception as e:
+        errors.append(f"Search index update failed: {str(e)}")
+    
+    # Refresh the embedding index; unchanged items reuse their vectors
+    try:
+        from services.embedding_index import update_index
+        index_stats = update_index(user_id, sanitized_items)
+        print(f"🧭 Embedding index for {user_id[:8]}...: {index_stats}")
+    except Exception as e:
+        print(f"⚠️ Embedding index update skipped: {e}")
+    
+    # Mark derived views computed from the previous data outdated; the dashboard
+    # serves them stale (within limits) while it recomputes
+    from services.derived_cache import derived_cache
+    derived_cache.invalidate_user(user_id, keep_stale=True)
+    
+    return errors
+
+
 def sync_all_google_data(user_id: str) -> Dict[str, Any]:
     """
     Orchestrate all Google data fetches in one call.
@@ -306,6 +763,8 @@ def sync_all_google_data(user_id: str) -> Dict[str, Any]:
         except Exception as e:
             errors.append(f"Email sync failed: {str(e)}")
         
+        errors.extend(refresh_derived_data(user_id))
+        
         return {
             "status": "success" if not errors else "partial",
             "synced": {
@@ -339,6 +798,10 @@ def disconnect_google(user_id: str) -> Dict[str, Any]:
         Status of disconnection operation
     """
     try:
+        # Stop push channels while the token can still authorize it
+        from services.push_sync import unregister_push
+        unregister_push(user_id)
+        
         TOKEN_FILE = get_user_token_file(user_id)
         CALENDAR_DATA_FILE = get_user_calendar_file(user_id)
         EMAIL_DATA_FILE = get_user_email_file(user_id)
@@ -373,6 +836,35 @@ def disconnect_google(user_id: str) -> Dict[str, Any]:
             except Exception as e:
                 print(f"Warning: Failed to delete email data: {e}")
         
+        # The context graph holds participant addresses from the deleted data
+        from services.context_graph import CONTEXT_GRAPH_FILE
+        (get_user_data_dir(user_id) / CONTEXT_GRAPH_FILE).unlink(missing_ok=True)
+        
+        # The search index stores the full text of every synced item (plus its SQLite WAL files)
+        from services.search_index import SEARCH_DB_FILE
+        for suffix in ("", "-wal", "-shm"):
+            (get_user_data_dir(user_id) / (SEARCH_DB_FILE + suffix)).unlink(missing_ok=True)
+        
+        # The stored briefing summarizes the deleted items
+        from services.briefings import BRIEFING_FILE
+        (get_user_data_dir(user_id) / BRIEFING_FILE).unlink(missing_ok=True)
+        
+        # The embedding index is derived from the deleted items' titles and snippets
+        from services.embedding_index import MATRIX_FILE, META_FILE
+        for name in (MATRIX_FILE, META_FILE):
+            (get_user_data_dir(user_id) / name).unlink(missing_ok=True)
+        
+        from services.derived_cache import derived_cache
+        from services.privacy import sanitized_views
+        from services.threads import thread_views
+        from services.contacts import contact_views
+        from services.context_graph import context_views
+        derived_cache.invalidate_user(user_id)
+        sanitized_views.invalidate_user(user_id)
+        thread_views.invalidate_user(user_id)
+        contact_views.invalidate_user(user_id)
+        context_views.invalidate_user(user_id)
+        
         return {
             "status": "success",
             "message": "Google account disconnected successfully",
@@ -411,9 +903,21 @@ def get_sync_status(user_id: str) -> Dict[str, Any]:
         except:
             pass
     
+    from services.push_sync import push_status
+    
     return {
         "connected": connected,
         "last_sync": last_sync,
         "has_calendar_data": CALENDAR_DATA_FILE.exists(),
-        "has_email_data": EMAIL_DATA_FILE.exists()
+        "has_email_data": EMAIL_DATA_FILE.exists(),
+        "push": push_status(user_id)
     }
+
+
+def sync_status_records(user_id: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Sync status as (type, data) records for NDJSON: the connection, then one per push source"""
+    status = get_sync_status(user_id)
+    push = status.pop("push")
+    yield "status", status
+    for source, source_status in push.items():
+        yield "push", {"source": source, **source_status}
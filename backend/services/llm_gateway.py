@@ -0,0 +1,246 @@
+"""
+Async gateway in front of the Ollama client
+Bounded concurrency, fair per-user queuing with priorities, admission control and metrics
+"""
+
+import asyncio
+import math
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+# Interactive requests (the chat panel) vs. background work (precomputed briefings)
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+
+# How often a waiting or running request checks whether its client went away
+DISCONNECT_POLL_SECONDS = 0.5
+
+
+class QueueFullError(Exception):
+    """Raised when a request is rejected by admission control"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class _Timings:
+    """Rolling window of durations for percentile reporting"""
+
+    def __init__(self, window: int = 500):
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.total = 0.0
+        self.count = 0
+
+    def add(self, seconds: float) -> None:
+        self.samples.append(seconds)
+        self.total += seconds
+        self.count += 1
+
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def summary(self) -> Dict[str, float]:
+        ordered = sorted(self.samples)
+
+        def pct(p: float) -> float:
+            if not ordered:
+                return 0.0
+            return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+        return {
+            "count": self.count,
+            "mean_ms": round(self.mean() * 1000, 1),
+            "p50_ms": round(pct(0.50) * 1000, 1),
+            "p95_ms": round(pct(0.95) * 1000, 1),
+            "max_ms": round((ordered[-1] if ordered else 0.0) * 1000, 1),
+        }
+
+
+class LLMGateway:
+    """
+    Limits concurrent LLM generations and queues the rest fairly.
+
+    Waiting requests are grouped by priority (lower runs first) and, within
+    a priority, served round-robin across users so one user's burst cannot
+    starve everyone else. New requests are rejected with a Retry-After
+    estimate once the global or per-user queue is full.
+    """
+
+    def __init__(self, max_concurrency: int = 2, max_queue_depth: int = 32, max_queue_per_user: int = 4):
+        self.max_concurrency = max_concurrency
+        self.max_queue_depth = max_queue_depth
+        self.max_queue_per_user = max_queue_per_user
+        self._running = 0
+        self._queued = 0
+        # priority -> user_id -> waiting futures (user order is the round-robin order)
+        self._waiting: Dict[int, "OrderedDict[str, Deque[asyncio.Future]]"] = {}
+        self._queued_per_user: Dict[str, int] = {}
+        self.queue_wait = _Timings()
+        self.generation = _Timings()
+        self.counters = {"admitted": 0, "rejected": 0, "cancelled": 0, "completed": 0, "failed": 0}
+
+    # ------------------------------------------------------------------
+    # Slot management
+    # ------------------------------------------------------------------
+
+    def _retry_after(self) -> int:
+        """Seconds until a queued request would likely get a slot"""
+        per_request = self.generation.mean() or 10.0
+        return max(1, math.ceil(per_request * (self._queued + 1) / self.max_concurrency))
+
+    def _dispatch(self) -> None:
+        """Hand free slots to waiters: best priority first, round-robin across users"""
+        while self._running < self.max_concurrency and self._waiting:
+            priority = min(self._waiting)
+            users = self._waiting[priority]
+            user_id, waiters = next(iter(users.items()))
+            future = waiters.popleft()
+            # Rotate the user to the back of this priority's round
+            users.move_to_end(user_id)
+            if not waiters:
+                del users[user_id]
+            if not users:
+                del self._waiting[priority]
+            self._dequeued(user_id)
+            if future.done():
+                continue
+            self._running += 1
+            future.set_result(None)
+
+    def _dequeued(self, user_id: str) -> None:
+        self._queued -= 1
+        remaining = self._queued_per_user.get(user_id, 1) - 1
+        if remaining:
+            self._queued_per_user[user_id] = remaining
+        else:
+            self._queued_per_user.pop(user_id, None)
+
+    def _remove_waiter(self, user_id: str, priority: int, future: asyncio.Future) -> None:
+        users = self._waiting.get(priority)
+        if not users or user_id not in users:
+            return
+        try:
+            users[user_id].remove(future)
+        except ValueError:
+            return
+        if not users[user_id]:
+            del users[user_id]
+        if not users:
+            del self._waiting[priority]
+        self._dequeued(user_id)
+
+    async def _acquire(self, user_id: str, priority: int) -> None:
+        if self._running < self.max_concurrency and not self._waiting:
+            self._running += 1
+            return
+        if self._queued >= self.max_queue_depth:
+            self.counters["rejected"] += 1
+            raise QueueFullError("Assistant is busy, please retry shortly", self._retry_after())
+        if self._queued_per_user.get(user_id, 0) >= self.max_queue_per_user:
+            self.counters["rejected"] += 1
+            raise QueueFullError("Too many pending assistant requests for this user", self._retry_after())
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiting.setdefault(priority, OrderedDict()).setdefault(user_id, deque()).append(future)
+        self._queued += 1
+        self._queued_per_user[user_id] = self._queued_per_user.get(user_id, 0) + 1
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Slot was granted just before cancellation: give it back
+                self._release()
+            else:
+                self._remove_waiter(user_id, priority, future)
+            raise
+
+    def _release(self) -> None:
+        self._running -= 1
+        self._dispatch()
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    async def run(
+        self,
+        user_id: str,
+        generate: Callable[[], Awaitable[Any]],
+        priority: int = PRIORITY_INTERACTIVE,
+        is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+    ) -> Any:
+        """
+        Run a generation through the gateway.
+
+        Args:
+            user_id: User the request belongs to (fairness key)
+            generate: Zero-argument coroutine factory doing the LLM call
+            priority: Lower values are served first
+            is_disconnected: Optional coroutine (e.g. Request.is_disconnected);
+                when it returns True the request is cancelled, queued or running
+
+        Raises:
+            QueueFullError: If admission control rejects the request
+            asyncio.CancelledError: If the client disconnected
+        """
+        task = asyncio.ensure_future(self._run(user_id, generate, priority))
+        if is_disconnected is None:
+            return await task
+        try:
+            while True:
+                done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_SECONDS)
+                if done:
+                    return task.result()
+                if await is_disconnected():
+                    self.counters["cancelled"] += 1
+                    raise asyncio.CancelledError("Client disconnected")
+        finally:
+            # Covers disconnects and callers cancelling us (e.g. a timeout)
+            if not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+
+    async def _run(self, user_id: str, generate: Callable[[], Awaitable[Any]], priority: int) -> Any:
+        enqueued = time.perf_counter()
+        await self._acquire(user_id, priority)
+        self.counters["admitted"] += 1
+        started = time.perf_counter()
+        self.queue_wait.add(started - enqueued)
+        try:
+            result = await generate()
+            self.counters["completed"] += 1
+            return result
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.counters["failed"] += 1
+            raise
+        finally:
+            self.generation.add(time.perf_counter() - started)
+            self._release()
+
+    def metrics(self) -> Dict[str, Any]:
+        """Queue depth, counters and queue-wait vs. generation timings"""
+        return {
+            "running": self._running,
+            "queued": self._queued,
+            "max_concurrency": self.max_concurrency,
+            "max_queue_depth": self.max_queue_depth,
+            "counters": dict(self.counters),
+            "queue_wait": self.queue_wait.summary(),
+            "generation": self.generation.summary(),
+        }
+
+
+# Shared gateway used by the API
+llm_gateway = LLMGateway(
+    max_concurrency=int(os.getenv("OLLAMA_MAX_CONCURRENCY", "2")),
+    max_queue_depth=int(os.getenv("OLLAMA_MAX_QUEUE", "32")),
+    max_queue_per_user=int(os.getenv("OLLAMA_MAX_QUEUE_PER_USER", "4")),
+)
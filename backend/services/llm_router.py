@@ -0,0 +1,127 @@
+"""
+Model routing for the assistant
+Routes simple queries to a small model, keeps models warm and falls back to a
+deterministic template answer when the latency SLO is breached
+"""
+
+import asyncio
+import os
+from typing import Any, Dict, List
+
+import httpx
+
+OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434")
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "qwen2.5:3b-instruct")
+
+# Optional smaller model (and server) for short, simple questions
+OLLAMA_SMALL_MODEL = os.getenv("OLLAMA_SMALL_MODEL", OLLAMA_MODEL)
+OLLAMA_SMALL_URL = os.getenv("OLLAMA_SMALL_URL", OLLAMA_URL)
+
+# End-to-end latency budget (queue + generation) before answering from the template
+LLM_LATENCY_SLO_SECONDS = float(os.getenv("LLM_LATENCY_SLO_SECONDS", "45"))
+
+# Keep-alive pings: how often, and how long Ollama should keep the model loaded
+KEEP_WARM_INTERVAL_SECONDS = float(os.getenv("OLLAMA_KEEP_WARM_INTERVAL", "240"))
+KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "10m")
+
+# Queries longer than this, or containing a reasoning marker, go to the large model
+SMALL_QUERY_MAX_WORDS = 12
+COMPLEX_MARKERS = ("why", "explain", "compare", "plan", "analy", "summar", "strategy", "trade-off", "tradeoff")
+
+
+class ModelRoute:
+    """An Ollama server + model pair"""
+
+    def __init__(self, name: str, url: str, model: str):
+        self.name = name
+        self.url = url
+        self.model = model
+        self.warm = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"name": self.name, "url": self.url, "model": self.model, "warm": self.warm}
+
+
+class LLMRouter:
+    """Chooses a model per query and keeps the configured models loaded"""
+
+    def __init__(self, small: ModelRoute, large: ModelRoute, slo_seconds: float = LLM_LATENCY_SLO_SECONDS):
+        self.small = small
+        self.large = large
+        self.slo_seconds = slo_seconds
+        self.counters = {"small": 0, "large": 0, "fallback_timeout": 0, "fallback_error": 0}
+
+    def routes(self) -> List[ModelRoute]:
+        """Distinct routes (small and large may be the same model)"""
+        if (self.small.url, self.small.model) == (self.large.url, self.large.model):
+            return [self.large]
+        return [self.small, self.large]
+
+    def choose(self, query: str) -> ModelRoute:
+        """Pick the small model for short, simple queries and the large one otherwise"""
+        lowered = query.lower()
+        simple = len(query.split()) <= SMALL_QUERY_MAX_WORDS and not any(m in lowered for m in COMPLEX_MARKERS)
+        route = self.small if simple and len(self.routes()) > 1 else self.large
+        self.counters[route.name] += 1
+        return route
+
+    async def ping(self, route: ModelRoute) -> bool:
+        """Ask Ollama to load the model (empty prompt) and keep it resident"""
+        payload = {"model": route.model, "prompt": "", "keep_alive": KEEP_ALIVE, "stream": False}
+        try:
+            async with httpx.AsyncClient(timeout=120.0) as client:
+                response = await client.post(f"{route.url}/api/generate", json=payload)
+                response.raise_for_status()
+            route.warm = True
+        except Exception as e:
+            route.warm = False
+            print(f"⚠️ Keep-warm ping failed for {route.model}: {e}")
+        return route.warm
+
+    async def keep_warm(self) -> None:
+        """Ping every route periodically; runs for the application's lifetime"""
+        if KEEP_WARM_INTERVAL_SECONDS <= 0:
+            return
+        while True:
+            await asyncio.gather(*(self.ping(route) for route in self.routes()))
+            await asyncio.sleep(KEEP_WARM_INTERVAL_SECONDS)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "routes": [route.to_dict() for route in self.routes()],
+            "slo_seconds": self.slo_seconds,
+            "counters": dict(self.counters),
+        }
+
+
+def fallback_answer(
+    recommendations: List[Dict[str, Any]],
+    top_tasks: List[Dict[str, Any]],
+    cognitive_load: Dict[str, Any],
+) -> str:
+    """
+    Deterministic answer built from the recommendation pipeline output.
+    Used when the model is too slow or unavailable.
+    """
+    parts = []
+    if top_tasks:
+        task = top_tasks[0]
+        deadline = f", due {task['deadline']}" if task.get("deadline") else ""
+        parts.append(f"Your top priority is '{task.get('title')}' (score {task.get('priority_score')}{deadline}).")
+    if cognitive_load:
+        parts.append(
+            f"Your cognitive load is {cognitive_load.get('score')}/100 ({cognitive_load.get('status')}) "
+            f"across {cognitive_load.get('active_contexts')} contexts with {cognitive_load.get('urgent_tasks')} urgent tasks."
+        )
+    for rec in recommendations[:2]:
+        parts.append(f"Recommended: {rec.get('action')} - {rec.get('reason')}.")
+    if not parts:
+        return "I couldn't reach the assistant model right now and there's no work data to summarize yet."
+    return " ".join(parts)
+
+
+# Shared router used by the API
+llm_router = LLMRouter(
+    small=ModelRoute("small", OLLAMA_SMALL_URL, OLLAMA_SMALL_MODEL),
+    large=ModelRoute("large", OLLAMA_URL, OLLAMA_MODEL),
+)
@@ -0,0 +1,252 @@
+"""
+Cognitive load time series
+Stores each recomputed score per user in fixed-width binary records: a ring buffer of raw
+points plus append-only hourly and daily rollups, with range reads in O(log n + points)
+"""
+
+import os
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from services.data_loader import get_user_data_dir
+
+# Raw points kept per user (16 bytes each; older points live on in the rollups)
+RAW_CAPACITY = int(os.getenv("LOAD_HISTORY_RAW_POINTS", "4096"))
+
+RAW_FILE = "load_raw.bin"
+ROLLUP_FILES = {"hourly": "load_hourly.bin", "daily": "load_daily.bin"}
+ROLLUP_SECONDS = {"hourly": 3600, "daily": 86400}
+RESOLUTIONS = ("raw", "hourly", "daily")
+
+# Ring header: capacity, points written in total
+_HEADER = struct.Struct("<IQ")
+# Raw point: epoch seconds, score, active contexts, urgent tasks, switches
+_RAW = struct.Struct("<d4H")
+# Rollup bucket: bucket start (UTC), score sum, point count, min score, max score
+_ROLLUP = struct.Struct("<dIIBBxx")
+
+_lock = threading.Lock()
+
+
+def _clamp(value: Any, limit: int) -> int:
+    return max(0, min(limit, int(value or 0)))
+
+
+class LoadHistory:
+    """
+    Cognitive load series for one user directory.
+
+    Points must arrive in time order (append() clamps earlier timestamps to
+    the latest one), so every file is sorted and ranges are found by binary
+    search over record offsets.
+    """
+
+    def __init__(self, directory: Path, capacity: int = RAW_CAPACITY):
+        self.directory = directory
+        self.capacity = capacity
+
+    # ------------------------------------------------------------------
+    # Raw ring buffer
+    # ------------------------------------------------------------------
+
+    def _ring_state(self, f) -> Tuple[int, int]:
+        header = f.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            return self.capacity, 0
+        return _HEADER.unpack(header)
+
+    def _read_raw(self, f, capacity: int, written: int, index: int) -> Tuple:
+        """Raw point by logical index (0 = oldest kept)"""
+        first = max(0, written - capacity)
+        f.seek(_HEADER.size + ((first + index) % capacity) * _RAW.size)
+        return _RAW.unpack(f.read(_RAW.size))
+
+    def _append_raw(self, point: Tuple) -> Tuple:
+        path = self.directory / RAW_FILE
+        mode = "r+b" if path.exists() else "w+b"
+        with open(path, mode) as f:
+            capacity, written = self._ring_state(f)
+            if written:
+                last = self._read_raw(f, capacity, written, min(written, capacity) - 1)
+                if point[0] < last[0]:
+                    point = (last[0],) + point[1:]
+            f.seek(_HEADER.size + (written % capacity) * _RAW.size)
+            f.write(_RAW.pack(*point))
+            f.seek(0)
+            f.write(_HEADER.pack(capacity, written + 1))
+        return point
+
+    def raw(self, start: float, end: float, limit: Optional[int] = None) -> List[Tuple]:
+        """Raw points with start <= t < end, oldest first"""
+        path = self.directory / RAW_FILE
+        if not path.exists():
+            return []
+        with open(path, "rb") as f:
+            capacity, written = self._ring_state(f)
+            count = min(written, capacity)
+            low, high = 0, count
+            while low < high:
+                middle = (low + high) // 2
+                if self._read_raw(f, capacity, written, middle)[0] < start:
+                    low = middle + 1
+                else:
+                    high = middle
+            points = []
+            for index in range(low, count):
+                point = self._read_raw(f, capacity, written, index)
+                if point[0] >= end or (limit is not None and len(points) >= limit):
+                    break
+                points.append(point)
+            return points
+
+    # ------------------------------------------------------------------
+    # Rollups
+    # ------------------------------------------------------------------
+
+    def _append_rollup(self, resolution: str, moment: float, score: int) -> None:
+        path = self.directory / ROLLUP_FILES[resolution]
+        bucket = moment - moment % ROLLUP_SECONDS[resolution]
+        mode = "r+b" if path.exists() else "w+b"
+        with open(path, mode) as f:
+            size = f.seek(0, os.SEEK_END)
+            if size >= _ROLLUP.size:
+                f.seek(size - _ROLLUP.size)
+                last = _ROLLUP.unpack(f.read(_ROLLUP.size))
+                if last[0] == bucket:
+                    f.seek(size - _ROLLUP.size)
+                    f.write(_ROLLUP.pack(bucket, last[1] + score, last[2] + 1, min(last[3], score), max(last[4], score)))
+                    return
+            f.write(_ROLLUP.pack(bucket, score, 1, score, score))
+
+    def rollup(self, resolution: str, start: float, end: float, limit: Optional[int] = None) -> List[Tuple]:
+        """Rollup buckets starting in [start, end), oldest first"""
+        path = self.directory / ROLLUP_FILES[resolution]
+        if not path.exists():
+            return []
+        # Include the bucket that contains start
+        start -= start % ROLLUP_SECONDS[resolution]
+        with open(path, "rb") as f:
+            count = f.seek(0, os.SEEK_END) // _ROLLUP.size
+            low, high = 0, count
+            while low < high:
+                middle = (low + high) // 2
+                f.seek(middle * _ROLLUP.size)
+                if _ROLLUP.unpack(f.read(_ROLLUP.size))[0] < start:
+                    low = middle + 1
+                else:
+                    high = middle
+            wanted = count - low if limit is None else min(count - low, limit)
+            f.seek(low * _ROLLUP.size)
+            data = f.read(wanted * _ROLLUP.size)
+        buckets = []
+        for record in _ROLLUP.iter_unpack(data):
+            if record[0] >= end:
+                break
+            buckets.append(record)
+        return buckets
+
+    # ------------------------------------------------------------------
+
+    def append(self, moment: float, score: int, active_contexts: int, urgent_tasks: int, switches: int) -> None:
+        point = self._append_raw((
+            moment,
+            _clamp(score, 100),
+            _clamp(active_contexts, 0xFFFF),
+            _clamp(urgent_tasks, 0xFFFF),
+            _clamp(switches, 0xFFFF),
+        ))
+        for resolution in ROLLUP_FILES:
+            self._append_rollup(resolution, point[0], point[1])
+
+
+def _history(user_id: str) -> Optional[LoadHistory]:
+    """History for users with a data directory (reads never create one)"""
+    directory = get_user_data_dir(user_id)
+    return LoadHistory(directory) if directory.is_dir() else None
+
+
+def record_cognitive_load(user_id: str, load: Dict[str, Any], moment: Optional[float] = None) -> bool:
+    """
+    Append a computed cognitive load to the user's series.
+    Skipped for users without synced data (no data directory).
+
+    Returns:
+        Whether the point was recorded
+    """
+    history = _history(user_id)
+    if history is None:
+        return False
+    with _lock:
+        history.append(
+            moment or time.time(),
+            load.get("score", 0),
+            load.get("active_contexts", 0),
+            load.get("urgent_tasks", 0),
+            load.get("switches", 0),
+        )
+    return True
+
+
+def load_series(
+    user_id: str,
+    start: float,
+    end: float,
+    resolution: str = "hourly",
+    limit: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Cognitive load points in [start, end).
+
+    Args:
+        user_id: User to read
+        start: Range start (epoch seconds)
+        end: Range end (epoch seconds)
+        resolution: "raw", "hourly" or "daily" (rollup buckets are UTC-aligned)
+        limit: Maximum points returned (oldest first)
+
+    Returns:
+        Raw points ({t, score, active_contexts, urgent_tasks, switches}) or
+        rollup buckets ({t, score (average), min, max, count})
+    """
+    history = _history(user_id)
+    if history is None:
+        return []
+    with _lock:
+        if resolution == "raw":
+            return [
+                {"t": t, "score": score, "active_contexts": contexts, "urgent_tasks": urgent, "switches": switches}
+                for t, score, contexts, urgent, switches in history.raw(start, end, limit)
+            ]
+        return [
+            {"t": t, "score": round(total / count, 1), "min": low, "max": high, "count": count}
+            for t, total, count, low, high in history.rollup(resolution, start, end, limit)
+        ]
+
+
+def load_trend(user_id: str, days: int = 7, now: Optional[float] = None) -> Optional[Dict[str, Any]]:
+    """
+    Average load over the last `days` days against the `days` before them.
+
+    Returns:
+        {"current", "previous", "change_pct"}, or None without data for both periods
+    """
+    now = now or time.time()
+    period = days * 86400
+    buckets = load_series(user_id, now - 2 * period, now, "daily")
+
+    def average(selected: List[Dict[str, Any]]) -> Optional[float]:
+        count = sum(b["count"] for b in selected)
+        return sum(b["score"] * b["count"] for b in selected) / count if count else None
+
+    current = average([b for b in buckets if b["t"] >= now - period])
+    previous = average([b for b in buckets if b["t"] < now - period])
+    if current is None or not previous:
+        return None
+    return {
+        "current": round(current, 1),
+        "previous": round(previous, 1),
+        "change_pct": round((current - previous) / previous * 100),
+    }
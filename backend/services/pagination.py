@@ -0,0 +1,72 @@
+"""
+Cursor-based pagination for derived list views
+Cursors are opaque tokens bound to the data version they were issued for
+"""
+
+import base64
+import hashlib
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+class StaleCursorError(ValueError):
+    """Raised when a cursor was issued for a different version of the data"""
+
+
+def data_version(fingerprint: Any) -> str:
+    """Short digest of a data fingerprint, embedded in cursors"""
+    return hashlib.md5(repr(fingerprint).encode()).hexdigest()[:12]
+
+
+def encode_cursor(offset: int, version: str) -> str:
+    """Build an opaque cursor pointing at an offset of a given data version"""
+    return base64.urlsafe_b64encode(f"{offset}:{version}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, version: str) -> int:
+    """
+    Decode a cursor back to its offset.
+
+    Raises:
+        ValueError: If the cursor is malformed
+        StaleCursorError: If the data changed since the cursor was issued
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        offset_text, cursor_version = base64.urlsafe_b64decode(padded.encode()).decode().split(":", 1)
+        offset = int(offset_text)
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if offset < 0:
+        raise ValueError("Invalid cursor")
+    if cursor_version != version:
+        raise StaleCursorError("Cursor is stale; restart pagination from the first page")
+    return offset
+
+
+def paginate(items: List[Any], cursor: Optional[str], limit: int, version: str) -> Tuple[List[Any], Optional[str]]:
+    """
+    Slice one page out of a list.
+
+    Args:
+        items: Full ordered list
+        cursor: Cursor from a previous page, or None for the first page
+        limit: Page size (clamped to 1..MAX_PAGE_SIZE)
+        version: Current data version
+
+    Returns:
+        Tuple of (page items, next cursor or None when exhausted)
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    offset = decode_cursor(cursor, version) if cursor else 0
+    page = items[offset:offset + limit]
+    end = offset + len(page)
+    next_cursor = encode_cursor(end, version) if end < len(items) else None
+    return page, next_cursor
+
+
+def page_info(next_cursor: Optional[str], total: int) -> Dict[str, Any]:
+    """Pagination metadata returned alongside a page"""
+    return {"next_cursor": next_cursor, "total": total}
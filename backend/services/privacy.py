@@ -3,67 +3,221 @@ Privacy and sanitization layer for LLM processing
 Removes sensitive content before sending to Ollama
 """
 
-from typing import List, Dict, Any
+import hashlib
+import json
+import os
+import re
+from typing import List, Dict, Any, Iterable, Optional, Pattern, Tuple
+
+from services.contacts import participant_label
+from services.data_loader import get_data_fingerprint
+from services.threads import aggregate_threads, load_thread_items
+
+# Gmail labels that may be shown to the model
+SAFE_LABELS = frozenset({"INBOX", "IMPORTANT", "UNREAD"})
+
+CONTENT_PREVIEW_CHARS = 200
+
+# Named PII redaction rules: pattern and replacement. URLs go first since they can contain "@".
+REDACTION_PATTERNS: Dict[str, Tuple[str, str]] = {
+    "url": (r"\bhttps?://\S+|\bwww\.\S+", "[link]"),
+    "email": (r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}", "[email]"),
+    "phone": (
+        r"(?<![\w+])(?:\+\d{1,3}(?:[\s.-]?\d{2,4}){2,4}|(?:\(\d{3}\)\s?|\d{3}[\s.-])\d{3}[\s.-]\d{4})(?!\d)",
+        "[phone]",
+    ),
+}
+
+
+def compile_redaction_rules(names: Iterable[str]) -> List[Tuple[Pattern, str]]:
+    """
+    Compile the named redaction rules, in REDACTION_PATTERNS order.
+
+    Raises:
+        ValueError: If a rule name is unknown
+    """
+    wanted = {name.strip().lower() for name in names if name.strip()}
+    unknown = wanted - set(REDACTION_PATTERNS)
+    if unknown:
+        raise ValueError(f"Unknown redaction rules: {', '.join(sorted(unknown))}")
+    return [(re.compile(pattern), replacement) for name, (pattern, replacement) in REDACTION_PATTERNS.items() if name in wanted]
+
+
+# Active rules, compiled once (PII_REDACTION_RULES="" disables redaction)
+_redaction_rules = compile_redaction_rules(os.getenv("PII_REDACTION_RULES", "email,phone,url").split(","))
+
+
+def configure_redaction(names: Iterable[str]) -> None:
+    """Replace the active redaction rules and drop views sanitized with the old ones"""
+    global _redaction_rules
+    _redaction_rules = compile_redaction_rules(names)
+    sanitized_views.clear()
+
+
+def redact(text: str) -> str:
+    """Apply the active PII redaction rules to a text"""
+    for pattern, replacement in _redaction_rules:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+def sanitize_item(item: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Sanitize a single work item: essential metadata, a redacted content
+    preview, a participant count instead of the list and safe labels only.
+    """
+    sanitized_item = {
+        "id": item.get("id", ""),
+        "source": item.get("source", ""),
+        "kind": item.get("kind", ""),
+        "title": item.get("title", ""),
+        "timestamp": item.get("timestamp", ""),
+        "status": item.get("status", ""),
+    }
+
+    # Limit content preview (privacy-safe); redact a little past the cut so
+    # a URL or address spanning it is not half-kept
+    content = item.get("content") or ""
+    if content:
+        preview = redact(content[:CONTENT_PREVIEW_CHARS * 2])
+        sanitized_item["content"] = preview[:CONTENT_PREVIEW_CHARS] + "..." if len(content) > CONTENT_PREVIEW_CHARS else preview
+    else:
+        sanitized_item["content"] = ""
+
+    # Include participant count, not full list
+    participants = item.get("participants") or []
+    sanitized_item["participant_count"] = len(participants)
+    if participants:
+        # Only show first participant (local part of the address) for context
+        sanitized_item["main_participant"] = participant_label(participants[0])
+
+    if item.get("deadline"):
+        sanitized_item["deadline"] = item["deadline"]
+
+    # Include safe metadata only
+    meta = item.get("meta") or {}
+    safe_meta = {}
+    if meta.get("location"):
+        safe_meta["has_location"] = True
+    if meta.get("meeting_link"):
+        safe_meta["has_meeting_link"] = True
+    if meta.get("labels"):
+        safe_meta["labels"] = [label for label in meta["labels"] if label in SAFE_LABELS]
+    if meta.get("message_count"):
+        safe_meta["message_count"] = meta["message_count"]
+        safe_meta["unread_count"] = meta.get("unread_count", 0)
+    if safe_meta:
+        sanitized_item["meta"] = safe_meta
+
+    return sanitized_item
 
 
 def sanitize_for_llm(work_items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """
     Sanitize work items before sending to LLM.
-    Removes sensitive content and keeps only essential metadata.
-    
+    Collapses email threads into one item, removes sensitive content and
+    keeps only essential metadata.
+
     Args:
         work_items: List of work items to sanitize
-    
+
     Returns:
         Sanitized work items safe for LLM processing
     """
-    sanitized = []
-    
-    for item in work_items:
-        # Create sanitized version
-        sanitized_item = {
-            "id": item.get("id", ""),
-            "source": item.get("source", ""),
-            "kind": item.get("kind", ""),
-            "title": item.get("title", ""),
-            "timestamp": item.get("timestamp", ""),
-            "status": item.get("status", ""),
-        }
-        
-        # Limit content preview (privacy-safe)
-        content = item.get("content", "")
-        if content:
-            sanitized_item["content"] = content[:200] + "..." if len(content) > 200 else content
-        else:
-            sanitized_item["content"] = ""
-        
-        # Include participant count, not full list
-        participants = item.get("participants", [])
-        sanitized_item["participant_count"] = len(participants)
-        if participants:
-            # Only show first participant for context
-            sanitized_item["main_participant"] = participants[0].split("@")[0] if "@" in participants[0] else participants[0]
-        
-        # Include deadline if available
-        if item.get("deadline"):
-            sanitized_item["deadline"] = item.get("deadline")
-        
-        # Include safe metadata only
-        meta = item.get("meta", {})
-        safe_meta = {}
-        if meta.get("location"):
-            safe_meta["has_location"] = True
-        if meta.get("meeting_link"):
-            safe_meta["has_meeting_link"] = True
-        if meta.get("labels"):
-            safe_meta["labels"] = [l for l in meta.get("labels", []) if l in ["INBOX", "IMPORTANT", "UNREAD"]]
-        
-        if safe_meta:
-            sanitized_item["meta"] = safe_meta
-        
-        sanitized.append(sanitized_item)
-    
-    return sanitized
+    return [sanitize_item(item) for item in aggregate_threads(work_items)]
+
+
+def item_version(item: Dict[str, Any]) -> str:
+    """Content version of a work item"""
+    return hashlib.sha1(json.dumps(item, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class SanitizedViewCache:
+    """
+    Sanitized views of each user's thread-aggregated work items, built at sync time.
+
+    Views are kept per (item ID, version), so a sync only sanitizes items
+    that are new or changed. The assembled list is tagged with the user's
+    data fingerprint; requests reuse it as long as the fingerprint matches.
+    """
+
+    def __init__(self):
+        # user_id -> (item_id, version) -> sanitized view
+        self._items: Dict[str, Dict[Tuple[str, str], Dict[str, Any]]] = {}
+        # (user_id, use_mock_if_empty) -> (fingerprint, item keys, sanitized list)
+        self._lists: Dict[Tuple[str, bool], Tuple[Any, List[Tuple[str, str]], List[Dict[str, Any]]]] = {}
+        self.stats = {"hits": 0, "builds": 0, "sanitized": 0, "reused": 0}
+
+    def refresh(self, user_id: str, work_items: List[Dict[str, Any]], use_mock_if_empty: bool = True) -> List[Dict[str, Any]]:
+        """
+        Rebuild a user's sanitized list from their current work items.
+
+        Args:
+            user_id: User the items belong to
+            work_items: Output of load_thread_items(user_id, use_mock_if_empty)
+            use_mock_if_empty: Which variant the items came from
+
+        Returns:
+            Sanitized items, in the same order
+        """
+        fingerprint = get_data_fingerprint(user_id)
+        previous = self._items.get(user_id, {})
+        keys = []
+        sanitized = []
+        for item in work_items:
+            key = (item.get("id", ""), item_version(item))
+            view = previous.get(key)
+            if view is None:
+                view = sanitize_item(item)
+                self.stats["sanitized"] += 1
+            else:
+                self.stats["reused"] += 1
+            keys.append(key)
+            sanitized.append(view)
+
+        # Keep only views still referenced by this list or the other variant's
+        current = dict(zip(keys, sanitized))
+        other = self._lists.get((user_id, not use_mock_if_empty))
+        if other:
+            for key in other[1]:
+                if key in previous:
+                    current.setdefault(key, previous[key])
+        self._items[user_id] = current
+        self._lists[(user_id, use_mock_if_empty)] = (fingerprint, keys, sanitized)
+        self.stats["builds"] += 1
+        return sanitized
+
+    def get(self, user_id: str, use_mock_if_empty: bool = True) -> Optional[List[Dict[str, Any]]]:
+        """Sanitized list for the user's current data, or None if it needs a rebuild"""
+        cached = self._lists.get((user_id, use_mock_if_empty))
+        if cached and cached[0] == get_data_fingerprint(user_id):
+            self.stats["hits"] += 1
+            return cached[2]
+        return None
+
+    def invalidate_user(self, user_id: str) -> None:
+        self._items.pop(user_id, None)
+        self._lists.pop((user_id, True), None)
+        self._lists.pop((user_id, False), None)
+
+    def clear(self) -> None:
+        self._items.clear()
+        self._lists.clear()
+
+
+sanitized_views = SanitizedViewCache()
+
+
+def sanitized_work_items(user_id: str, use_mock_if_empty: bool = True) -> List[Dict[str, Any]]:
+    """
+    Sanitized work items for a user, one per email thread.
+    Served from the views built at sync time; only rebuilt (reusing unchanged
+    items) when the data changed outside a sync, e.g. after a restart.
+    """
+    cached = sanitized_views.get(user_id, use_mock_if_empty)
+    if cached is not None:
+        return cached
+    return sanitized_views.refresh(user_id, load_thread_items(user_id, use_mock_if_empty), use_mock_if_empty)
 
 
 def check_permissions() -> bool:
@@ -0,0 +1,210 @@
+"""
+Token-budgeted packing of system data into the LLM prompt
+Ranks items by relevance to the query and by priority, then fills a token budget
+with compact one-line encodings instead of indented JSON
+"""
+
+import os
+import re
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Token budget for the data sections of the system prompt (not the rules/examples)
+DEFAULT_TOKEN_BUDGET = int(os.getenv("PROMPT_DATA_TOKEN_BUDGET", "1500"))
+
+# Weight of query relevance vs. intrinsic priority when ranking items
+RELEVANCE_WEIGHT = 0.6
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are about any at be by can did do does for from have how i in is it me my of on or "
+    "should so that the this to today up was what when where which who why will with you your".split()
+)
+
+URGENCY_PRIORITY = {"high": 0.9, "medium": 0.6, "low": 0.3}
+SEVERITY_PRIORITY = {"high": 0.9, "medium": 0.6, "low": 0.3}
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English BPE vocabularies)"""
+    return max(1, (len(text) + 3) // 4)
+
+
+def query_terms(query: str) -> frozenset:
+    """Lowercased content words of a query"""
+    return frozenset(w for w in _WORD_RE.findall(query.lower()) if w not in _STOPWORDS and len(w) > 1)
+
+
+def relevance(terms: frozenset, text: str) -> float:
+    """Fraction of query terms that appear in the text"""
+    if not terms:
+        return 0.0
+    words = set(_WORD_RE.findall(text.lower()))
+    return len(terms & words) / len(terms)
+
+
+# ----------------------------------------------------------------------------
+# Compact encoders: one line per item
+# ----------------------------------------------------------------------------
+
+def encode_context(ctx: Dict[str, Any]) -> str:
+    parts = [ctx.get("name", ""), f"urgency={ctx.get('urgency', '')}"]
+    if ctx.get("deadline"):
+        parts.append(f"due {ctx['deadline']}")
+    if ctx.get("tasks"):
+        parts.append("tasks: " + "; ".join(t for t in ctx["tasks"] if t))
+    return "- " + " | ".join(parts)
+
+
+def encode_task(task: Dict[str, Any]) -> str:
+    parts = [f"[{task.get('priority_score', 0)}] {task.get('title', '')}", task.get("context", "")]
+    if task.get("deadline"):
+        parts.append(f"due {task['deadline']}")
+    parts.append(task.get("status", ""))
+    return "- " + " | ".join(p for p in parts if p)
+
+
+def encode_email(email: Dict[str, Any]) -> str:
+    parts = [email.get("title", "")]
+    if email.get("main_participant"):
+        parts.append(f"from {email['main_participant']}")
+    parts.append(email.get("status", ""))
+    if email.get("timestamp"):
+        parts.append(email["timestamp"][:16])
+    labels = email.get("meta", {}).get("labels")
+    if labels:
+        parts.append(",".join(labels))
+    if email.get("content"):
+        parts.append(email["content"][:120])
+    return "- " + " | ".join(p for p in parts if p)
+
+
+def encode_event(event: Dict[str, Any]) -> str:
+    parts = [event.get("title", "")]
+    if event.get("timestamp"):
+        when = event["timestamp"][:16]
+        if event.get("deadline"):
+            when += f" to {event['deadline'][11:16] or event['deadline'][:10]}"
+        parts.append(when)
+    if event.get("participant_count"):
+        parts.append(f"{event['participant_count']} attendees")
+    return "- " + " | ".join(p for p in parts if p)
+
+
+def encode_retrieved(item: Dict[str, Any]) -> str:
+    """Retrieved items are emails or calendar events"""
+    return encode_event(item) if item.get("source") == "calendar" else encode_email(item)
+
+
+def encode_insight(insight: Dict[str, Any]) -> str:
+    return f"- ({insight.get('severity', '')}) {insight.get('message', '')}"
+
+
+def encode_recommendation(rec: Dict[str, Any]) -> str:
+    return f"- {rec.get('action', '')} (why: {rec.get('reason', '')}; impact: {rec.get('expected_impact', '')})"
+
+
+# ----------------------------------------------------------------------------
+# Intrinsic priority of each item kind, in [0, 1]
+# ----------------------------------------------------------------------------
+
+def _event_priority(event: Dict[str, Any], now: datetime) -> float:
+    try:
+        start = datetime.fromisoformat(event.get("timestamp", "").replace("Z", "+00:00"))
+        if start.tzinfo is None:
+            start = start.replace(tzinfo=timezone.utc)
+    except ValueError:
+        return 0.3
+    hours = (start - now).total_seconds() / 3600
+    if hours < -24:
+        return 0.2
+    # Upcoming events matter more the sooner they start
+    return max(0.3, 1.0 - max(hours, 0) / (24 * 14))
+
+
+def _email_priority(email: Dict[str, Any]) -> float:
+    score = 0.7 if email.get("status") == "unread" else 0.4
+    if "IMPORTANT" in email.get("meta", {}).get("labels", []):
+        score += 0.2
+    return score
+
+
+SECTION_SPECS: Dict[str, Tuple[Callable[[Dict[str, Any]], str], Callable[..., float]]] = {
+    "contexts": (encode_context, lambda c, now: URGENCY_PRIORITY.get(c.get("urgency"), 0.5)),
+    "tasks": (encode_task, lambda t, now: (t.get("priority_score") or 0) / 100),
+    "emails": (encode_email, lambda e, now: _email_priority(e)),
+    "calendar": (encode_event, _event_priority),
+    "retrieved": (encode_retrieved, lambda r, now: r.get("relevance_score", 0.5)),
+    "insights": (encode_insight, lambda i, now: SEVERITY_PRIORITY.get(i.get("severity"), 0.5)),
+    "recommendations": (encode_recommendation, lambda r, now: 0.8),
+}
+
+
+def pack_prompt_data(
+    sections: Dict[str, List[Dict[str, Any]]],
+    query: str,
+    token_budget: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Fill a token budget with the most relevant items across sections.
+
+    Every non-empty section first gets its best item (if it fits), then the
+    remaining budget goes to the highest-ranked items overall. Within a
+    section, packed lines keep the order they were given in (e.g. tasks
+    stay sorted by priority).
+
+    Args:
+        sections: Section name (see SECTION_SPECS) -> list of items
+        query: User query used for relevance ranking
+        token_budget: Token budget for all sections (defaults to DEFAULT_TOKEN_BUDGET)
+
+    Returns:
+        Dict with "sections" (name -> text), "stats" (name -> packed/available
+        counts), "tokens_used" and "token_budget"
+    """
+    budget = DEFAULT_TOKEN_BUDGET if token_budget is None else token_budget
+    terms = query_terms(query)
+    now = datetime.now(timezone.utc)
+
+    ranked: Dict[str, List[Tuple[float, int, str, int]]] = {}
+    for name, items in sections.items():
+        encode, priority = SECTION_SPECS[name]
+        candidates = []
+        for position, item in enumerate(items):
+            line = encode(item)
+            score = RELEVANCE_WEIGHT * relevance(terms, line) + (1 - RELEVANCE_WEIGHT) * priority(item, now)
+            candidates.append((score, -position, line, estimate_tokens(line) + 1))
+        candidates.sort(reverse=True)
+        ranked[name] = candidates
+
+    chosen: Dict[str, List[Tuple[float, int, str, int]]] = {name: [] for name in sections}
+    used = 0
+
+    # Guarantee each section its best item, then fill greedily by score
+    remaining = []
+    for name, candidates in ranked.items():
+        if candidates and used + candidates[0][3] <= budget:
+            chosen[name].append(candidates[0])
+            used += candidates[0][3]
+            remaining.extend((c, name) for c in candidates[1:])
+        else:
+            remaining.extend((c, name) for c in candidates)
+    remaining.sort(key=lambda entry: entry[0][0], reverse=True)
+    for candidate, name in remaining:
+        if used + candidate[3] <= budget:
+            chosen[name].append(candidate)
+            used += candidate[3]
+
+    packed_sections = {}
+    stats = {}
+    for name in sections:
+        lines = [c[2] for c in sorted(chosen[name], key=lambda c: c[1], reverse=True)]
+        packed_sections[name] = "\n".join(lines)
+        stats[name] = {"packed": len(lines), "available": len(sections[name])}
+
+    return {
+        "sections": packed_sections,
+        "stats": stats,
+        "tokens_used": used,
+        "token_budget": budget,
+    }
@@ -0,0 +1,544 @@
+"""
+Push-driven incremental sync
+Receives Google Calendar watch-channel and Gmail Pub/Sub notifications, drops duplicates,
+debounces bursts per user and source into one incremental sync, and renews the channels
+"""
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from services.data_loader import get_user_data_dir, get_user_calendar_file, get_user_email_file
+from services.user_paths import DATA_DIR, ensure_user_dir, storage, validate_user_id, InvalidUserIdError
+
+# Public HTTPS base URL of this server; Calendar posts to <url>/api/google/push/calendar
+PUSH_WEBHOOK_URL = os.getenv("PUSH_WEBHOOK_URL", "").rstrip("/")
+# Pub/Sub topic Gmail publishes to ("projects/<project>/topics/<topic>")
+GMAIL_PUBSUB_TOPIC = os.getenv("GMAIL_PUBSUB_TOPIC", "")
+# Shared token in the Pub/Sub push subscription URL (?token=...)
+PUSH_VERIFICATION_TOKEN = os.getenv("PUSH_VERIFICATION_TOKEN", "")
+# Signs Calendar channel tokens; generated into the data root when unset
+PUSH_CHANNEL_SECRET = os.getenv("PUSH_CHANNEL_SECRET", "")
+
+# Notifications for the same user and source within this window trigger one sync
+PUSH_DEBOUNCE_SECONDS = float(os.getenv("PUSH_DEBOUNCE_SECONDS", "5"))
+
+# Requested Calendar channel lifetime (Google caps it, typically at 7 days)
+CALENDAR_CHANNEL_TTL_SECONDS = int(os.getenv("CALENDAR_CHANNEL_TTL_SECONDS", str(7 * 86400)))
+# How often channels are checked, and how close to expiry they are renewed
+PUSH_RENEWAL_INTERVAL = int(os.getenv("PUSH_RENEWAL_INTERVAL_SECONDS", "3600"))
+PUSH_RENEWAL_MARGIN = int(os.getenv("PUSH_RENEWAL_MARGIN_SECONDS", str(86400)))
+
+# Calendar updatedMin overlaps the previous sync by this much (clock skew between us and Google)
+CALENDAR_SYNC_OVERLAP_SECONDS = 60
+
+# Pub/Sub message IDs remembered for redelivery detection
+SEEN_MESSAGE_IDS = 4096
+
+PUSH_STATE_FILE = "push_state.json"
+PUSH_ADDRESSES_FILE = "push_addresses.json"
+PUSH_SECRET_FILE = ".push_secret"
+
+SOURCES = ("calendar", "gmail")
+
+_state_lock = threading.Lock()
+_user_locks: Dict[str, threading.Lock] = {}
+
+
+class PushNotConfiguredError(Exception):
+    """Raised when push registration is requested without a webhook URL or Pub/Sub topic"""
+
+
+# ----------------------------------------------------------------------
+# Channel tokens
+# ----------------------------------------------------------------------
+
+_secret: Optional[bytes] = None
+
+
+def _channel_secret() -> bytes:
+    """HMAC key for channel tokens: PUSH_CHANNEL_SECRET, else a generated key shared by all workers"""
+    global _secret
+    if _secret is None:
+        if PUSH_CHANNEL_SECRET:
+            _secret = PUSH_CHANNEL_SECRET.encode("utf-8")
+        else:
+            path = DATA_DIR / PUSH_SECRET_FILE
+            if not path.exists():
+                DATA_DIR.mkdir(parents=True, exist_ok=True)
+                try:
+                    with open(path, "x") as f:
+                        f.write(secrets.token_hex(32))
+                except FileExistsError:
+                    pass
+            _secret = path.read_text().strip().encode("utf-8")
+    return _secret
+
+
+def channel_token(user_id: str) -> str:
+    """Token Calendar echoes in X-Goog-Channel-Token: the user ID and its signature"""
+    signature = hmac.new(_channel_secret(), user_id.encode("utf-8"), hashlib.sha256).hexdigest()[:32]
+    return f"{user_id}:{signature}"
+
+
+def verify_channel_token(token: Optional[str]) -> Optional[str]:
+    """User ID of a correctly signed channel token, else None"""
+    user_id, _, signature = (token or "").rpartition(":")
+    try:
+        validate_user_id(user_id)
+    except InvalidUserIdError:
+        return None
+    return user_id if hmac.compare_digest(channel_token(user_id), f"{user_id}:{signature}") else None
+
+
+def verify_pubsub_token(token: Optional[str]) -> bool:
+    """Whether a Pub/Sub push carries the configured verification token"""
+    return bool(PUSH_VERIFICATION_TOKEN) and hmac.compare_digest(token or "", PUSH_VERIFICATION_TOKEN)
+
+
+# ----------------------------------------------------------------------
+# Per-user push state
+# ----------------------------------------------------------------------
+
+def load_push_state(user_id: str) -> Dict[str, Any]:
+    """
+    A user's push state (never creates the user directory):
+    {"calendar": {"channels": {calendar_id: {channel_id, resource_id, expiration}},
+                  "expiration": earliest channel expiration},
+     "calendar_synced_at", "gmail": {email, expiration, history_id}}
+    """
+    path = get_user_data_dir(user_id) / PUSH_STATE_FILE
+    if not path.exists():
+        return {}
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_push_state(user_id: str, state: Dict[str, Any]) -> None:
+    user_dir = ensure_user_dir(user_id)
+    tmp_file = user_dir / (PUSH_STATE_FILE + ".tmp")
+    with open(tmp_file, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp_file, user_dir / PUSH_STATE_FILE)
+
+
+def update_push_state(user_id: str, **changes: Any) -> Dict[str, Any]:
+    """Merge top-level keys into a user's push state (None deletes a key)"""
+    with _state_lock:
+        state = load_push_state(user_id)
+        for key, value in changes.items():
+            if value is None:
+                state.pop(key, None)
+            else:
+                state[key] = value
+        _save_push_state(user_id, state)
+        return state
+
+
+def calendar_channels(state: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """calendar_id -> channel of a push state (a single pre-multi-calendar channel watched primary)"""
+    calendar = state.get("calendar") or {}
+    if "channel_id" in calendar:
+        return {"primary": calendar}
+    return calendar.get("channels") or {}
+
+
+def _load_addresses() -> Dict[str, str]:
+    path = DATA_DIR / PUSH_ADDRESSES_FILE
+    if not path.exists():
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def _set_address(address: str, user_id: Optional[str]) -> None:
+    with _state_lock:
+        addresses = _load_addresses()
+        if user_id is None:
+            addresses.pop(address.lower(), None)
+        else:
+            addresses[address.lower()] = user_id
+        DATA_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_file = DATA_DIR / (PUSH_ADDRESSES_FILE + ".tmp")
+        with open(tmp_file, "w") as f:
+            json.dump(addresses, f)
+        os.replace(tmp_file, DATA_DIR / PUSH_ADDRESSES_FILE)
+
+
+def user_for_address(address: str) -> Optional[str]:
+    """User whose Gmail watch publishes for an address"""
+    return _load_addresses().get((address or "").lower())
+
+
+# ----------------------------------------------------------------------
+# Incremental sync
+# ----------------------------------------------------------------------
+
+def _user_lock(user_id: str) -> threading.Lock:
+    with _state_lock:
+        return _user_locks.setdefault(user_id, threading.Lock())
+
+
+def run_incremental_sync(user_id: str, source: str) -> Dict[str, Any]:
+    """
+    Bring one source of a user's data up to date and refresh the derived views.
+    Calendar applies events updated since the last push sync; Gmail applies
+    mailbox history since the stored historyId. Without a starting point (or
+    a synced file) the source is fetched in full.
+    """
+    from services.google_sync import (
+        fetch_calendar_events, fetch_gmail_emails, gmail_profile, load_credentials,
+        sync_calendar_changes, sync_gmail_history, refresh_derived_data,
+    )
+
+    with _user_lock(user_id):
+        # Fail fast without a saved token; the full fetches would start the interactive OAuth flow
+        load_credentials(user_id)
+        state = load_push_state(user_id)
+        started = datetime.now(timezone.utc)
+        if source == "calendar":
+            since = state.get("calendar_synced_at")
+            if since and get_user_calendar_file(user_id).exists():
+                updated_min = (datetime.fromisoformat(since) - timedelta(seconds=CALENDAR_SYNC_OVERLAP_SECONDS)).isoformat()
+                result = sync_calendar_changes(user_id, updated_min)
+            else:
+                result = {"events": len(fetch_calendar_events(user_id)), "full_resync": True}
+            if not result.get("failed"):
+                # A failed calendar's changes are picked up by the next sync from the same point
+                update_push_state(user_id, calendar_synced_at=started.isoformat())
+        else:
+            gmail = state.get("gmail") or {}
+            if gmail.get("history_id") and get_user_email_file(user_id).exists():
+                result = sync_gmail_history(user_id, gmail["history_id"])
+            else:
+                history_id = gmail_profile(user_id).get("historyId")
+                result = {"history_id": history_id, "emails": len(fetch_gmail_emails(user_id)), "full_resync": True}
+            with _state_lock:
+                state = load_push_state(user_id)
+                state.setdefault("gmail", {})["history_id"] = result["history_id"]
+                _save_push_state(user_id, state)
+
+        errors = refresh_derived_data(user_id)
+        return {**result, "errors": errors}
+
+
+class PushSyncScheduler:
+    """
+    Debounces push notifications into incremental syncs.
+
+    The first notification for a (user, source) schedules a sync after
+    PUSH_DEBOUNCE_SECONDS; notifications arriving before it starts are
+    absorbed. One arriving while the sync runs marks the key dirty, so
+    exactly one follow-up sync picks up the changes it announced.
+    """
+
+    def __init__(self, debounce: float = PUSH_DEBOUNCE_SECONDS, runner=run_incremental_sync):
+        self.debounce = debounce
+        self.runner = runner
+        self._pending: Dict[Tuple[str, str], asyncio.Task] = {}
+        self._running: set = set()
+        self._dirty: set = set()
+        self._seen_messages: "OrderedDict[str, None]" = OrderedDict()
+        self._last_message_number: Dict[str, int] = {}
+        self.stats = {
+            "received": 0, "duplicates": 0, "ignored": 0, "coalesced": 0,
+            "syncs": 0, "failures": 0, "renewals": 0,
+        }
+
+    def schedule(self, user_id: str, source: str) -> str:
+        """Queue a sync for a user's source; returns "scheduled" or "coalesced" """
+        key = (user_id, source)
+        task = self._pending.get(key)
+        if task is not None and not task.done():
+            if key in self._running:
+                self._dirty.add(key)
+            self.stats["coalesced"] += 1
+            return "coalesced"
+        self._pending[key] = asyncio.create_task(self._run(key))
+        return "scheduled"
+
+    async def _run(self, key: Tuple[str, str]) -> None:
+        try:
+            while True:
+                await asyncio.sleep(self.debounce)
+                self._dirty.discard(key)
+                self._running.add(key)
+                try:
+                    result = await asyncio.to_thread(self.runner, *key)
+                    self.stats["syncs"] += 1
+                    print(f"📬 Push sync ({key[1]}) for {key[0][:8]}...: {result}")
+                except Exception as e:
+                    self.stats["failures"] += 1
+                    print(f"⚠️ Push sync ({key[1]}) for {key[0][:8]}... failed: {e}")
+                finally:
+                    self._running.discard(key)
+                if key not in self._dirty:
+                    break
+        finally:
+            self._pending.pop(key, None)
+
+    def _seen(self, message_id: str) -> bool:
+        if message_id in self._seen_messages:
+            self._seen_messages.move_to_end(message_id)
+            return True
+        self._seen_messages[message_id] = None
+        if len(self._seen_messages) > SEEN_MESSAGE_IDS:
+            self._seen_messages.popitem(last=False)
+        return False
+
+    # ------------------------------------------------------------------
+    # Notifications
+    # ------------------------------------------------------------------
+
+    def handle_calendar(self, headers: Dict[str, str]) -> Dict[str, Any]:
+        """
+        Handle a Calendar watch notification (X-Goog-* headers, lowercase keys).
+
+        Returns:
+            {"status": "scheduled" | "coalesced" | "duplicate" | "ignored", ...}
+
+        Raises:
+            PermissionError: If the channel token is missing or forged
+        """
+        self.stats["received"] += 1
+        user_id = verify_channel_token(headers.get("x-goog-channel-token"))
+        if user_id is None:
+            raise PermissionError("Invalid channel token")
+
+        channel_id = headers.get("x-goog-channel-id", "")
+        state = headers.get("x-goog-resource-state", "")
+        channels = calendar_channels(load_push_state(user_id)).values()
+        if not any(channel["channel_id"] == channel_id for channel in channels):
+            # A replaced channel still delivering until it expires
+            self.stats["ignored"] += 1
+            return {"status": "ignored", "reason": "unknown channel"}
+        if state == "sync":
+            self.stats["ignored"] += 1
+            return {"status": "ignored", "reason": "sync handshake"}
+
+        try:
+            number = int(headers.get("x-goog-message-number", ""))
+        except ValueError:
+            number = None
+        if number is not None:
+            if number <= self._last_message_number.get(channel_id, 0):
+                self.stats["duplicates"] += 1
+                return {"status": "duplicate"}
+            self._last_message_number[channel_id] = number
+
+        return {"status": self.schedule(user_id, "calendar")}
+
+    def handle_gmail(self, envelope: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Handle a Pub/Sub push envelope: {"message": {"data": base64 JSON
+        {"emailAddress", "historyId"}, "messageId"}, "subscription"}.
+
+        Raises:
+            ValueError: If the envelope is malformed
+        """
+        self.stats["received"] += 1
+        message = envelope.get("message") or {}
+        try:
+            payload = json.loads(base64.b64decode(message.get("data", "")))
+            address = payload["emailAddress"]
+            history_id = int(payload["historyId"])
+        except (ValueError, KeyError, TypeError) as e:
+            raise ValueError(f"Malformed Pub/Sub message: {e}")
+
+        message_id = message.get("messageId") or message.get("message_id")
+        if message_id and self._seen(message_id):
+            self.stats["duplicates"] += 1
+            return {"status": "duplicate"}
+
+        user_id = user_for_address(address)
+        if user_id is None:
+            self.stats["ignored"] += 1
+            return {"status": "ignored", "reason": "unknown mailbox"}
+        synced = (load_push_state(user_id).get("gmail") or {}).get("history_id")
+        if synced and history_id <= int(synced):
+            self.stats["duplicates"] += 1
+            return {"status": "duplicate"}
+
+        return {"status": self.schedule(user_id, "gmail")}
+
+
+push_scheduler = PushSyncScheduler()
+
+
+# ----------------------------------------------------------------------
+# Registration and renewal
+# ----------------------------------------------------------------------
+
+def push_configured() -> bool:
+    return bool(PUSH_WEBHOOK_URL or GMAIL_PUBSUB_TOPIC)
+
+
+def _stop_calendar_channels(user_id: str, channels: Dict[str, Dict[str, Any]]) -> None:
+    """Close Calendar channels (best effort; an unstopped channel lapses at its expiration)"""
+    from services.google_sync import stop_calendar_channel
+
+    for channel in channels.values():
+        try:
+            stop_calendar_channel(user_id, channel["channel_id"], channel["resource_id"])
+        except Exception as e:
+            print(f"⚠️ Failed to stop calendar channel {channel['channel_id']}: {e}")
+
+
+def _register_calendar_channels(user_id: str) -> Dict[str, Any]:
+    """
+    Open a channel on every synced calendar, then replace the previous set.
+
+    Raises:
+        RuntimeError: If no channel could be opened
+    """
+    from services.google_sync import sync_calendar_ids, watch_calendar
+
+    channels = {}
+    for calendar_id in sync_calendar_ids(user_id):
+        try:
+            channel = watch_calendar(
+                user_id,
+                calendar_id,
+                uuid.uuid4().hex,
+                f"{PUSH_WEBHOOK_URL}/api/google/push/calendar",
+                channel_token(user_id),
+                CALENDAR_CHANNEL_TTL_SECONDS,
+            )
+        except Exception as e:
+            # Some calendars (e.g. read-only subscriptions) don't support watch
+            print(f"⚠️ Failed to watch calendar for {user_id[:8]}...: {e}")
+            continue
+        channels[calendar_id] = {
+            "channel_id": channel["id"],
+            "resource_id": channel["resourceId"],
+            "expiration": int(channel["expiration"]) / 1000,
+        }
+    if not channels:
+        raise RuntimeError("No calendar accepted a watch channel")
+
+    previous = calendar_channels(load_push_state(user_id))
+    expiration = min(channel["expiration"] for channel in channels.values())
+    update_push_state(user_id, calendar={"channels": channels, "expiration": expiration})
+    _stop_calendar_channels(user_id, previous)
+    return {"status": "registered", "expiration": expiration, "calendars": len(channels)}
+
+
+def register_push(user_id: str, sources: Iterable[str] = SOURCES) -> Dict[str, Any]:
+    """
+    Open (or replace) a user's Calendar channels (one per synced calendar) and Gmail watch.
+
+    Returns:
+        Per source: {"status": "registered", "expiration"} (calendar adds the
+        number of watched calendars) or {"status": "not_configured"}
+
+    Raises:
+        PushNotConfiguredError: If neither PUSH_WEBHOOK_URL nor GMAIL_PUBSUB_TOPIC is set
+    """
+    from services.google_sync import watch_gmail, gmail_profile
+
+    if not push_configured():
+        raise PushNotConfiguredError("Set PUSH_WEBHOOK_URL and/or GMAIL_PUBSUB_TOPIC to enable push sync")
+
+    result: Dict[str, Any] = {}
+    state = load_push_state(user_id)
+    if "calendar" in sources:
+        if PUSH_WEBHOOK_URL:
+            result["calendar"] = _register_calendar_channels(user_id)
+        else:
+            result["calendar"] = {"status": "not_configured"}
+    if "gmail" in sources:
+        if GMAIL_PUBSUB_TOPIC:
+            watch = watch_gmail(user_id, GMAIL_PUBSUB_TOPIC)
+            gmail = dict(state.get("gmail") or {})
+            if not gmail.get("email"):
+                gmail["email"] = gmail_profile(user_id)["emailAddress"].lower()
+            # Keep the synced position; notifications up to the watch's historyId are already reflected
+            gmail.setdefault("history_id", watch["historyId"])
+            gmail["expiration"] = int(watch["expiration"]) / 1000
+            update_push_state(user_id, gmail=gmail)
+            _set_address(gmail["email"], user_id)
+            result["gmail"] = {"status": "registered", "expiration": gmail["expiration"]}
+        else:
+            result["gmail"] = {"status": "not_configured"}
+    return result
+
+
+def unregister_push(user_id: str) -> None:
+    """Stop a user's channels (best effort) and forget their push state"""
+    from services.google_sync import stop_gmail_watch
+
+    state = load_push_state(user_id)
+    _stop_calendar_channels(user_id, calendar_channels(state))
+    gmail = state.get("gmail")
+    if gmail:
+        try:
+            stop_gmail_watch(user_id)
+        except Exception as e:
+            print(f"⚠️ Failed to stop Gmail watch: {e}")
+        if gmail.get("email"):
+            _set_address(gmail["email"], None)
+    (get_user_data_dir(user_id) / PUSH_STATE_FILE).unlink(missing_ok=True)
+
+
+def renew_expiring_channels(now: Optional[float] = None) -> Dict[str, int]:
+    """
+    Re-register channels of known users that expire within PUSH_RENEWAL_MARGIN
+    (a user's calendar channels are renewed together, picking up newly selected calendars)
+    """
+    now = now or time.time()
+    stats = {"checked": 0, "renewed": 0, "failed": 0}
+    for user_id in storage.known_users():
+        state = load_push_state(user_id)
+        expiring = [
+            source for source in SOURCES
+            if state.get(source) and state[source].get("expiration", 0) - now < PUSH_RENEWAL_MARGIN
+        ]
+        stats["checked"] += bool(state)
+        if not expiring:
+            continue
+        try:
+            register_push(user_id, expiring)
+            stats["renewed"] += len(expiring)
+        except Exception as e:
+            stats["failed"] += len(expiring)
+            print(f"⚠️ Push channel renewal failed for {user_id[:8]}...: {e}")
+    push_scheduler.stats["renewals"] += stats["renewed"]
+    return stats
+
+
+async def push_renewal_loop() -> None:
+    """Periodically renew expiring push channels; runs for the application's lifetime"""
+    if PUSH_RENEWAL_INTERVAL <= 0 or not push_configured():
+        return
+    while True:
+        try:
+            stats = await asyncio.to_thread(renew_expiring_channels)
+            if stats["renewed"] or stats["failed"]:
+                print(f"📡 Push channel renewal: {stats}")
+        except Exception as e:
+            print(f"⚠️ Push channel renewal failed: {e}")
+        await asyncio.sleep(PUSH_RENEWAL_INTERVAL)
+
+
+def push_status(user_id: str) -> Dict[str, Any]:
+    """Push registration of a user (for /api/google/status)"""
+    state = load_push_state(user_id)
+    status = {
+        source: {"registered": bool(state.get(source)), "expiration": (state.get(source) or {}).get("expiration")}
+        for source in SOURCES
+    }
+    status["calendar"]["calendars"] = len(calendar_channels(state))
+    return status
@@ -0,0 +1,46 @@
+"""
+Fast JSON encoding and streamed NDJSON responses for large payloads
+Uses orjson when installed, falling back to compact stdlib json
+"""
+
+import json
+from typing import Any, Iterable, Iterator, Tuple
+
+from fastapi.responses import Response, StreamingResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+def dumps(content: Any, sort_keys: bool = False) -> bytes:
+    """Serialize content to compact JSON bytes (sort_keys for a canonical form to hash)"""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        return orjson.dumps(content, option=option, default=str)
+    return json.dumps(content, separators=(",", ":"), ensure_ascii=False, sort_keys=sort_keys, default=str).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """JSON response rendered with the fast encoder instead of FastAPI's default"""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def ndjson_lines(records: Iterable[Tuple[str, Any]]) -> Iterator[bytes]:
+    """
+    Encode (type, data) records as newline-delimited JSON.
+    Each record is serialized as soon as it is produced, so only one
+    record is held in encoded form at a time.
+    """
+    for record_type, data in records:
+        yield dumps({"type": record_type, "data": data}) + b"\n"
+
+
+def ndjson_response(records: Iterable[Tuple[str, Any]], headers: dict = None) -> StreamingResponse:
+    """Stream (type, data) records to the client as application/x-ndjson"""
+    return StreamingResponse(ndjson_lines(records), media_type="application/x-ndjson", headers=headers)
@@ -0,0 +1,226 @@
+"""
+Full-text search over synced emails and calendar events
+Per-user SQLite FTS5 index, updated incrementally on sync and ranked by BM25 plus recency
+"""
+
+import hashlib
+import json
+import re
+import sqlite3
+import time
+from typing import Any, Dict, List, Optional
+
+from services.data_loader import get_user_data_dir, parse_timestamp
+from services.user_paths import ensure_user_dir
+
+SEARCH_DB_FILE = "search.db"
+
+# BM25 column weights: title, content, participants, source
+BM25_WEIGHTS = (10.0, 1.0, 2.0, 0.0)
+
+# BM25 candidates re-ranked with recency per requested result
+CANDIDATES_PER_RESULT = 20
+MIN_CANDIDATES = 200
+
+# Recency bonus added to the (negated) BM25 score; halves after RECENCY_HALF_LIFE_DAYS
+RECENCY_WEIGHT = 2.0
+RECENCY_HALF_LIFE_DAYS = 7.0
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    rowid INTEGER PRIMARY KEY,
+    id TEXT UNIQUE NOT NULL,
+    source TEXT NOT NULL,
+    ts REAL NOT NULL,
+    content_hash TEXT NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS items_source_ts ON items (source, ts);
+CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5(
+    title, content, participants, source,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+
+def _connect(user_id: str) -> sqlite3.Connection:
+    """Writable connection; creates the schema if needed"""
+    conn = sqlite3.connect(ensure_user_dir(user_id) / SEARCH_DB_FILE)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def _connect_readonly(user_id: str) -> Optional[sqlite3.Connection]:
+    """Read-only connection for queries, or None if the user has no index yet"""
+    db_file = get_user_data_dir(user_id) / SEARCH_DB_FILE
+    if not db_file.exists():
+        return None
+    return sqlite3.connect(f"{db_file.as_uri()}?mode=ro", uri=True)
+
+
+def _fields(item: Dict[str, Any]) -> Dict[str, str]:
+    return {
+        "title": item.get("title", "") or "",
+        "content": item.get("content", "") or "",
+        "participants": " ".join(item.get("participants", []) or []),
+    }
+
+
+def update_search_index(user_id: str, work_items: List[Dict[str, Any]]) -> Dict[str, int]:
+    """
+    Sync a user's search index with their current work items.
+
+    Unchanged items (same content hash) are left alone; changed items are
+    re-indexed and items no longer present are removed.
+
+    Returns:
+        Counts of added, updated, removed and unchanged items
+    """
+    stats = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+    conn = _connect(user_id)
+    try:
+        with conn:
+            existing = {row[0]: (row[1], row[2]) for row in conn.execute("SELECT id, rowid, content_hash FROM items")}
+            seen = set()
+            for item in work_items:
+                item_id = item.get("id")
+                if not item_id or item_id in seen:
+                    continue
+                seen.add(item_id)
+                payload = json.dumps(item, sort_keys=True, default=str)
+                content_hash = hashlib.sha1(payload.encode("utf-8")).hexdigest()
+                current = existing.get(item_id)
+                if current and current[1] == content_hash:
+                    stats["unchanged"] += 1
+                    continue
+                timestamp = parse_timestamp(item.get("timestamp", ""))
+                ts = timestamp.timestamp() if timestamp else 0.0
+                fields = _fields(item)
+                if current:
+                    rowid = current[0]
+                    conn.execute(
+                        "UPDATE items SET source = ?, ts = ?, content_hash = ?, payload = ? WHERE rowid = ?",
+                        (item.get("source", ""), ts, content_hash, payload, rowid),
+                    )
+                    conn.execute("DELETE FROM items_fts WHERE rowid = ?", (rowid,))
+                    stats["updated"] += 1
+                else:
+                    rowid = conn.execute(
+                        "INSERT INTO items (id, source, ts, content_hash, payload) VALUES (?, ?, ?, ?, ?)",
+                        (item_id, item.get("source", ""), ts, content_hash, payload),
+                    ).lastrowid
+                    stats["added"] += 1
+                conn.execute(
+                    "INSERT INTO items_fts (rowid, title, content, participants, source) VALUES (?, ?, ?, ?, ?)",
+                    (rowid, fields["title"], fields["content"], fields["participants"], item.get("source", "")),
+                )
+            for item_id, (rowid, _) in existing.items():
+                if item_id not in seen:
+                    conn.execute("DELETE FROM items WHERE rowid = ?", (rowid,))
+                    conn.execute("DELETE FROM items_fts WHERE rowid = ?", (rowid,))
+                    stats["removed"] += 1
+    finally:
+        conn.close()
+    return stats
+
+
+def build_match_query(query: str, source: Optional[str] = None) -> str:
+    """
+    Turn free text into a safe FTS5 query.
+    Every term must match; the last term also matches as a prefix (type-ahead)
+    when it is at least 3 characters long.
+    """
+    tokens = _TOKEN_RE.findall(query.lower())
+    if not tokens:
+        return ""
+    terms = [f'"{token}"' for token in tokens]
+    if len(tokens[-1]) >= 3:
+        terms[-1] += "*"
+    if source:
+        terms.append(f'source : "{source.lower()}"')
+    return " ".join(terms)
+
+
+def search_items(user_id: str, query: str, limit: int = 20, source: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Search a user's synced items.
+
+    FTS5 first selects the best BM25 candidates (a top-N scan inside SQLite),
+    which are then re-ranked with a recency bonus; payloads and snippets are
+    only materialized for the final results.
+
+    Args:
+        user_id: User to search for
+        query: Free-text query
+        limit: Maximum number of results
+        source: Optional source filter ("email" or "calendar")
+
+    Returns:
+        Dict with "results" (best first) and "took_ms"
+    """
+    started = time.perf_counter()
+    limit = max(1, min(limit, 200))
+    match = build_match_query(query, source)
+    conn = _connect_readonly(user_id) if match else None
+    if conn is None:
+        return {"results": [], "took_ms": 0.0}
+
+    weights = ", ".join(str(w) for w in BM25_WEIGHTS)
+    now = time.time()
+    half_life_seconds = RECENCY_HALF_LIFE_DAYS * 86400.0
+    try:
+        candidates = conn.execute(
+            f"SELECT rowid, bm25(items_fts, {weights}) AS b FROM items_fts "
+            "WHERE items_fts MATCH ? ORDER BY b LIMIT ?",
+            (match, max(MIN_CANDIDATES, limit * CANDIDATES_PER_RESULT)),
+        ).fetchall()
+        if not candidates:
+            return {"results": [], "took_ms": round((time.perf_counter() - started) * 1000, 2)}
+
+        placeholders = ",".join("?" * len(candidates))
+        timestamps = dict(conn.execute(
+            f"SELECT rowid, ts FROM items WHERE rowid IN ({placeholders})",
+            [rowid for rowid, _ in candidates],
+        ).fetchall())
+        scored = sorted(
+            (
+                -bm25 + RECENCY_WEIGHT / (1.0 + max(0.0, now - timestamps.get(rowid, 0.0)) / half_life_seconds),
+                rowid,
+            )
+            for rowid, bm25 in candidates
+        )
+        top = [(score, rowid) for score, rowid in reversed(scored[-limit:])]
+
+        placeholders = ",".join("?" * len(top))
+        top_ids = [rowid for _, rowid in top]
+        payloads = dict(conn.execute(
+            f"SELECT rowid, payload FROM items WHERE rowid IN ({placeholders})", top_ids
+        ).fetchall())
+        snippets = dict(conn.execute(
+            f"SELECT rowid, snippet(items_fts, -1, '[', ']', '...', 12) FROM items_fts "
+            f"WHERE items_fts MATCH ? AND rowid IN ({placeholders})",
+            [match] + top_ids,
+        ).fetchall())
+    except sqlite3.OperationalError as e:
+        print(f"Search query failed: {e}")
+        return {"results": [], "took_ms": round((time.perf_counter() - started) * 1000, 2)}
+    finally:
+        conn.close()
+
+    results = []
+    for score, rowid in top:
+        item = json.loads(payloads[rowid])
+        results.append({
+            "id": item.get("id", ""),
+            "source": item.get("source", ""),
+            "title": item.get("title", ""),
+            "snippet": snippets.get(rowid, ""),
+            "timestamp": item.get("timestamp", ""),
+            "participants": item.get("participants", []),
+            "score": round(score, 4),
+        })
+    return {"results": results, "took_ms": round((time.perf_counter() - started) * 1000, 2)}
@@ -0,0 +1,86 @@
+"""
+Secondary indexes over the prioritized task list
+Lets /api/tasks filter by priority, source, context and deadline without rescanning
+"""
+
+from bisect import bisect_left, bisect_right
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+
+class TaskIndex:
+    """
+    Read-only index over a task list sorted by descending priority.
+
+    Positions refer to the original list, so filtered results keep
+    priority order. Built once per data version and cached.
+    """
+
+    def __init__(self, tasks: List[Dict[str, Any]]):
+        self.tasks = tasks
+        self._neg_priorities = [-(t.get("priority_score") or 0) for t in tasks]
+        self._by_source: Dict[str, List[int]] = {}
+        self._by_context: Dict[str, List[int]] = {}
+        dated = []
+        for pos, task in enumerate(tasks):
+            self._by_source.setdefault((task.get("source") or "").lower(), []).append(pos)
+            self._by_context.setdefault((task.get("context") or "").lower(), []).append(pos)
+            if task.get("deadline"):
+                dated.append((task["deadline"][:10], pos))
+        dated.sort()
+        self._deadline_keys = [d for d, _ in dated]
+        self._deadline_positions = [p for _, p in dated]
+        self._sorted_by_priority = all(
+            self._neg_priorities[i] <= self._neg_priorities[i + 1] for i in range(len(tasks) - 1)
+        )
+
+    def _priority_cutoff(self, min_priority: int) -> int:
+        """Number of leading tasks with priority_score >= min_priority"""
+        if self._sorted_by_priority:
+            return bisect_right(self._neg_priorities, -min_priority)
+        return len(self.tasks)
+
+    def filter(
+        self,
+        min_priority: Optional[int] = None,
+        source: Optional[str] = None,
+        context: Optional[str] = None,
+        deadline_from: Optional[date] = None,
+        deadline_to: Optional[date] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Return tasks matching all given filters, in priority order.
+
+        Args:
+            min_priority: Minimum priority_score (inclusive)
+            source: Task source ("calendar" or "email")
+            context: Context name (case-insensitive)
+            deadline_from: Earliest deadline (inclusive)
+            deadline_to: Latest deadline (inclusive)
+
+        Returns:
+            Matching tasks
+        """
+        candidates = None
+        if source is not None:
+            candidates = self._by_source.get(source.lower(), [])
+        if context is not None:
+            by_context = self._by_context.get(context.lower(), [])
+            candidates = by_context if candidates is None else sorted(set(candidates) & set(by_context))
+        if deadline_from is not None or deadline_to is not None:
+            # Keys are YYYY-MM-DD strings, which sort like the dates they name
+            lo = bisect_left(self._deadline_keys, deadline_from.isoformat()) if deadline_from else 0
+            hi = bisect_right(self._deadline_keys, deadline_to.isoformat()) if deadline_to else len(self._deadline_keys)
+            in_range = set(self._deadline_positions[lo:hi])
+            candidates = sorted(in_range) if candidates is None else [p for p in candidates if p in in_range]
+
+        cutoff = len(self.tasks) if min_priority is None else self._priority_cutoff(min_priority)
+        if candidates is None:
+            candidates = range(cutoff)
+        else:
+            candidates = [p for p in candidates if p < cutoff]
+
+        matches = [self.tasks[p] for p in candidates]
+        if min_priority is not None and not self._sorted_by_priority:
+            matches = [t for t in matches if (t.get("priority_score") or 0) >= min_priority]
+        return matches
@@ -0,0 +1,191 @@
+"""
+Thread-aware email aggregation
+Collapses email messages that share a Gmail thread ID into one work unit, so a busy
+thread is one task/context entry instead of one per message
+"""
+
+import hashlib
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from services.data_loader import load_work_items, get_data_fingerprint, parse_timestamp
+from services.responses import dumps
+
+_EPOCH = datetime.min.replace(tzinfo=timezone.utc)
+
+
+def thread_id_of(item: Dict[str, Any]) -> Optional[str]:
+    """Gmail thread ID of an email work item (None for calendar items and unthreaded mail)"""
+    if item.get("source") != "email":
+        return None
+    return (item.get("meta") or {}).get("thread_id") or None
+
+
+def _message_time(item: Dict[str, Any]) -> datetime:
+    return parse_timestamp(item.get("timestamp", "")) or _EPOCH
+
+
+def merge_thread(thread_id: str, messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    One work unit for the messages of a thread.
+
+    The unit takes the title, content and timestamp of the latest message, is
+    unread if any message is, and carries the participant and label unions.
+    A single-message thread is returned unchanged.
+    """
+    if len(messages) == 1:
+        return messages[0]
+
+    ordered = sorted(messages, key=_message_time, reverse=True)
+    latest = ordered[0]
+
+    participants = []
+    seen = set()
+    labels = []
+    unread_count = 0
+    for message in ordered:
+        for participant in message.get("participants") or []:
+            if participant.lower() not in seen:
+                seen.add(participant.lower())
+                participants.append(participant)
+        for label in (message.get("meta") or {}).get("labels") or []:
+            if label not in labels:
+                labels.append(label)
+        if message.get("status") == "unread":
+            unread_count += 1
+
+    return {
+        **latest,
+        "id": f"thread_{thread_id}",
+        "participants": participants,
+        "status": "unread" if unread_count else "read",
+        "meta": {
+            **(latest.get("meta") or {}),
+            "thread_id": thread_id,
+            "labels": labels,
+            "message_count": len(messages),
+            "unread_count": unread_count,
+            "message_ids": [message.get("id", "") for message in ordered],
+        },
+    }
+
+
+def _group_by_thread(work_items: List[Dict[str, Any]]) -> Tuple[List[Any], Dict[str, List[Dict[str, Any]]]]:
+    """(order, messages per thread): order holds unthreaded items and each thread ID once"""
+    threads: Dict[str, List[Dict[str, Any]]] = {}
+    order: List[Any] = []
+    for item in work_items:
+        thread_id = thread_id_of(item)
+        if thread_id is None:
+            order.append(item)
+        elif thread_id in threads:
+            threads[thread_id].append(item)
+        else:
+            threads[thread_id] = [item]
+            order.append(thread_id)
+    return order, threads
+
+
+def aggregate_threads(work_items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Collapse threaded emails into one unit per thread.
+    Calendar items and unthreaded emails pass through; each thread takes the
+    position of its first message. Idempotent on already aggregated lists.
+    """
+    order, threads = _group_by_thread(work_items)
+    return [merge_thread(entry, threads[entry]) if isinstance(entry, str) else entry for entry in order]
+
+
+def _message_key(item: Dict[str, Any]) -> Tuple[str, str]:
+    """
+    Message ID and a digest of the whole message: merge_thread copies the latest
+    message and unions participants and labels, so any field change (an archive
+    or IMPORTANT label from a history sync, say) must re-merge the thread.
+    """
+    digest = hashlib.sha1(dumps(item, sort_keys=True)).hexdigest()
+    return (item.get("id", ""), digest)
+
+
+class ThreadViewCache:
+    """
+    Thread-aggregated work items per user, maintained incrementally on sync.
+
+    Each thread's unit is kept with the (id, content digest) keys of its
+    messages; a sync only re-merges threads whose messages were added, removed
+    or changed. The assembled list is tagged with the user's data fingerprint.
+    """
+
+    def __init__(self):
+        # user_id -> thread_id -> (message keys, unit)
+        self._threads: Dict[str, Dict[str, Tuple[frozenset, Dict[str, Any]]]] = {}
+        # (user_id, use_mock_if_empty) -> (fingerprint, units)
+        self._lists: Dict[Tuple[str, bool], Tuple[Any, List[Dict[str, Any]]]] = {}
+        self.stats = {"hits": 0, "builds": 0, "merged": 0, "reused": 0}
+
+    def refresh(self, user_id: str, work_items: List[Dict[str, Any]], use_mock_if_empty: bool = True) -> List[Dict[str, Any]]:
+        """
+        Rebuild a user's aggregated list from their current work items.
+
+        Args:
+            user_id: User the items belong to
+            work_items: Output of load_work_items(user_id, use_mock_if_empty)
+            use_mock_if_empty: Which load_work_items variant the items came from
+
+        Returns:
+            Work items with threaded emails collapsed, in first-message order
+        """
+        fingerprint = get_data_fingerprint(user_id)
+        previous = self._threads.get(user_id, {})
+        current = {}
+        order, grouped = _group_by_thread(work_items)
+
+        units = []
+        for entry in order:
+            if not isinstance(entry, str):
+                units.append(entry)
+                continue
+            messages = grouped[entry]
+            keys = frozenset(_message_key(message) for message in messages)
+            cached = previous.get(entry)
+            if cached and cached[0] == keys:
+                unit = cached[1]
+                self.stats["reused"] += 1
+            else:
+                unit = merge_thread(entry, messages)
+                self.stats["merged"] += 1
+            current[entry] = (keys, unit)
+            units.append(unit)
+
+        # Threads that aged out of the sync window are dropped
+        self._threads[user_id] = current
+        self._lists[(user_id, use_mock_if_empty)] = (fingerprint, units)
+        self.stats["builds"] += 1
+        return units
+
+    def get(self, user_id: str, use_mock_if_empty: bool = True) -> Optional[List[Dict[str, Any]]]:
+        """Aggregated list for the user's current data, or None if it needs a rebuild"""
+        cached = self._lists.get((user_id, use_mock_if_empty))
+        if cached and cached[0] == get_data_fingerprint(user_id):
+            self.stats["hits"] += 1
+            return cached[1]
+        return None
+
+    def invalidate_user(self, user_id: str) -> None:
+        self._threads.pop(user_id, None)
+        self._lists.pop((user_id, True), None)
+        self._lists.pop((user_id, False), None)
+
+
+thread_views = ThreadViewCache()
+
+
+def load_thread_items(user_id: str, use_mock_if_empty: bool = True) -> List[Dict[str, Any]]:
+    """
+    Work items with each email thread collapsed into one unit.
+    Served from the list built at sync time; rebuilt (reusing unchanged threads)
+    when the data changed outside a sync.
+    """
+    cached = thread_views.get(user_id, use_mock_if_empty)
+    if cached is not None:
+        return cached
+    return thread_views.refresh(user_id, load_work_items(user_id, use_mock_if_empty=use_mock_if_empty), use_mock_if_empty)
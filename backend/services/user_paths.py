@@ -0,0 +1,248 @@
+"""
+Per-user storage layout
+Validates user IDs, resolves hash-sharded data and token paths once, creates directories
+only on write and keeps an index of known users
+"""
+
+import hashlib
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+BASE_DIR = Path(__file__).parent.parent
+DATA_DIR = Path(os.getenv("USER_DATA_DIR", str(BASE_DIR / "data")))
+TOKEN_DIR = Path(os.getenv("USER_TOKEN_DIR", str(BASE_DIR / "tokens")))
+
+SHARD_CHARS = 2
+USER_INDEX_FILE = "users.idx"
+
+# Firebase UIDs, emails and test IDs like "user_test_a"; no path separators or leading dots
+_USER_ID_RE = re.compile(r"^[A-Za-z0-9_@-][A-Za-z0-9_.@-]{0,127}$")
+
+# Names the layout itself uses at the data root (a legacy user dir would collide with them);
+# push_addresses.json belongs to services.push_sync
+RESERVED_USER_IDS = frozenset({
+    "users", USER_INDEX_FILE, "users.tmp",
+    "push_addresses.json", "push_addresses.json.tmp",
+})
+
+# Resolved paths kept per layout (entries are tiny; 100k users is a few MB)
+MAX_CACHED_USERS = 200000
+
+
+class InvalidUserIdError(ValueError):
+    """Raised for user IDs that are not safe to use as directory names"""
+
+
+def validate_user_id(user_id: str) -> str:
+    """
+    Check that a user ID can safely name a directory.
+
+    Raises:
+        InvalidUserIdError: If the ID is empty, too long, has unsafe characters
+            or is a reserved layout name
+    """
+    if not user_id or not _USER_ID_RE.match(user_id) or user_id in RESERVED_USER_IDS:
+        raise InvalidUserIdError("Invalid user ID")
+    return user_id
+
+
+def shard_for(user_id: str) -> str:
+    """Shard directory name for a user (hex prefix of the ID's SHA-1)"""
+    return hashlib.sha1(user_id.encode("utf-8")).hexdigest()[:SHARD_CHARS]
+
+
+class StorageLayout:
+    """
+    Where each user's data and OAuth token live.
+
+    Sharded layout:
+        <data_root>/users/<shard>/<user_id>/   synced data, indexes, briefings
+        <token_root>/<shard>/<user_id>.json    OAuth token
+        <data_root>/users.idx                  known user IDs, one per line
+
+    Deployments that predate sharding keep working: an existing
+    <data_root>/<user_id>/ directory or <legacy_token_root>/token_<user_id>.json
+    is used until migrate_storage.py moves it.
+    """
+
+    def __init__(self, data_root: Path, token_root: Path, legacy_token_root: Optional[Path] = None):
+        self.data_root = data_root
+        self.users_root = data_root / "users"
+        self.token_root = token_root
+        self.legacy_token_root = legacy_token_root
+        self.index_file = data_root / USER_INDEX_FILE
+        self._dirs: Dict[str, Path] = {}
+        self._tokens: Dict[str, Path] = {}
+        self._created: Set[Path] = set()
+        self._known: Optional[Set[str]] = None
+        # (mtime_ns, size) of the index when _known was read; other workers append to it too
+        self._index_stamp: Optional[Tuple[int, int]] = None
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Path resolution (no filesystem writes)
+    # ------------------------------------------------------------------
+
+    def sharded_user_dir(self, user_id: str) -> Path:
+        return self.users_root / shard_for(user_id) / user_id
+
+    def sharded_token_file(self, user_id: str) -> Path:
+        return self.token_root / shard_for(user_id) / f"{user_id}.json"
+
+    def legacy_user_dir(self, user_id: str) -> Path:
+        return self.data_root / user_id
+
+    def legacy_token_file(self, user_id: str) -> Optional[Path]:
+        return self.legacy_token_root / f"token_{user_id}.json" if self.legacy_token_root else None
+
+    def user_dir(self, user_id: str) -> Path:
+        """A user's data directory (may not exist yet)"""
+        path = self._dirs.get(user_id)
+        if path is None:
+            validate_user_id(user_id)
+            legacy = self.legacy_user_dir(user_id)
+            path = legacy if legacy.is_dir() else self.sharded_user_dir(user_id)
+            self._remember(self._dirs, user_id, path)
+        return path
+
+    def token_file(self, user_id: str) -> Path:
+        """A user's OAuth token file (may not exist yet)"""
+        path = self._tokens.get(user_id)
+        if path is None:
+            validate_user_id(user_id)
+            legacy = self.legacy_token_file(user_id)
+            path = legacy if legacy is not None and legacy.is_file() else self.sharded_token_file(user_id)
+            self._remember(self._tokens, user_id, path)
+        return path
+
+    def _remember(self, cache: Dict[str, Path], user_id: str, path: Path) -> None:
+        if len(cache) >= MAX_CACHED_USERS:
+            cache.clear()
+        cache[user_id] = path
+
+    def forget(self, user_id: str) -> None:
+        """Drop cached resolutions and created-directory marks for a user (after moving their files)"""
+        self._dirs.pop(user_id, None)
+        self._tokens.pop(user_id, None)
+        # Token parents are shared shard directories; only the user's own directories are unmarked
+        self._created.discard(self.legacy_user_dir(user_id))
+        self._created.discard(self.sharded_user_dir(user_id))
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def _ensure(self, directory: Path) -> None:
+        if directory not in self._created:
+            directory.mkdir(parents=True, exist_ok=True)
+            self._created.add(directory)
+
+    def ensure_user_dir(self, user_id: str) -> Path:
+        """Create a user's data directory if needed and record the user; call before writing"""
+        path = self.user_dir(user_id)
+        self._ensure(path)
+        self.register_user(user_id)
+        return path
+
+    def ensure_token_file(self, user_id: str) -> Path:
+        """Token path with its parent directory created; call before writing the token"""
+        path = self.token_file(user_id)
+        self._ensure(path.parent)
+        self.register_user(user_id)
+        return path
+
+    # ------------------------------------------------------------------
+    # Known-user index
+    # ------------------------------------------------------------------
+
+    def known_users(self) -> List[str]:
+        """All users that have written data or a token, from the index file"""
+        with self._lock:
+            return sorted(self._load_index())
+
+    def _stat_index(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = self.index_file.stat()
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _load_index(self) -> Set[str]:
+        """Known users, re-read whenever the index file changed (e.g. another worker registered a user)"""
+        stamp = self._stat_index()
+        if self._known is None or stamp != self._index_stamp:
+            known = set()
+            if stamp is not None:
+                with open(self.index_file, "r") as f:
+                    known = {line.strip() for line in f if line.strip()}
+            self._known = known
+            self._index_stamp = stamp
+        return self._known
+
+    def register_user(self, user_id: str) -> None:
+        """Append a user to the index (idempotent; duplicates from other workers are ignored on read)"""
+        with self._lock:
+            known = self._load_index()
+            if user_id in known:
+                return
+            self.data_root.mkdir(parents=True, exist_ok=True)
+            with open(self.index_file, "a") as f:
+                f.write(user_id + "\n")
+            # The stamp is left as is, so the next read also picks up other workers' appends
+            known.add(user_id)
+
+    def rebuild_index(self) -> int:
+        """Rewrite the index from the users found on disk; returns the user count"""
+        users = {user_id for user_id, _ in self.iter_user_dirs()}
+        if self.token_root.is_dir():
+            users.update(f.stem for shard in self.token_root.iterdir() if shard.is_dir() for f in shard.glob("*.json"))
+        users.update(user_id for user_id, _ in self.iter_legacy_tokens())
+        self.data_root.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.index_file.with_suffix(".tmp")
+        with open(tmp_file, "w") as f:
+            f.writelines(user_id + "\n" for user_id in sorted(users))
+        os.replace(tmp_file, self.index_file)
+        with self._lock:
+            self._known = set(users)
+            self._index_stamp = self._stat_index()
+        return len(users)
+
+    # ------------------------------------------------------------------
+    # Enumeration (migration and index rebuilds only; the scheduler uses the index)
+    # ------------------------------------------------------------------
+
+    def iter_user_dirs(self) -> Iterator[Tuple[str, Path]]:
+        """(user_id, directory) for every user directory, sharded or legacy"""
+        if self.users_root.is_dir():
+            for shard in self.users_root.iterdir():
+                if shard.is_dir():
+                    for path in shard.iterdir():
+                        if path.is_dir():
+                            yield path.name, path
+        yield from self.iter_legacy_dirs()
+
+    def iter_legacy_dirs(self) -> Iterator[Tuple[str, Path]]:
+        if self.data_root.is_dir():
+            for path in self.data_root.iterdir():
+                if path.is_dir() and path.name not in RESERVED_USER_IDS and _USER_ID_RE.match(path.name):
+                    yield path.name, path
+
+    def iter_legacy_tokens(self) -> Iterator[Tuple[str, Path]]:
+        if self.legacy_token_root and self.legacy_token_root.is_dir():
+            for path in self.legacy_token_root.glob("token_*.json"):
+                user_id = path.name[len("token_"):-len(".json")]
+                if _USER_ID_RE.match(user_id) and user_id not in RESERVED_USER_IDS:
+                    yield user_id, path
+
+
+# Layout used by the application (legacy tokens lived next to main.py)
+storage = StorageLayout(DATA_DIR, TOKEN_DIR, legacy_token_root=BASE_DIR)
+
+user_dir = storage.user_dir
+token_file = storage.token_file
+ensure_user_dir = storage.ensure_user_dir
+ensure_token_file = storage.ensure_token_file
+known_users = storage.known_users
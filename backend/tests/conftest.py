@@ -0,0 +1,18 @@
+"""
+Shared pytest setup
+Makes the backend's modules importable and keeps user data and tokens in a throwaway directory
+"""
+
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+_tmp_root = tempfile.mkdtemp(prefix="dashboard-tests-")
+atexit.register(shutil.rmtree, _tmp_root, ignore_errors=True)
+os.environ.setdefault("USER_DATA_DIR", os.path.join(_tmp_root, "data"))
+os.environ.setdefault("USER_TOKEN_DIR", os.path.join(_tmp_root, "tokens"))
@@ -0,0 +1,68 @@
+import asyncio
+import os
+import time
+
+from services import briefings
+from services.data_loader import get_user_calendar_file
+from services.llm_gateway import QueueFullError
+from services.user_paths import ensure_user_dir
+
+
+def generator(calls):
+    async def generate(user_id):
+        calls.append(user_id)
+        return {"briefing": f"Focus, {user_id}", "model": "test"}
+    return generate
+
+
+def test_refresh_generates_once_until_data_changes():
+    calls = []
+    ensure_user_dir("brief-user")
+    assert asyncio.run(briefings.refresh_briefing("brief-user", generator(calls))) == "generated"
+    assert asyncio.run(briefings.refresh_briefing("brief-user", generator(calls))) == "fresh"
+    assert calls == ["brief-user"]
+    assert briefings.load_briefing("brief-user")["briefing"] == "Focus, brief-user"
+
+    get_user_calendar_file("brief-user").write_text("[]")
+    assert asyncio.run(briefings.refresh_briefing("brief-user", generator(calls))) == "generated"
+
+
+def test_refresh_defers_when_gateway_is_full():
+    async def full(user_id):
+        raise QueueFullError("full", retry_after=1)
+
+    assert asyncio.run(briefings.refresh_briefing("deferred-user", full, force=True)) == "deferred"
+    assert briefings.load_briefing("deferred-user") is None
+
+
+def test_batch_counts_outcomes():
+    calls = []
+    result = asyncio.run(briefings.run_briefing_batch(generator(calls), user_ids=["batch-a", "batch-b"], force=True))
+    assert result["users"] == 2 and result["outcomes"] == {"generated": 2}
+    assert sorted(calls) == ["batch-a", "batch-b"]
+
+
+def test_active_users_ignore_files_written_by_the_batch():
+    old = time.time() - 30 * 86400
+    for user_id in ("idle-user", "synced-user"):
+        calendar_file = ensure_user_dir(user_id) / "calendar.json"
+        calendar_file.write_text("[]")
+        os.utime(calendar_file, (old, old))
+        briefings.save_briefing(user_id, {"briefing": "x"})
+    get_user_calendar_file("synced-user").write_text("[]")
+
+    active = briefings.list_active_users()
+    assert "synced-user" in active
+    assert "idle-user" not in active
+
+    briefings.mark_active("idle-user")
+    assert "idle-user" in briefings.list_active_users()
+
+
+def test_admin_token(monkeypatch):
+    monkeypatch.setattr(briefings, "BRIEFING_ADMIN_TOKEN", "")
+    assert not briefings.verify_admin_token("")
+    monkeypatch.setattr(briefings, "BRIEFING_ADMIN_TOKEN", "secret")
+    assert briefings.verify_admin_token("secret")
+    assert not briefings.verify_admin_token("wrong")
+    assert not briefings.verify_admin_token(None)
@@ -0,0 +1,77 @@
+from datetime import date, datetime
+from zoneinfo import ZoneInfo
+
+from services.calendar_analytics import (
+    WORK_DAY_END_HOUR, WORK_DAY_START_HOUR, analyze_calendar, back_to_back_chains, busy_by_day,
+    day_free_blocks, find_conflicts, parse_events,
+)
+
+BERLIN = ZoneInfo("Europe/Berlin")
+
+
+def meeting(item_id, start, end, participants=()):
+    return {
+        "id": item_id,
+        "source": "calendar",
+        "title": item_id,
+        "timestamp": start,
+        "deadline": end,
+        "participants": list(participants),
+    }
+
+
+def test_parse_events_sorts_events_with_different_offsets():
+    # Same instant in two offsets: ties on (start, end, day) must not compare tzinfo
+    events = parse_events([
+        meeting("b", "2026-03-02T10:00:00+02:00", "2026-03-02T11:00:00+02:00"),
+        meeting("a", "2026-03-02T09:00:00+01:00", "2026-03-02T10:00:00+01:00"),
+    ])
+    assert [e.item_id for e in events] == ["a", "b"]
+
+
+def test_parse_events_skips_all_day_and_zero_length():
+    events = parse_events([
+        meeting("all-day", "2026-03-02", "2026-03-03"),
+        meeting("marker", "2026-03-02T09:00:00+00:00", "2026-03-02T09:00:00+00:00"),
+        meeting("timed", "2026-03-02T09:00:00+00:00", "2026-03-02T09:30:00+00:00"),
+    ])
+    assert [e.item_id for e in events] == ["timed"]
+
+
+def test_conflicts_and_back_to_back_chains():
+    events = parse_events([
+        meeting("a", "2026-03-02T09:00:00+00:00", "2026-03-02T10:00:00+00:00"),
+        meeting("b", "2026-03-02T09:30:00+00:00", "2026-03-02T10:30:00+00:00"),
+        meeting("c", "2026-03-02T10:32:00+00:00", "2026-03-02T11:00:00+00:00"),
+        meeting("d", "2026-03-02T14:00:00+00:00", "2026-03-02T15:00:00+00:00"),
+    ])
+    count, examples = find_conflicts(events)
+    assert count == 1
+    assert [(x.item_id, y.item_id) for x, y in examples] == [("a", "b")]
+    assert [[e.item_id for e in chain] for chain in back_to_back_chains(events)] == [["a", "b", "c"]]
+
+
+def test_analyze_calendar_handles_mixed_offsets():
+    summary = analyze_calendar([
+        meeting("b", "2026-03-02T10:00:00+02:00", "2026-03-02T11:00:00+02:00"),
+        meeting("a", "2026-03-02T09:00:00+01:00", "2026-03-02T10:00:00+01:00"),
+    ])
+    assert summary["events"] == 2
+    assert summary["conflicts"] == 1
+
+
+def test_free_blocks_follow_dst_in_a_real_zone():
+    # Berlin switches to summer time on 2026-03-29; working hours stay local on both sides
+    for day in (date(2026, 3, 27), date(2026, 3, 30)):
+        [(start, end)] = day_free_blocks([], day, BERLIN)
+        assert datetime.fromtimestamp(start, BERLIN).hour == WORK_DAY_START_HOUR
+        assert datetime.fromtimestamp(end, BERLIN).hour == WORK_DAY_END_HOUR
+
+
+def test_busy_by_day_buckets_by_date_in_the_zone():
+    # 23:30 UTC on the 30th is already the 31st in Berlin (UTC+2 after the change)
+    events = parse_events([
+        meeting("late", "2026-03-30T23:30:00+00:00", "2026-03-31T00:30:00+00:00"),
+    ])
+    assert list(busy_by_day(events, BERLIN)) == [date(2026, 3, 31)]
+    assert list(busy_by_day(events)) == [date(2026, 3, 30), date(2026, 3, 31)]
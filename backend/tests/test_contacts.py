@@ -0,0 +1,47 @@
+from services.contacts import ContactIndex, parse_participant, participant_label, split_address_header
+
+
+def item(item_id, source, participants, timestamp):
+    return {"id": item_id, "source": source, "participants": participants, "timestamp": timestamp}
+
+
+def test_parse_participant_normalizes_addresses():
+    assert parse_participant('"Doe, Jane" <Jane.Doe@Example.com>') == ("jane.doe@example.com", "Doe, Jane")
+    assert parse_participant("bo@example.com") == ("bo@example.com", "")
+    assert parse_participant("  Team ") == ("team", "")
+    assert participant_label("Jane <jane@example.com>") == "jane"
+
+
+def test_split_address_header_keeps_commas_inside_quoted_names():
+    header = '"Doe, Jane" <jane@example.com>, bo@example.com,, Ana Diaz <ana@example.com>'
+    assert split_address_header(header) == [
+        '"Doe, Jane" <jane@example.com>', "bo@example.com", "Ana Diaz <ana@example.com>",
+    ]
+    assert split_address_header("") == []
+
+
+def build_index():
+    return ContactIndex([
+        item("m1", "email", ["Jane <jane@x.com>", "me@x.com"], "2026-03-01T09:00:00Z"),
+        item("m2", "email", ["bo@x.com", "ME@x.com", "JANE@x.com"], "2026-03-03T09:00:00Z"),
+        item("c1", "calendar", ["bo@x.com", "me@x.com"], "2026-03-02T09:00:00Z"),
+        item("c2", "calendar", ["jane@x.com", "me@x.com"], "2026-03-04T09:00:00Z"),
+    ])
+
+
+def test_index_counts_contacts_and_excludes_the_user():
+    index = build_index()
+    assert index.self_addresses == {"me@x.com"}
+    assert [c.address for c in index.top()] == ["jane@x.com", "bo@x.com"]
+    assert [c.address for c in index.top("emails")] == ["jane@x.com", "bo@x.com"]
+    jane = index.contacts["jane@x.com"]
+    assert (jane.name, jane.meetings, jane.emails, jane.sent) == ("Jane", 1, 2, 1)
+
+
+def test_lookup_and_items_for_a_contact():
+    index = build_index()
+    jane = index.lookup("jane")
+    assert jane is index.lookup("Jane <JANE@x.com>")
+    assert [i["id"] for i in index.items_for(jane)] == ["c2", "m2", "m1"]
+    assert [i["id"] for i in index.items_for(jane, role="from")] == ["m1"]
+    assert index.lookup("nobody") is None
@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta, timezone
+
+from services import context_graph
+from services.context_graph import ContextGraph, _context_urgency, context_views, detect_contexts, subject_terms
+from services.derived_cache import derived_cache
+
+
+def item(item_id, participants, title, source="email", status="read", deadline=""):
+    return {
+        "id": item_id,
+        "source": source,
+        "title": title,
+        "participants": participants,
+        "status": status,
+        "timestamp": "2026-03-02T09:00:00+00:00",
+        "deadline": deadline,
+    }
+
+
+ITEMS = [
+    item("e1", ["me@x.com", "ann@x.com", "bob@x.com"], "Budget review"),
+    item("e2", ["me@x.com", "ann@x.com", "bob@x.com"], "Re: Budget review numbers"),
+    item("e3", ["me@x.com", "ann@x.com", "bob@x.com"], "Forecast"),
+    item("e4", ["me@x.com", "cat@y.com", "dan@y.com"], "Launch plan"),
+    item("e5", ["me@x.com", "cat@y.com", "dan@y.com"], "Launch checklist"),
+    item("e6", ["me@x.com", "cat@y.com", "dan@y.com"], "Press kit"),
+    item("e7", ["me@x.com", "eve@z.com"], "Invoice"),
+    item("e8", ["me@x.com", "fay@z.com"], "Lunch"),
+]
+
+
+def test_subject_terms_drop_reply_prefixes_and_noise():
+    assert subject_terms("RE: Fwd: Budget meeting") == ["budget"]
+
+
+def test_apply_is_incremental():
+    graph = ContextGraph()
+    assert graph.apply(ITEMS) == {"added": 8, "updated": 0, "removed": 0, "unchanged": 0}
+    changed = ITEMS[:5] + [item("e6", ["cat@y.com", "gus@y.com"], "Press kit")] + ITEMS[6:]
+    assert graph.apply(changed) == {"added": 0, "updated": 1, "removed": 0, "unchanged": 7}
+    assert graph.edges["cat@y.com\tdan@y.com"] == 2
+    assert graph.apply(changed[:3]) == {"added": 0, "updated": 0, "removed": 5, "unchanged": 3}
+    assert set(graph.items) == {"e1", "e2", "e3"}
+    assert "cat@y.com\tdan@y.com" not in graph.edges
+
+
+def test_clusters_group_people_who_work_together():
+    graph = ContextGraph()
+    graph.apply(ITEMS)
+    assert sorted(sorted(ids) for ids in graph.clusters())[:2] == [["e1", "e2", "e3"], ["e4", "e5", "e6"]]
+
+
+def test_round_trip_keeps_counts():
+    graph = ContextGraph()
+    graph.apply(ITEMS)
+    restored = ContextGraph.from_dict(graph.to_dict())
+    assert restored.participant_counts == graph.participant_counts
+    assert restored.term_counts == graph.term_counts
+
+
+def test_urgency_and_next_change():
+    now = datetime(2026, 3, 2, 12, tzinfo=timezone.utc)
+    ends = [now - timedelta(days=1), now + timedelta(days=5), now + timedelta(days=9)]
+    assert _context_urgency(0, ends, now) == ("medium", "2026-03-07", now + timedelta(days=3))
+    soon = [now + timedelta(hours=3)]
+    assert _context_urgency(0, soon, now) == ("high", "2026-03-02", soon[0])
+    assert _context_urgency(2, [], now) == ("high", "", None)
+
+
+def test_detect_contexts_serves_cached_clusters(monkeypatch):
+    user_id = "ctx-user"
+    context_views.refresh(user_id, ITEMS)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("graph re-applied on the request path")
+
+    monkeypatch.setattr(context_graph, "update_context_graph", fail)
+    contexts = detect_contexts(user_id)
+    assert sorted(c["related_items_total"] for c in contexts) == [3, 3]
+    assert all(c["urgency"] == "medium" and c["deadline"] == "" for c in contexts)
+
+
+def test_detect_contexts_expires_when_meeting_nears():
+    user_id = "ctx-meeting-user"
+    end = datetime.now(timezone.utc) + timedelta(days=5)
+    meetings = [
+        item(f"m{i}", ["ann@x.com", "bob@x.com"], "Budget sync", source="calendar", deadline=end.isoformat())
+        for i in range(2)
+    ]
+    context_views.refresh(user_id, meetings)
+    derived_cache.get_or_compute(user_id, "contexts", "v1", lambda: detect_contexts(user_id))
+    assert derived_cache._entries[(user_id, "contexts")].expires_at == (end - timedelta(days=2)).timestamp()
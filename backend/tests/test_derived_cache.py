@@ -0,0 +1,122 @@
+from datetime import date, datetime, time
+
+from services.derived_cache import DerivedCache, deadline_priority, next_deadline_crossing
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def counting(value):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return value
+    return compute, calls
+
+
+def test_next_deadline_crossing_is_the_nearest_threshold_midnight():
+    today = date(2026, 3, 2)
+    # 2026-03-10 crosses 7 days out on 03-03; 2026-03-04 crosses 1 day out on 03-03 too
+    crossing = next_deadline_crossing(["2026-03-10", "2026-03-04T12:00:00", "", "bad"], today)
+    assert crossing == datetime.combine(date(2026, 3, 3), time.min).astimezone().timestamp()
+    assert next_deadline_crossing(["2026-03-02", "2026-02-01"], today) is None
+    assert [deadline_priority(d) for d in (0, 2, 5, 30)] == [85, 70, 60, 50]
+
+
+def test_views_recompute_on_expiry_and_fingerprint_change():
+    clock = Clock()
+    cache = DerivedCache(clock=clock)
+    compute, calls = counting(["a"])
+
+    def expiring():
+        cache.expire_at(1060.0)
+        return compute()
+
+    cache.get_or_compute("u", "tasks", "v1", expiring)
+    cache.get_or_compute("u", "tasks", "v1", expiring)
+    assert len(calls) == 1
+    clock.now = 1060.0
+    cache.get_or_compute("u", "tasks", "v1", expiring)
+    assert len(calls) == 2
+    cache.get_or_compute("u", "tasks", "v2", expiring)
+    assert len(calls) == 3
+    assert cache.stats()["hits"] == 1
+
+
+def test_composite_views_inherit_the_inner_expiry():
+    cache = DerivedCache(clock=Clock())
+
+    def tasks():
+        cache.expire_at(1500.0)
+        return ["a"]
+
+    cache.get_or_compute("u", "load", "v1", lambda: len(cache.get_or_compute("u", "tasks", "v1", tasks)))
+    assert cache.expires_at("u", "load") == 1500.0
+
+    # Cached inner views still propagate their expiry to a new outer view
+    cache.get_or_compute("u", "insights", "v1", lambda: cache.get_or_compute("u", "tasks", "v1", tasks))
+    assert cache.expires_at("u", "insights") == 1500.0
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = DerivedCache(max_entries=2, clock=Clock())
+    cache.get_or_compute("u", "a", "v1", lambda: 1)
+    cache.get_or_compute("u", "b", "v1", lambda: 2)
+    cache.get_or_compute("u", "a", "v1", lambda: 1)
+    cache.get_or_compute("u", "c", "v1", lambda: 3)
+    assert cache.peek("u", "b", "v1") is None
+    assert cache.peek("u", "a", "v1") == (1, 0.0)
+
+
+def test_peek_reports_staleness_from_the_data_change():
+    clock = Clock()
+    cache = DerivedCache(clock=clock)
+    cache.get_or_compute("u", "tasks", "v1", lambda: ["a"])
+
+    clock.now = 1100.0
+    # Data rewritten at 1050; first read at 1100 must not restart the age at 0
+    assert cache.peek("u", "tasks", "v2", changed_at=1050.0) == (["a"], 50.0)
+    clock.now = 1130.0
+    assert cache.peek("u", "tasks", "v2", changed_at=1050.0) == (["a"], 80.0)
+
+
+def test_peek_never_dates_staleness_before_the_value_was_computed():
+    clock = Clock()
+    cache = DerivedCache(clock=clock)
+    cache.get_or_compute("u", "tasks", "v1", lambda: ["a"])
+    clock.now = 1010.0
+    assert cache.peek("u", "tasks", "v2", changed_at=900.0) == (["a"], 10.0)
+
+
+def test_peek_without_change_time_counts_from_first_read():
+    clock = Clock()
+    cache = DerivedCache(clock=clock)
+    cache.get_or_compute("u", "tasks", "v1", lambda: ["a"])
+    clock.now = 1100.0
+    assert cache.peek("u", "tasks", "v2") == (["a"], 0.0)
+    clock.now = 1120.0
+    assert cache.peek("u", "tasks", "v2") == (["a"], 20.0)
+
+
+def test_invalidated_views_are_stale_from_the_data_change():
+    clock = Clock()
+    cache = DerivedCache(clock=clock)
+    cache.get_or_compute("u", "tasks", "v1", lambda: ["a"])
+    clock.now = 1200.0
+    cache.invalidate_user("u", keep_stale=True)
+    clock.now = 1210.0
+    assert cache.peek("u", "tasks", "v1", changed_at=1150.0) == (["a"], 60.0)
+    assert cache.stats()["stale_hits"] == 1
+
+
+def test_current_values_are_not_stale():
+    cache = DerivedCache(clock=Clock())
+    cache.get_or_compute("u", "tasks", "v1", lambda: ["a"])
+    assert cache.peek("u", "tasks", "v1", changed_at=999.0) == (["a"], 0.0)
+    assert cache.peek("u", "missing", "v1") is None
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from services import embedding_index
+
+WORDS = ["budget", "hiring", "launch", "travel"]
+
+
+def fake_embed(calls):
+    def embed(texts, model=None):
+        calls.append(list(texts))
+        vectors = [[text.lower().count(word) for word in WORDS] for text in texts]
+        return embedding_index._normalize(np.asarray(vectors, dtype=np.float32))
+    return embed
+
+
+def item(item_id, title):
+    return {"id": item_id, "title": title, "content": ""}
+
+
+def test_update_embeds_only_new_or_changed_items(monkeypatch):
+    calls = []
+    monkeypatch.setattr(embedding_index, "embed_texts", fake_embed(calls))
+    items = [item("a", "Budget review"), item("b", "Hiring plan")]
+    assert embedding_index.update_index("embed-user", items) == {"embedded": 2, "reused": 0, "total": 2}
+
+    items = [item("a", "Budget review"), item("b", "Hiring plan and travel"), item("c", "Launch")]
+    assert embedding_index.update_index("embed-user", items) == {"embedded": 2, "reused": 1, "total": 3}
+    assert calls[-1] == ["Hiring plan and travel", "Launch"]
+
+
+def test_search_ranks_by_cosine_similarity(monkeypatch):
+    calls = []
+    monkeypatch.setattr(embedding_index, "embed_texts", fake_embed(calls))
+    embedding_index.update_index("search-user", [
+        item("a", "Budget budget"), item("b", "Launch"), item("c", "Launch budget"),
+    ])
+    query = fake_embed([])(["launch"])[0]
+    matches = embedding_index.search("search-user", query, k=2)
+    assert [item_id for item_id, _ in matches] == ["b", "c"]
+    assert matches[0][1] == pytest.approx(1.0)
+    assert embedding_index.search("nobody", query) == []
+
+
+def test_raw_work_items_are_refused(monkeypatch):
+    monkeypatch.setattr(embedding_index, "embed_texts", fake_embed([]))
+    with pytest.raises(ValueError):
+        embedding_index.update_index("raw-user", [dict(item("a", "Budget"), participants=["x@y.com"])])
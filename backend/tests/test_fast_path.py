@@ -0,0 +1,42 @@
+from datetime import datetime, timedelta
+
+from services.fast_path import FastPathResponder, answer_meetings, classify_intent
+
+
+def test_classify_common_intents():
+    assert classify_intent("What should I focus on?") == ("focus", 1.0)
+    assert classify_intent("Why is my cognitive load so high?")[0] == "cognitive_load"
+    assert classify_intent("What meetings do I have tomorrow?") == ("meetings_today", 1.0)
+    assert classify_intent("Draft a reply to Ana") == (None, 0.0)
+
+
+def test_specific_questions_fall_below_the_threshold():
+    intent, confidence = classify_intent("What should I focus on for the Q3 budget review?")
+    assert intent == "focus" and confidence < 0.75
+
+
+def test_meetings_answer_lists_all_day_and_timed_events():
+    today = datetime.now().date()
+    start = datetime.combine(today, datetime.min.time()).replace(hour=14).astimezone()
+    items = [
+        {"source": "calendar", "title": "Offsite", "timestamp": today.isoformat(),
+         "deadline": (today + timedelta(days=2)).isoformat()},
+        {"source": "calendar", "title": "Standup", "timestamp": start.isoformat()},
+        {"source": "calendar", "title": "Yesterday", "timestamp": (today - timedelta(days=1)).isoformat()},
+        {"source": "email", "title": "Not a meeting", "timestamp": start.isoformat()},
+    ]
+    views = {"work_items": lambda user_id: items}
+    assert answer_meetings("u", views) == "You have 2 meetings today: Offsite (all day), Standup at 14:00."
+    assert answer_meetings("u", views, "meetings tomorrow?") == "You have 1 meeting tomorrow: Offsite (all day)."
+
+
+def test_responder_answers_known_intents_and_counts_misses():
+    views = {
+        "top_tasks": lambda user_id, k: {"tasks": [{"title": "Ship report", "priority_score": 90}]},
+        "recommendations": lambda user_id: [],
+    }
+    responder = FastPathResponder(views)
+    hit = responder.answer("u", "What should I focus on?")
+    assert hit == {"response": "Focus on 'Ship report' (score 90) first.", "intent": "focus", "confidence": 1.0}
+    assert responder.answer("u", "Draft a reply to Ana") is None
+    assert responder.metrics()["counters"] == {"queries": 2, "hits": 1, "below_threshold": 0, "no_intent": 1}
@@ -0,0 +1,78 @@
+import importlib
+import os
+import shutil
+
+import pytest
+
+from services import google_sync
+from services.google_sync import event_key, merge_calendar_items
+
+PRIMARY = {"id": "me@x.com", "summary": "Me", "primary": True}
+TEAM = {"id": "team@group.x.com", "summary": "Team"}
+
+
+def event(event_id, start, ical_uid=None, status="confirmed"):
+    return {
+        "id": event_id, "iCalUID": ical_uid or f"{event_id}@google.com", "status": status,
+        "summary": event_id, "start": {"dateTime": start}, "end": {"dateTime": start},
+    }
+
+
+def test_events_shared_across_calendars_are_kept_once():
+    shared = "standup@google.com"
+    items = merge_calendar_items([
+        (PRIMARY, [event("a", "2026-03-02T10:00:00Z", shared), event("b", "2026-03-02T09:00:00Z")], None),
+        (TEAM, [event("a-copy", "2026-03-02T10:00:00Z", shared), event("c", "2026-03-02T11:00:00Z")], None),
+    ])
+    assert [i["id"] for i in items] == ["calendar_b", "calendar_a", "calendar_c"]
+    assert items[1]["meta"]["source_calendar_id"] == PRIMARY["id"]
+
+
+def test_recurring_instances_and_cancellations():
+    items = merge_calendar_items([(PRIMARY, [
+        event("r_1", "2026-03-02T10:00:00Z", "weekly@google.com"),
+        event("r_2", "2026-03-09T10:00:00Z", "weekly@google.com"),
+        event("gone", "2026-03-03T10:00:00Z", status="cancelled"),
+    ], None)])
+    assert [i["id"] for i in items] == ["calendar_r_1", "calendar_r_2"]
+    assert event_key(items[0]) != event_key(items[1])
+    assert event_key({"id": "calendar_x", "timestamp": "t"}) == ("calendar_x", "t")
+
+
+def test_failed_calendars_keep_their_stored_items():
+    stored = merge_calendar_items([
+        (PRIMARY, [event("old", "2026-03-01T10:00:00Z")], None),
+        (TEAM, [event("team", "2026-03-02T10:00:00Z")], None),
+    ])
+    # Items synced before source_calendar_id existed match by calendar name
+    del stored[1]["meta"]["source_calendar_id"]
+    items = merge_calendar_items([
+        (PRIMARY, [event("new", "2026-03-03T10:00:00Z")], None),
+        (TEAM, [], "HttpError 503"),
+    ], stored)
+    assert [i["id"] for i in items] == ["calendar_team", "calendar_new"]
+
+
+@pytest.fixture(scope="module")
+def payloads():
+    """The payload benchmark's full-resource fixtures and mask helpers (it repoints USER_DATA_DIR on import)"""
+    data_dir = os.environ["USER_DATA_DIR"]
+    try:
+        module = importlib.import_module("benchmark_sync_payloads")
+    finally:
+        shutil.rmtree(os.environ["USER_DATA_DIR"], ignore_errors=True)
+        os.environ["USER_DATA_DIR"] = data_dir
+    return module
+
+
+def test_field_masks_keep_everything_the_conversions_read(payloads):
+    fixtures = payloads.make_fixtures(calendars=2, events=12, messages=6)
+    event_mask = payloads.parse_mask(google_sync.CALENDAR_EVENT_FIELDS)["items"]
+    message_mask = payloads.parse_mask(google_sync.GMAIL_MESSAGE_FIELDS)
+    calendar = fixtures["calendar_list"][1]
+    for event in fixtures["events"][calendar["id"]]:
+        masked = payloads.apply_mask(event, event_mask)
+        assert google_sync.event_to_work_item(masked, calendar) == google_sync.event_to_work_item(event, calendar)
+    for message in fixtures["messages"].values():
+        masked = payloads.apply_mask(message, message_mask)
+        assert google_sync.message_to_work_item(masked) == google_sync.message_to_work_item(message)
@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+
+from services.llm_gateway import PRIORITY_BACKGROUND, LLMGateway, QueueFullError
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def settle():
+    """Let spawned gateway tasks reach their queue or slot"""
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+async def hold_slot(gateway, release):
+    async def generate():
+        await release.wait()
+        return "held"
+    task = asyncio.ensure_future(gateway.run("holder", generate))
+    await settle()
+    return task
+
+
+def test_waiters_run_by_priority_then_round_robin_across_users():
+    async def scenario():
+        gateway = LLMGateway(max_concurrency=1)
+        release = asyncio.Event()
+        holder = await hold_slot(gateway, release)
+        order = []
+
+        def job(name):
+            async def generate():
+                order.append(name)
+            return generate
+
+        tasks = [
+            asyncio.ensure_future(gateway.run("a", job("a-bg"), priority=PRIORITY_BACKGROUND)),
+            asyncio.ensure_future(gateway.run("a", job("a1"))),
+            asyncio.ensure_future(gateway.run("a", job("a2"))),
+            asyncio.ensure_future(gateway.run("b", job("b1"))),
+        ]
+        await settle()
+        assert gateway.metrics()["queued"] == 4
+        release.set()
+        await asyncio.gather(holder, *tasks)
+        return order, gateway.metrics()
+
+    order, metrics = run(scenario())
+    assert order == ["a1", "b1", "a2", "a-bg"]
+    assert metrics["running"] == 0 and metrics["queued"] == 0
+    assert metrics["counters"]["completed"] == 5
+
+
+def test_admission_control_rejects_with_retry_after():
+    async def scenario():
+        gateway = LLMGateway(max_concurrency=1, max_queue_depth=3, max_queue_per_user=1)
+        release = asyncio.Event()
+        holder = await hold_slot(gateway, release)
+        queued = asyncio.ensure_future(gateway.run("a", release.wait))
+        await settle()
+        with pytest.raises(QueueFullError) as per_user:
+            await gateway.run("a", release.wait)
+        release.set()
+        await asyncio.gather(holder, queued)
+        return per_user.value, gateway.metrics()
+
+    error, metrics = run(scenario())
+    assert error.retry_after >= 1
+    assert metrics["counters"]["rejected"] == 1
+
+
+def test_cancelled_waiters_leave_the_queue():
+    async def scenario():
+        gateway = LLMGateway(max_concurrency=1)
+        release = asyncio.Event()
+        holder = await hold_slot(gateway, release)
+        waiter = asyncio.ensure_future(gateway.run("a", release.wait))
+        await settle()
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        queued_after_cancel = gateway.metrics()["queued"]
+        release.set()
+        await holder
+        return queued_after_cancel, gateway.metrics()
+
+    queued_after_cancel, metrics = run(scenario())
+    assert queued_after_cancel == 0
+    assert metrics["running"] == 0
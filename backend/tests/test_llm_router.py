@@ -0,0 +1,38 @@
+from services.llm_router import LLMRouter, ModelRoute, fallback_answer
+
+
+def router(small_model="small-model"):
+    return LLMRouter(
+        small=ModelRoute("small", "http://small:11434", small_model),
+        large=ModelRoute("large", "http://large:11434", "large-model"),
+    )
+
+
+def test_short_simple_queries_go_to_the_small_model():
+    r = router()
+    assert r.choose("What's next today?").name == "small"
+    assert r.choose("Why is my load so high?").name == "large"
+    assert r.choose(" ".join(["word"] * 13)).name == "large"
+    assert r.metrics()["counters"]["small"] == 1
+    assert r.metrics()["counters"]["large"] == 2
+
+
+def test_identical_routes_collapse_to_the_large_model():
+    r = LLMRouter(
+        small=ModelRoute("small", "http://ollama:11434", "same"),
+        large=ModelRoute("large", "http://ollama:11434", "same"),
+    )
+    assert [route.name for route in r.routes()] == ["large"]
+    assert r.choose("hi").name == "large"
+
+
+def test_fallback_answer_summarizes_the_pipeline_output():
+    answer = fallback_answer(
+        [{"action": "Block focus time", "reason": "Three urgent tasks"}],
+        [{"title": "Ship report", "priority_score": 90, "deadline": "2026-03-02"}],
+        {"score": 72, "status": "high", "active_contexts": 4, "urgent_tasks": 3},
+    )
+    assert "'Ship report' (score 90, due 2026-03-02)" in answer
+    assert "72/100 (high)" in answer
+    assert "Recommended: Block focus time - Three urgent tasks." in answer
+    assert "no work data" in fallback_answer([], [], {})
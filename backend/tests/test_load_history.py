@@ -0,0 +1,41 @@
+from services.load_history import LoadHistory, load_series, load_trend, record_cognitive_load
+from services.user_paths import ensure_user_dir
+
+DAY = 86400
+
+
+def test_ring_buffer_keeps_the_newest_points(tmp_path):
+    history = LoadHistory(tmp_path, capacity=4)
+    for i in range(6):
+        history.append(1000.0 + i, 10 * i, i, 0, 0)
+    assert [p[0] for p in history.raw(0, 10 ** 10)] == [1002.0, 1003.0, 1004.0, 1005.0]
+    assert [p[0] for p in history.raw(1003.0, 1005.0)] == [1003.0, 1004.0]
+    assert len(history.raw(0, 10 ** 10, limit=2)) == 2
+
+
+def test_out_of_order_points_are_clamped_and_values_bounded(tmp_path):
+    history = LoadHistory(tmp_path, capacity=4)
+    history.append(2000.0, 150, -3, 70000, 1)
+    history.append(1500.0, 40, 1, 1, 1)
+    assert history.raw(0, 10 ** 10) == [(2000.0, 100, 0, 0xFFFF, 1), (2000.0, 40, 1, 1, 1)]
+
+
+def test_rollups_aggregate_per_bucket(tmp_path):
+    history = LoadHistory(tmp_path, capacity=2)
+    for moment, score in ((3600.0, 20), (3700.0, 60), (7300.0, 50)):
+        history.append(moment, score, 0, 0, 0)
+    assert history.rollup("hourly", 3650.0, 10 ** 10) == [(3600.0, 80, 2, 20, 60), (7200.0, 50, 1, 50, 50)]
+    assert history.rollup("daily", 0, DAY) == [(0.0, 130, 3, 20, 60)]
+    assert history.rollup("hourly", 0, 7200.0) == [(3600.0, 80, 2, 20, 60)]
+
+
+def test_series_and_trend_for_a_user():
+    assert record_cognitive_load("no-dir-user", {"score": 50}) is False
+    ensure_user_dir("load-user")
+    now = 30 * DAY
+    for day, score in ((20, 40), (21, 40), (26, 60), (27, 60)):
+        assert record_cognitive_load("load-user", {"score": score, "active_contexts": 2}, moment=day * DAY + 60)
+    daily = load_series("load-user", 0, now, "daily")
+    assert [(b["t"], b["score"], b["count"]) for b in daily][:1] == [(20 * DAY, 40.0, 1)]
+    assert load_series("load-user", 26 * DAY, now, "raw")[0]["active_contexts"] == 2
+    assert load_trend("load-user", days=7, now=now) == {"current": 60.0, "previous": 40.0, "change_pct": 50}
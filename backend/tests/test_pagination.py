@@ -0,0 +1,32 @@
+import pytest
+
+from services.pagination import StaleCursorError, data_version, decode_cursor, encode_cursor, paginate
+
+
+def test_pages_walk_the_list_and_end_without_a_cursor():
+    items = list(range(5))
+    version = data_version(("calendar", 1))
+    page, cursor = paginate(items, None, 2, version)
+    seen = list(page)
+    while cursor:
+        page, cursor = paginate(items, cursor, 2, version)
+        seen.extend(page)
+    assert seen == items
+
+
+def test_limit_is_clamped():
+    page, cursor = paginate(list(range(3)), None, 0, "v")
+    assert page == [0] and cursor is not None
+
+
+def test_cursor_from_another_data_version_is_stale():
+    _, cursor = paginate(list(range(5)), None, 2, data_version("old"))
+    with pytest.raises(StaleCursorError):
+        paginate(list(range(5)), cursor, 2, data_version("new"))
+
+
+@pytest.mark.parametrize("cursor", ["not-base64!", encode_cursor(-1, "v"), "YWJj"])
+def test_malformed_cursors_are_rejected(cursor):
+    with pytest.raises(ValueError) as error:
+        decode_cursor(cursor, "v")
+    assert not isinstance(error.value, StaleCursorError)
@@ -0,0 +1,52 @@
+import pytest
+
+from services import privacy
+from services.privacy import SanitizedViewCache, compile_redaction_rules, redact, sanitize_item
+
+
+def test_redact_links_before_addresses_and_phones():
+    text = "See https://x.com/a@b.com or mail ana@example.com, call +1 415 555 0100 or (415) 555-0100"
+    assert redact(text) == "See [link] or mail [email], call [phone] or [phone]"
+    assert redact("Order 20260302 ships in 3-5 days") == "Order 20260302 ships in 3-5 days"
+
+
+def test_unknown_rules_are_rejected():
+    with pytest.raises(ValueError):
+        compile_redaction_rules(["email", "ssn"])
+
+
+def test_configured_rules_replace_the_active_set():
+    active = privacy._redaction_rules
+    try:
+        privacy.configure_redaction(["phone"])
+        assert redact("ana@example.com 415-555-0100") == "ana@example.com [phone]"
+    finally:
+        privacy._redaction_rules = active
+
+
+def test_sanitize_item_keeps_only_safe_fields():
+    item = {
+        "id": "m1", "source": "email", "kind": "email", "title": "Budget", "status": "unread",
+        "timestamp": "2026-03-02T09:00:00Z", "content": "Reply to ana@example.com " + "x" * 300,
+        "participants": ["Ana Diaz <ana@example.com>", "bo@example.com"],
+        "meta": {"labels": ["INBOX", "CATEGORY_PERSONAL"], "location": "Room 4", "thread_id": "t1"},
+    }
+    sanitized = sanitize_item(item)
+    assert sanitized["content"].startswith("Reply to [email] ")
+    assert sanitized["content"].endswith("...") and len(sanitized["content"]) == privacy.CONTENT_PREVIEW_CHARS + 3
+    assert sanitized["participant_count"] == 2
+    assert "participants" not in sanitized
+    assert sanitized["meta"] == {"has_location": True, "labels": ["INBOX"]}
+
+
+def test_view_cache_only_sanitizes_new_or_changed_items():
+    cache = SanitizedViewCache()
+    items = [{"id": "a", "title": "One"}, {"id": "b", "title": "Two"}]
+    first = cache.refresh("privacy-user", items)
+    second = cache.refresh("privacy-user", [items[0], {"id": "b", "title": "Two (edited)"}])
+    assert second[0] is first[0]
+    assert second[1]["title"] == "Two (edited)"
+    assert cache.stats["sanitized"] == 3 and cache.stats["reused"] == 1
+    assert cache.get("privacy-user") is second
+    cache.invalidate_user("privacy-user")
+    assert cache.get("privacy-user") is None
@@ -0,0 +1,38 @@
+from services.prompt_packer import estimate_tokens, pack_prompt_data, query_terms, relevance
+
+
+def task(title, priority):
+    return {"title": title, "priority_score": priority, "status": "not_started"}
+
+
+def test_query_terms_drop_stopwords():
+    terms = query_terms("What should I do about the Budget review?")
+    assert terms == {"budget", "review"}
+    assert relevance(terms, "- Budget sync | due 2026-03-02") == 0.5
+
+
+def test_packing_stays_within_budget_and_keeps_section_order():
+    tasks = [task(f"Task number {i} with a long description", 90 - i) for i in range(40)]
+    packed = pack_prompt_data({"tasks": tasks}, "", token_budget=60)
+    assert packed["tokens_used"] <= 60
+    lines = packed["sections"]["tasks"].split("\n")
+    assert 0 < len(lines) < 40
+    assert lines == sorted(lines, key=lambda line: -int(line[3:5]))
+    assert packed["stats"]["tasks"] == {"packed": len(lines), "available": 40}
+
+
+def test_relevant_items_win_over_higher_priority_ones():
+    tasks = [task("Quarterly planning deck", 90), task("Renew passport", 40)]
+    line_tokens = estimate_tokens("- [40] Renew passport | not_started") + 1
+    packed = pack_prompt_data({"tasks": tasks}, "passport renewal passport", token_budget=line_tokens)
+    assert "passport" in packed["sections"]["tasks"]
+    assert "Quarterly" not in packed["sections"]["tasks"]
+
+
+def test_every_section_gets_its_best_item_first():
+    sections = {
+        "tasks": [task(f"Task {i}", 95) for i in range(20)],
+        "insights": [{"severity": "low", "message": "Few meetings today"}],
+    }
+    packed = pack_prompt_data(sections, "", token_budget=40)
+    assert packed["sections"]["insights"] == "- (low) Few meetings today"
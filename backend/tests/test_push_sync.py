@@ -0,0 +1,92 @@
+import asyncio
+import base64
+import json
+
+import pytest
+
+from services import push_sync
+from services.push_sync import PushSyncScheduler, channel_token, update_push_state, verify_channel_token
+
+
+def calendar_headers(user_id, number, channel_id="chan-1", state="exists"):
+    return {
+        "x-goog-channel-token": channel_token(user_id),
+        "x-goog-channel-id": channel_id,
+        "x-goog-resource-state": state,
+        "x-goog-message-number": str(number),
+    }
+
+
+def gmail_envelope(address, history_id, message_id):
+    data = base64.b64encode(json.dumps({"emailAddress": address, "historyId": history_id}).encode()).decode()
+    return {"message": {"data": data, "messageId": message_id}}
+
+
+def idle_scheduler():
+    """Scheduler whose syncs are recorded instead of started"""
+    scheduler = PushSyncScheduler()
+    scheduled = []
+    scheduler.schedule = lambda user_id, source: scheduled.append((user_id, source)) or "scheduled"
+    return scheduler, scheduled
+
+
+def test_channel_tokens_are_signed_per_user():
+    token = channel_token("push-user")
+    assert verify_channel_token(token) == "push-user"
+    assert verify_channel_token(token.replace("push-user", "other-user")) is None
+    assert verify_channel_token("push-user:forged") is None
+    assert verify_channel_token(None) is None
+
+
+def test_calendar_notifications_drop_handshakes_replays_and_old_channels():
+    update_push_state("push-user", calendar={"channels": {"primary": {"channel_id": "chan-1"}}})
+    scheduler, scheduled = idle_scheduler()
+    assert scheduler.handle_calendar(calendar_headers("push-user", 1, state="sync"))["status"] == "ignored"
+    assert scheduler.handle_calendar(calendar_headers("push-user", 2))["status"] == "scheduled"
+    assert scheduler.handle_calendar(calendar_headers("push-user", 2))["status"] == "duplicate"
+    assert scheduler.handle_calendar(calendar_headers("push-user", 3, channel_id="old"))["status"] == "ignored"
+    assert scheduled == [("push-user", "calendar")]
+    with pytest.raises(PermissionError):
+        scheduler.handle_calendar(dict(calendar_headers("push-user", 4), **{"x-goog-channel-token": "x:y"}))
+
+
+def test_gmail_notifications_drop_redeliveries_and_synced_history():
+    push_sync._set_address("Push@Example.com", "gmail-user")
+    update_push_state("gmail-user", gmail={"history_id": "100"})
+    scheduler, scheduled = idle_scheduler()
+    assert scheduler.handle_gmail(gmail_envelope("push@example.com", 101, "m1"))["status"] == "scheduled"
+    assert scheduler.handle_gmail(gmail_envelope("push@example.com", 101, "m1"))["status"] == "duplicate"
+    assert scheduler.handle_gmail(gmail_envelope("push@example.com", 99, "m2"))["status"] == "duplicate"
+    assert scheduler.handle_gmail(gmail_envelope("nobody@example.com", 500, "m3"))["status"] == "ignored"
+    assert scheduled == [("gmail-user", "gmail")]
+    with pytest.raises(ValueError):
+        scheduler.handle_gmail({"message": {"data": "not json"}})
+
+
+def test_bursts_are_debounced_into_one_sync_plus_one_follow_up():
+    async def scenario():
+        calls = []
+        started = asyncio.Event()
+        release = asyncio.Event()
+        loop = asyncio.get_running_loop()
+
+        def runner(user_id, source):
+            calls.append((user_id, source))
+            loop.call_soon_threadsafe(started.set)
+            asyncio.run_coroutine_threadsafe(release.wait(), loop).result()
+            return {}
+
+        scheduler = PushSyncScheduler(debounce=0.01, runner=runner)
+        statuses = [scheduler.schedule("u", "gmail") for _ in range(3)]
+        await started.wait()
+        # Arrives while the first sync runs: exactly one follow-up
+        statuses += [scheduler.schedule("u", "gmail") for _ in range(2)]
+        release.set()
+        while scheduler._pending:
+            await asyncio.sleep(0.01)
+        return statuses, calls, scheduler.stats
+
+    statuses, calls, stats = asyncio.run(scenario())
+    assert statuses == ["scheduled"] + ["coalesced"] * 4
+    assert calls == [("u", "gmail")] * 2
+    assert stats["syncs"] == 2
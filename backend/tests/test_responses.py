@@ -0,0 +1,19 @@
+import json
+
+from services.responses import dumps, ndjson_lines
+
+
+def test_dumps_is_compact_and_sorts_keys_on_request():
+    assert dumps({"b": 1, "a": [1, 2]}) == b'{"b":1,"a":[1,2]}'
+    assert dumps({"b": 1, "a": 2}, sort_keys=True) == b'{"a":2,"b":1}'
+
+
+def test_ndjson_lines_emit_one_typed_record_per_line():
+    records = iter([("meta", {"total": 2}), ("item", {"id": "a"}), ("item", {"id": "b"})])
+    lines = list(ndjson_lines(records))
+    assert all(line.endswith(b"\n") and line.count(b"\n") == 1 for line in lines)
+    assert [json.loads(line) for line in lines] == [
+        {"type": "meta", "data": {"total": 2}},
+        {"type": "item", "data": {"id": "a"}},
+        {"type": "item", "data": {"id": "b"}},
+    ]
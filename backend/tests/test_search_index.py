@@ -0,0 +1,42 @@
+from services.search_index import build_match_query, search_items, update_search_index
+
+
+def item(item_id, title, content="", source="email", timestamp="2026-03-02T09:00:00+00:00"):
+    return {"id": item_id, "title": title, "content": content, "source": source,
+            "timestamp": timestamp, "participants": ["ana@example.com"]}
+
+
+def ids(result):
+    return [r["id"] for r in result["results"]]
+
+
+def test_match_query_quotes_terms_and_prefixes_the_last():
+    assert build_match_query('budget "review" OR') == '"budget" "review" "or"'
+    assert build_match_query("budget rev") == '"budget" "rev"*'
+    assert build_match_query("q3 pl", source="Email") == '"q3" "pl" source : "email"'
+    assert build_match_query("  ?! ") == ""
+
+
+def test_index_updates_incrementally():
+    items = [item("a", "Budget review"), item("b", "Hiring plan")]
+    assert update_search_index("fts-user", items) == {"added": 2, "updated": 0, "removed": 0, "unchanged": 0}
+    items = [item("a", "Budget review"), item("c", "Launch checklist", source="calendar")]
+    assert update_search_index("fts-user", items) == {"added": 1, "updated": 0, "removed": 1, "unchanged": 1}
+    assert update_search_index("fts-user", [item("a", "Budget final")] + items[1:])["updated"] == 1
+
+    assert ids(search_items("fts-user", "budg")) == ["a"]
+    assert ids(search_items("fts-user", "hiring")) == []
+    assert ids(search_items("fts-user", "launch", source="email")) == []
+    assert search_items("fts-user", "budget")["results"][0]["snippet"] == "[Budget] final"
+
+
+def test_title_matches_rank_above_content_matches():
+    update_search_index("rank-user", [
+        item("body", "Weekly notes", content="the roadmap is attached"),
+        item("title", "Roadmap draft"),
+    ])
+    assert ids(search_items("rank-user", "roadmap")) == ["title", "body"]
+
+
+def test_missing_index_returns_no_results():
+    assert search_items("no-index-user", "anything") == {"results": [], "took_ms": 0.0}
@@ -0,0 +1,40 @@
+from datetime import date
+
+from services.task_index import TaskIndex
+
+
+def task(task_id, priority, source="email", context="", deadline=None):
+    return {"id": task_id, "priority_score": priority, "source": source, "context": context, "deadline": deadline}
+
+
+TASKS = [
+    task("a", 90, "calendar", "Launch", "2026-03-02T10:00:00"),
+    task("b", 80, "email", "launch", "2026-03-05"),
+    task("c", 70, "email", "Hiring"),
+    task("d", 60, "calendar", "Hiring", "2026-03-09"),
+    task("e", 50, "email", "", "2026-03-03"),
+]
+
+
+def ids(tasks):
+    return [t["id"] for t in tasks]
+
+
+def test_filters_combine_and_keep_priority_order():
+    index = TaskIndex(TASKS)
+    assert ids(index.filter()) == ["a", "b", "c", "d", "e"]
+    assert ids(index.filter(min_priority=70)) == ["a", "b", "c"]
+    assert ids(index.filter(source="EMAIL", context="LAUNCH")) == ["b"]
+    assert ids(index.filter(context="hiring", min_priority=65)) == ["c"]
+
+
+def test_deadline_range_is_inclusive_and_skips_undated_tasks():
+    index = TaskIndex(TASKS)
+    assert ids(index.filter(deadline_from=date(2026, 3, 2), deadline_to=date(2026, 3, 5))) == ["a", "b", "e"]
+    assert ids(index.filter(deadline_from=date(2026, 3, 4))) == ["b", "d"]
+    assert ids(index.filter(deadline_to=date(2026, 3, 1))) == []
+
+
+def test_unsorted_input_still_filters_by_priority():
+    index = TaskIndex([task("low", 10), task("high", 90), task("mid", 50)])
+    assert ids(index.filter(min_priority=50)) == ["high", "mid"]
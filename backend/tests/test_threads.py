@@ -0,0 +1,67 @@
+import copy
+
+from services.threads import ThreadViewCache, aggregate_threads, merge_thread
+
+
+def email(message_id, thread_id, timestamp, status="read", labels=("INBOX",), participants=("a@example.com",)):
+    return {
+        "id": f"email_{message_id}",
+        "source": "email",
+        "title": f"Subject {message_id}",
+        "content": f"Body {message_id}",
+        "timestamp": timestamp,
+        "participants": list(participants),
+        "status": status,
+        "meta": {"thread_id": thread_id, "labels": list(labels), "message_id": message_id},
+    }
+
+
+def test_merge_thread_takes_latest_message_and_unions():
+    unit = merge_thread("t1", [
+        email("1", "t1", "2026-03-02T09:00:00+00:00", status="unread", labels=("INBOX", "IMPORTANT")),
+        email("2", "t1", "2026-03-02T10:00:00+00:00", participants=("b@example.com", "A@example.com")),
+    ])
+    assert unit["id"] == "thread_t1"
+    assert unit["title"] == "Subject 2"
+    assert unit["status"] == "unread"
+    assert unit["participants"] == ["b@example.com", "A@example.com"]
+    assert unit["meta"]["labels"] == ["INBOX", "IMPORTANT"]
+    assert unit["meta"]["message_count"] == 2
+    assert unit["meta"]["unread_count"] == 1
+
+
+def test_aggregate_threads_keeps_first_message_position_and_passes_others_through():
+    meeting = {"id": "calendar_1", "source": "calendar", "timestamp": "2026-03-02T08:00:00+00:00"}
+    items = [
+        email("1", "t1", "2026-03-02T09:00:00+00:00"),
+        meeting,
+        email("2", "t2", "2026-03-02T09:30:00+00:00"),
+        email("3", "t1", "2026-03-02T10:00:00+00:00"),
+    ]
+    aggregated = aggregate_threads(items)
+    assert [item["id"] for item in aggregated] == ["thread_t1", "calendar_1", "email_2"]
+    assert aggregate_threads(aggregated) == aggregated
+
+
+def test_refresh_reuses_unchanged_threads():
+    cache = ThreadViewCache()
+    items = [email("1", "t1", "2026-03-02T09:00:00+00:00"), email("2", "t1", "2026-03-02T10:00:00+00:00")]
+    first = cache.refresh("thread-user", items)
+    second = cache.refresh("thread-user", copy.deepcopy(items))
+    assert second[0] is first[0]
+    assert cache.stats["merged"] == 1 and cache.stats["reused"] == 1
+
+
+def test_refresh_remerges_on_label_change():
+    cache = ThreadViewCache()
+    items = [
+        email("1", "t1", "2026-03-02T09:00:00+00:00", labels=("INBOX", "IMPORTANT")),
+        email("2", "t1", "2026-03-02T10:00:00+00:00"),
+    ]
+    assert "IMPORTANT" in cache.refresh("label-user", items)[0]["meta"]["labels"]
+
+    # Archived and no longer important: same IDs, timestamps and read state
+    changed = copy.deepcopy(items)
+    for item in changed:
+        item["meta"]["labels"] = []
+    assert cache.refresh("label-user", changed)[0]["meta"]["labels"] == []
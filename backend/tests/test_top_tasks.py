@@ -0,0 +1,53 @@
+import random
+
+import main
+
+
+def email(item_id, day, status="unread", content=""):
+    return {
+        "id": item_id, "source": "email", "kind": "email", "title": f"Review {item_id}",
+        "status": status, "content": content, "timestamp": f"2026-03-{day:02d}T09:00:00",
+    }
+
+
+def random_emails(count, seed=7):
+    rng = random.Random(seed)
+    contents = ["", "due friday", "urgent please", "fyi"]
+    return [
+        email(f"m{i}", rng.randint(1, 28), rng.choice(["read", "unread"]), rng.choice(contents))
+        for i in range(count)
+    ]
+
+
+def brute_force_top(items, k):
+    scored = list(main._score_work_items(items, []))
+    order = sorted(
+        range(len(scored)),
+        key=lambda i: (-scored[i][0], main._deadline_rank(scored[i][1]), i),
+    )
+    return [scored[i][2]["id"] for i in order[:k]]
+
+
+def test_heap_selection_matches_a_full_sort(monkeypatch):
+    items = random_emails(200)
+    monkeypatch.setattr(main, "load_thread_items", lambda user_id, use_mock_if_empty=True: items)
+    for k in (1, 5, 50, 500):
+        result = main._compute_top_tasks("top-user", k, main.URGENT_PRIORITY)
+        assert [t["id"] for t in result["tasks"]] == brute_force_top(items, k)
+        assert result["total"] == 200
+
+
+def test_counts_cover_every_task_not_just_the_winners(monkeypatch):
+    items = [
+        email("a", 3, content="urgent"),
+        email("b", 1, content="due"),
+        email("c", 2),
+        email("d", 4, status="read"),
+    ]
+    monkeypatch.setattr(main, "load_thread_items", lambda user_id, use_mock_if_empty=True: items)
+    result = main._compute_top_tasks("top-user", 2, main.URGENT_PRIORITY)
+    assert [t["id"] for t in result["tasks"]] == ["a", "b"]
+    assert result["urgent_count"] == 2
+    assert result["total"] == 4
+
+    assert main._compute_top_tasks("top-user", 0, main.URGENT_PRIORITY)["tasks"] == []
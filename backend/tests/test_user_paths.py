@@ -0,0 +1,70 @@
+import os
+
+import pytest
+
+from services.user_paths import InvalidUserIdError, StorageLayout, shard_for, validate_user_id
+
+
+@pytest.fixture
+def layout(tmp_path):
+    return StorageLayout(tmp_path / "data", tmp_path / "tokens", legacy_token_root=tmp_path)
+
+
+@pytest.mark.parametrize("user_id", ["user_test_a", "alice@example.com", "AbC123-x.y"])
+def test_valid_user_ids(user_id):
+    assert validate_user_id(user_id) == user_id
+
+
+@pytest.mark.parametrize("user_id", ["", "../etc", ".hidden", "a/b", "x" * 200, "users", "users.idx", "push_addresses.json"])
+def test_invalid_user_ids(user_id):
+    with pytest.raises(InvalidUserIdError):
+        validate_user_id(user_id)
+
+
+def test_reads_never_create_directories(layout):
+    path = layout.user_dir("reader")
+    assert path == layout.users_root / shard_for("reader") / "reader"
+    assert not path.exists()
+    assert layout.known_users() == []
+
+
+def test_writes_create_and_register(layout):
+    path = layout.ensure_user_dir("writer")
+    assert path.is_dir()
+    assert layout.ensure_token_file("writer").parent.is_dir()
+    assert layout.known_users() == ["writer"]
+
+
+def test_legacy_directory_is_used_until_migrated(layout):
+    legacy = layout.data_root / "old-user"
+    legacy.mkdir(parents=True)
+    assert layout.user_dir("old-user") == legacy
+
+    target = layout.sharded_user_dir("old-user")
+    target.parent.mkdir(parents=True)
+    os.replace(legacy, target)
+    layout.forget("old-user")
+    assert layout.ensure_user_dir("old-user") == target
+    assert target.is_dir()
+
+
+def test_index_picks_up_users_registered_by_other_workers(layout):
+    other_worker = StorageLayout(layout.data_root, layout.token_root)
+    layout.register_user("first")
+    assert layout.known_users() == ["first"]
+
+    other_worker.register_user("second")
+    assert layout.known_users() == ["first", "second"]
+
+    layout.register_user("third")
+    other_worker.register_user("fourth")
+    assert layout.known_users() == ["first", "fourth", "second", "third"]
+
+
+def test_rebuild_index_finds_sharded_and_legacy_users(layout):
+    layout.ensure_user_dir("sharded")
+    (layout.data_root / "legacy").mkdir()
+    (layout.legacy_token_root / "token_tokenonly.json").write_text("{}")
+    layout.index_file.unlink()
+    assert layout.rebuild_index() == 3
+    assert layout.known_users() == ["legacy", "sharded", "tokenonly"]